@@ -0,0 +1,64 @@
+"""Сравнение сводки по картам: цикл по картам против одной группировки.
+
+Запуск: python -m benchmarks.bench_cards [--rows 200000] [--cards 10 100 1000]
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.views import summarize_cards
+
+
+def legacy_summarize_cards(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Прежняя реализация из main_page: отдельная маска на каждую карту."""
+    cards_summary = []
+    for card in df['Номер карты'].unique():
+        if pd.isna(card):
+            continue
+        card_df = df[df['Номер карты'] == card]
+        total_spent = abs(card_df[card_df['Сумма операции'] < 0]['Сумма операции'].sum())
+        cards_summary.append({
+            "last_digits": str(card),
+            "total_spent": round(total_spent, 2),
+            "cashback": round(total_spent * 0.01, 2)
+        })
+    return cards_summary
+
+
+def make_frame(rows: int, cards: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Номер карты": np.array([f"*{i:04d}" for i in range(cards)], dtype=object)[rng.integers(0, cards, rows)],
+        "Сумма операции": np.round(rng.normal(-500, 2000, rows), 2),
+    })
+
+
+def best_of(func: Callable[[], Any], repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--cards", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    print(f"{'cards':>8} {'legacy, s':>12} {'grouped, s':>12} {'speedup':>9}")
+    for cards in args.cards:
+        df = make_frame(args.rows, cards)
+        assert summarize_cards(df) == legacy_summarize_cards(df)
+        legacy = best_of(lambda: legacy_summarize_cards(df))
+        grouped = best_of(lambda: summarize_cards(df))
+        print(f"{cards:>8} {legacy:>12.4f} {grouped:>12.4f} {legacy / grouped:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
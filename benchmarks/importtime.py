@@ -0,0 +1,96 @@
+"""Время импорта модулей (``python -X importtime``) с бюджетом.
+
+Запуск::
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --module src.utils --top 15
+
+Каждый модуль импортируется в отдельном процессе. Для модулей из ``BUDGETS``
+проверяется суммарное время импорта и то, что тяжелые зависимости из
+``FORBIDDEN`` не загружаются; при превышении команда завершается с кодом 1.
+Время зависит от нагрузки машины, поэтому бюджет проверяется только здесь, а
+тесты проверяют лишь отсутствие запрещенных зависимостей.
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Бюджет суммарного времени импорта, секунды
+BUDGETS: Dict[str, float] = {
+    "src.utils": 0.15,
+    "src.main": 0.15,
+    "src.cache": 0.15,
+    "src.market": 0.15,
+}
+# Зависимости, которые модуль не должен загружать при импорте
+FORBIDDEN: Dict[str, Tuple[str, ...]] = {
+    "src.utils": ("pandas", "numpy", "requests", "dotenv", "pyarrow"),
+    "src.main": ("pandas", "numpy", "requests", "dotenv", "pyarrow"),
+    "src.cache": ("pandas", "numpy", "pyarrow"),
+    "src.market": ("requests",),
+}
+
+
+class ImportRecord(NamedTuple):
+    name: str
+    self_us: int
+    cumulative_us: int
+
+
+def measure_imports(module: str) -> List[ImportRecord]:
+    """Записи ``-X importtime`` для импорта модуля в чистом интерпретаторе."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    records = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us)))
+    return records
+
+
+def forbidden_imports(module: str, records: Sequence[ImportRecord]) -> List[str]:
+    """Тяжелые зависимости, загруженные при импорте модуля (не зависит от скорости машины)."""
+    loaded = {record.name for record in records}
+    return [
+        f"{module}: imports {dependency} at import time"
+        for dependency in FORBIDDEN.get(module, ()) if dependency in loaded
+    ]
+
+
+def check_module(module: str, records: Sequence[ImportRecord]) -> List[str]:
+    """Нарушения бюджета и списка запрещенных зависимостей."""
+    problems = []
+    total = next((r.cumulative_us for r in reversed(records) if r.name == module), 0) / 1e6
+    budget = BUDGETS.get(module)
+    if budget is not None and total > budget:
+        problems.append(f"{module}: {total:.3f} s > budget {budget:.3f} s")
+    return problems + forbidden_imports(module, records)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Время импорта модулей finance-analyzer")
+    parser.add_argument("--module", nargs="*", default=list(BUDGETS))
+    parser.add_argument("--top", type=int, default=10, help="сколько самых дорогих импортов показать")
+    args = parser.parse_args(argv)
+
+    problems = []
+    for module in args.module:
+        records = measure_imports(module)
+        total = next((r.cumulative_us for r in reversed(records) if r.name == module), 0)
+        print(f"{module}: {total / 1e3:.1f} ms")
+        for record in sorted(records, key=lambda r: r.self_us, reverse=True)[:args.top]:
+            print(f"    {record.self_us / 1e3:>8.1f} ms  {record.name}")
+        problems.extend(check_module(module, records))
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
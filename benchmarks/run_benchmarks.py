@@ -0,0 +1,142 @@
+"""Набор бенчмарков для загрузки, представлений, отчетов и сервисов.
+
+Запуск::
+
+    python -m benchmarks.run_benchmarks --sizes 10000 100000 1000000
+    python -m benchmarks.run_benchmarks --sizes 10000 --compare benchmarks/results/old.json
+
+Результаты сохраняются в JSON (по умолчанию в benchmarks/results/), чтобы
+сравнивать прогоны между собой. Запись и чтение .xlsx на 10^6 строк занимают
+минуты; для быстрых прогонов используйте ``--format csv``.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from unittest.mock import patch
+
+import pandas as pd
+
+from data.generate_data import generate_rates, generate_transactions, write_dataset
+from src import alerts, fx, reports, services, views
+from src.utils import iter_transactions, load_transactions
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+ALERT_SETTINGS = {"alerts": {"category_budgets": {"Супермаркеты": 20000}, "anomaly_by": ["card", "category"]}}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Время выполнения: минимум и медиана по repeat запускам."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {"min": min(timings), "median": statistics.median(timings), "repeat": repeat}
+
+
+def benchmark_cases(df: pd.DataFrame, file_path: str) -> Dict[str, Callable[[], Any]]:
+    """Сценарии для одного набора данных."""
+    date = df["Дата операции"].max().strftime("%Y-%m-%d %H:%M:%S")
+    month = df["Дата операции"].max().strftime("%Y-%m")
+    year, month_number = int(month[:4]), int(month[5:])
+    chunks = [df.iloc[start:start + 50_000] for start in range(0, len(df), 50_000)]
+    # Курсы покрывают все даты выгрузки, чтобы пересчет не упирался в строки без курса
+    dates = df["Дата операции"]
+    rates = generate_rates(f"{dates.min() - pd.Timedelta(days=7):%Y-%m-%d}", f"{dates.max():%Y-%m-%d}")
+    rates["base"] = fx.BASE_CURRENCY
+
+    return {
+        "utils.load_transactions[cold]": lambda: load_transactions(file_path, use_cache=False),
+        "utils.load_transactions[cached]": lambda: load_transactions(file_path),
+        "utils.iter_transactions": lambda: sum(len(chunk) for chunk in iter_transactions(file_path)),
+        "views.main_page": lambda: views.main_page(date, df),
+        "views.events_page": lambda: views.events_page(date, "Q", df=df),
+        "reports.spending_by_category": lambda: reports.spending_by_category(df, "Супермаркеты", date),
+        "reports.spending_by_weekday": lambda: reports.spending_by_weekday(df, date),
+        "reports.spending_by_category_chunks": lambda: reports.spending_by_category_chunks(
+            chunks, "Супермаркеты", date),
+        "reports.spending_by_weekday_chunks": lambda: reports.spending_by_weekday_chunks(chunks, date),
+        "services.cashback_categories": lambda: services.cashback_categories(df, year, month_number),
+        "services.cashback_categories_chunks": lambda: services.cashback_categories_chunks(
+            chunks, year, month_number),
+        "services.investment_bank": lambda: services.investment_bank(month, df, 50),
+        "services.simple_search": lambda: services.simple_search("супермаркет", df, limit=100),
+        "services.scan_transactions": lambda: services.scan_transactions(df),
+        "services.find_phone_transactions": lambda: services.find_phone_transactions(df),
+        "alerts.replay": lambda: alerts.replay(df, ALERT_SETTINGS),
+        "fx.convert_transactions": lambda: fx.convert_transactions(df, rates),
+    }
+
+
+def run(sizes: Sequence[int], file_format: str, repeat: int, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "format": file_format,
+        "sizes": {},
+    }
+    # Рыночные данные не участвуют в замерах: сеть дала бы только шум
+    with patch("src.views.get_currency_rates", return_value=[]), \
+            patch("src.views.get_stock_prices", return_value=[]), \
+            tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            file_path = os.path.join(tmp_dir, f"operations_{size}.{file_format}")
+            write_dataset(generate_transactions(size, cards=20), file_path)
+            df = load_transactions(file_path)
+
+            timings = {}
+            for name, func in benchmark_cases(df, file_path).items():
+                if only and not any(part in name for part in only):
+                    continue
+                timings[name] = measure(func, repeat)
+                print(f"{size:>9} {name:<42} {timings[name]['min']:>10.4f} s")
+            results["sizes"][str(size)] = timings
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Печатает отношение времени текущего прогона к сохраненному."""
+    print(f"\n{'size':>9} {'benchmark':<42} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for size, timings in current["sizes"].items():
+        for name, timing in timings.items():
+            old = baseline.get("sizes", {}).get(size, {}).get(name)
+            if old is None:
+                continue
+            ratio = timing["min"] / old["min"] if old["min"] else float("inf")
+            print(f"{size:>9} {name:<42} {old['min']:>10.4f} {timing['min']:>10.4f} {ratio:>6.2f}x")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарки finance-analyzer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--format", choices=["xlsx", "csv", "parquet"], default="xlsx")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", help="запускать только бенчмарки, содержащие эти подстроки")
+    parser.add_argument("--output", help="путь к JSON с результатами")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    results = run(args.sizes, args.format, args.repeat, args.only)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены в {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,35 @@
-import pandas as pd
+import argparse
+import os
 from datetime import datetime
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Категории с MCC и примерами описаний, как в выгрузках банка
+CATEGORIES = {
+    "Супермаркеты": (5411, ["Колхоз", "Магнит", "SPAR", "Перекрёсток", "Дикси"]),
+    "Фастфуд": (5814, ["McDonald's", "Бургер Кинг", "Kofe s sobojj", "Rumyanyj Khleb"]),
+    "Транспорт": (4131, ["Метро Санкт-Петербург", "Яндекс Такси"]),
+    "Переводы": (6012, ["Перевод с карты", "Константин Л.", "Светлана Т."]),
+    "Ж/д билеты": (4112, ["РЖД"]),
+    "Различные товары": (5399, ["Ozon.ru", "Wildberries"]),
+    "Связь": (7379, ["Тинькофф Мобайл", "Я МТС", "МТС"]),
+    "Пополнения": (6012, ["Пополнение через Газпромбанк", "Пополнение с карты"]),
+    "Аптеки": (5912, ["Apteka 7", "Аптека Вита"]),
+    "Каршеринг": (7512, ["Ситидрайв", "Делимобиль"]),
+    "Рестораны": (5812, ["OOO Frittella", "Pingvin Kofe I Chaj"]),
+    "Наличные": (6011, ["Снятие в банкомате Сбербанк"]),
+    "Дом и ремонт": (5200, ["Леруа Мерлен", "OOO \"Nord-S\""]),
+    "Топливо": (5541, ["Circle K", "Лукойл"]),
+    "Образование": (8299, ["СПбПУ"]),
+    "Одежда и обувь": (5651, ["Uniqlo", "Спортмастер"]),
+}
+INCOME_CATEGORIES = {"Пополнения"}
+CURRENCIES = ["RUB", "RUB", "RUB", "RUB", "RUB", "RUB", "RUB", "RUB", "USD", "EUR"]
+# Начальные курсы к рублю для синтетической таблицы курсов
+RATES = {"USD": 75.0, "EUR": 85.0}
+
 
 def generate_test_excel(file_path: str = "data/operations.xlsx"):
     """Генерирует тестовый Excel-файл с транзакциями."""
@@ -14,5 +44,116 @@ def generate_test_excel(file_path: str = "data/operations.xlsx"):
     df.to_excel(file_path, index=False)
     print(f"Сгенерирован тестовый файл: {file_path}")
 
+
+def generate_transactions(
+    rows: int,
+    cards: int = 5,
+    categories: Optional[int] = None,
+    start: str = "2021-01-01",
+    end: str = "2023-12-31",
+    phone_share: float = 0.02,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Синтетическая выгрузка транзакций заданного размера.
+
+    Колонки повторяют банковскую выгрузку, описания берутся из справочника
+    магазинов, доля ``phone_share`` описаний содержит номер телефона.
+    """
+    rng = np.random.default_rng(seed)
+    names = list(CATEGORIES)[:categories] if categories else list(CATEGORIES)
+
+    start_ts, end_ts = pd.Timestamp(start), pd.Timestamp(end)
+    span_seconds = int((end_ts - start_ts).total_seconds())
+    dates = start_ts + pd.to_timedelta(np.sort(rng.integers(0, span_seconds, rows))[::-1], "s")
+
+    category = np.array(names, dtype=object)[rng.integers(0, len(names), rows)]
+    is_income = np.isin(category, list(INCOME_CATEGORIES))
+    amounts = np.round(rng.lognormal(mean=5.5, sigma=1.2, size=rows), 2)
+    amounts = np.where(is_income, amounts * 10, -amounts)
+
+    descriptions = np.empty(rows, dtype=object)
+    mcc = np.empty(rows, dtype="float64")
+    for name in names:
+        mask = category == name
+        code, merchants = CATEGORIES[name]
+        descriptions[mask] = np.array(merchants, dtype=object)[rng.integers(0, len(merchants), mask.sum())]
+        mcc[mask] = code
+    with_phone = rng.random(rows) < phone_share
+    phones = [
+        f"+7 9{rng.integers(10, 99)} {rng.integers(100, 999)}-{rng.integers(10, 99)}-{rng.integers(10, 99)}"
+        for _ in range(int(with_phone.sum()))
+    ]
+    descriptions[with_phone] = [f"{text} {phone}" for text, phone in zip(descriptions[with_phone], phones)]
+
+    card_numbers = np.array([f"*{number:04d}" for number in rng.choice(10_000, cards, replace=False)], dtype=object)
+    currency = np.array(CURRENCIES, dtype=object)[rng.integers(0, len(CURRENCIES), rows)]
+    cashback = np.where(amounts < 0, np.floor(-amounts / 100), 0.0)
+
+    return pd.DataFrame({
+        "Дата операции": dates,
+        "Дата платежа": dates.normalize(),
+        "Номер карты": card_numbers[rng.integers(0, cards, rows)],
+        "Статус": np.where(rng.random(rows) < 0.995, "OK", "FAILED"),
+        "Сумма операции": amounts,
+        "Валюта операции": currency,
+        "Сумма платежа": amounts,
+        "Валюта платежа": "RUB",
+        "Кешбэк": cashback,
+        "Категория": category,
+        "MCC": mcc,
+        "Описание": descriptions,
+    })
+
+
+def generate_rates(start: str = "2021-01-01", end: str = "2023-12-31", seed: int = 0) -> pd.DataFrame:
+    """Синтетическая таблица курсов к рублю по рабочим дням (формат src.fx)."""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start, end)
+    frames = []
+    for currency, rate in RATES.items():
+        walk = rate * np.exp(np.cumsum(rng.normal(0, 0.005, len(days))))
+        frames.append(pd.DataFrame({"date": days, "currency": currency, "rate": np.round(walk, 4)}))
+    return pd.concat(frames, ignore_index=True).sort_values(["date", "currency"], ignore_index=True)
+
+
+def write_dataset(df: pd.DataFrame, file_path: str) -> None:
+    """Сохраняет выгрузку в .xlsx, .csv или .parquet (по расширению файла)."""
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if file_path.endswith(".csv"):
+        df.to_csv(file_path, index=False)
+    elif file_path.endswith(".parquet"):
+        df.to_parquet(file_path, index=False)
+    else:
+        df.to_excel(file_path, index=False)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Генератор синтетических выгрузок транзакций")
+    parser.add_argument("output", nargs="*", default=["data/synthetic.xlsx"],
+                        help="файлы для записи: .xlsx, .csv или .parquet")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--cards", type=int, default=5)
+    parser.add_argument("--categories", type=int, default=None)
+    parser.add_argument("--start", default="2021-01-01")
+    parser.add_argument("--end", default="2023-12-31")
+    parser.add_argument("--phone-share", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rates", default=None, help="записать также таблицу курсов (.csv или .parquet)")
+    args = parser.parse_args(argv)
+
+    df = generate_transactions(
+        args.rows, args.cards, args.categories, args.start, args.end, args.phone_share, args.seed
+    )
+    for file_path in args.output:
+        write_dataset(df, file_path)
+        print(f"Сгенерирован файл: {file_path} ({len(df)} строк)")
+    if args.rates:
+        rates = generate_rates(args.start, args.end, args.seed)
+        write_dataset(rates, args.rates)
+        print(f"Сгенерирована таблица курсов: {args.rates} ({len(rates)} строк)")
+
+
 if __name__ == "__main__":
-    generate_test_excel()
\ No newline at end of file
+    main()
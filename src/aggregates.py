@@ -0,0 +1,155 @@
+"""Материализованные помесячные агрегаты для отчетов и страницы событий.
+
+Куб хранит суммы и количества по ключу (месяц, категория, карта, день недели).
+Запрос за период собирается из ячеек полных месяцев внутри окна и из «сырых»
+строк только для неполных месяцев на краях окна, поэтому время ответа зависит
+от числа месяцев, а не от числа транзакций.
+"""
+import logging
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from .store import TransactionStore
+from .windows import DATE_COLUMN, DateLike, calendar_columns, month_key, month_start, weekdays
+
+logger = logging.getLogger(__name__)
+
+CUBE_KEYS = ["month", "category", "card", "weekday"]
+MEASURES = [
+    "rows",
+    "spend_sum", "spend_count",  # траты по «Сумма операции» (< 0)
+    "expense_sum", "expense_count",  # расходы по «Сумма платежа» (< 0)
+    "income_sum", "income_count",  # поступления по «Сумма платежа» (> 0)
+    "cashback_sum",
+]
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+_ONE_NS = pd.Timedelta(1, "ns")
+
+
+def _column(frame: pd.DataFrame, name: str) -> pd.Series:
+    if name in frame.columns:
+        return pd.to_numeric(frame[name], errors="coerce")
+    return pd.Series(np.nan, index=frame.index)
+
+
+def build_cube(frame: pd.DataFrame) -> pd.DataFrame:
+    """Агрегирует строки (с заполненной датой) в ячейки куба."""
+    valid = frame[frame[DATE_COLUMN].notna()]
+    month_keys, day_ordinals = calendar_columns(valid)
+    spend = _column(valid, "Сумма операции")
+    payment = _column(valid, "Сумма платежа")
+
+    measures = pd.DataFrame({
+        "rows": np.ones(len(valid), dtype="int64"),
+        "spend_sum": spend.where(spend < 0, 0.0),
+        "spend_count": (spend < 0).astype("int64"),
+        "expense_sum": payment.where(payment < 0, 0.0),
+        "expense_count": (payment < 0).astype("int64"),
+        "income_sum": payment.where(payment > 0, 0.0),
+        "income_count": (payment > 0).astype("int64"),
+        "cashback_sum": _column(valid, "Кешбэк").fillna(0.0),
+    }, index=valid.index)
+    keys = [
+        pd.Series(month_keys.astype("int64"), index=valid.index, name="month"),
+        valid["Категория"].rename("category") if "Категория" in valid.columns
+        else pd.Series(np.nan, index=valid.index, name="category"),
+        valid["Номер карты"].rename("card") if "Номер карты" in valid.columns
+        else pd.Series(np.nan, index=valid.index, name="card"),
+        pd.Series(weekdays(day_ordinals).astype("int64"), index=valid.index, name="weekday"),
+    ]
+    return measures.groupby(keys, dropna=False, observed=True).sum()
+
+
+class MonthlyAggregates:
+    """Куб помесячных агрегатов поверх TransactionStore.
+
+    ``append`` дополняет куб агрегатами только новых строк. Для неполных
+    месяцев на краях окна используются строки из хранилища (бинарный поиск
+    по дате), поэтому результаты совпадают с расчетом по исходным строкам.
+    """
+
+    def __init__(self, store: TransactionStore) -> None:
+        self.store = store
+        self.cube = build_cube(store.frame)
+        logger.info(f"Построен куб агрегатов: {len(self.cube)} ячеек")
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "MonthlyAggregates":
+        return cls(TransactionStore(df))
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @property
+    def empty(self) -> bool:
+        return self.store.empty
+
+    def append(self, df: pd.DataFrame) -> None:
+        """Добавляет новые транзакции: куб обновляется только по ним."""
+        self.store.append(df)
+        delta = build_cube(df.assign(**{DATE_COLUMN: pd.to_datetime(df[DATE_COLUMN])}))
+        self.cube = pd.concat([self.cube, delta]).groupby(level=CUBE_KEYS, dropna=False, observed=True).sum()
+
+    def cells(self, start: DateLike = None, end: DateLike = None) -> pd.DataFrame:
+        """Ячейки куба, покрывающие окно [start, end]."""
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+
+        # Полные месяцы внутри окна: [first_full, last_full]
+        if start is None:
+            first_full = None
+        else:
+            first_full = month_key(start) if start == month_start(month_key(start)) else month_key(start) + 1
+        if end is None:
+            last_full = None
+        else:
+            last_full = month_key(end) if end == month_start(month_key(end) + 1) - _ONE_NS else month_key(end) - 1
+
+        if first_full is not None and last_full is not None and first_full > last_full:
+            return build_cube(self.store.slice(start, end))
+
+        months = self.cube.index.get_level_values("month")
+        mask = np.ones(len(months), dtype=bool)
+        parts = []
+        if first_full is not None:
+            mask &= months >= first_full
+            parts.append(build_cube(self.store.slice(start, month_start(first_full) - _ONE_NS)))
+        if last_full is not None:
+            mask &= months <= last_full
+            parts.append(build_cube(self.store.slice(month_start(last_full + 1), end)))
+        parts.append(self.cube[mask])
+        return pd.concat(parts)
+
+    def category_spending(
+            self,
+            category: str,
+            start: DateLike = None,
+            end: DateLike = None
+    ) -> Tuple[float, int]:
+        """Сумма трат и число строк категории за окно."""
+        cells = self.cells(start, end)
+        cells = cells[cells.index.get_level_values("category") == category]
+        return float(cells["spend_sum"].sum()), int(cells["rows"].sum())
+
+    def weekday_spending(self, start: DateLike = None, end: DateLike = None) -> pd.DataFrame:
+        """Сумма модулей трат и их количество по дням недели (индекс — название дня)."""
+        grouped = self.cells(start, end).groupby(level="weekday", observed=True)[["spend_sum", "spend_count"]].sum()
+        grouped = grouped[grouped["spend_count"] > 0]
+        grouped["spend_sum"] = grouped["spend_sum"].abs()
+        grouped.index = [WEEKDAY_NAMES[day] for day in grouped.index]
+        return grouped
+
+    def payments_by_category(
+            self,
+            start: DateLike = None,
+            end: DateLike = None
+    ) -> Tuple[pd.DataFrame, pd.Series]:
+        """Расходы и поступления по категориям за окно и итоги по всем строкам (включая без категории)."""
+        columns = ["expense_sum", "expense_count", "income_sum", "income_count"]
+        cells = self.cells(start, end)[columns]
+        totals = cells.sum()
+        by_category = cells.groupby(level="category", observed=True).sum()
+        return by_category, totals
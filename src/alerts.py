@@ -0,0 +1,288 @@
+"""Потоковые оповещения о бюджетах и аномальных тратах.
+
+Транзакции поступают по одной (``AlertEngine.process``) или пачками
+(``process_batch``), а состояние обновляется за O(1) на транзакцию, без
+пересчета истории:
+
+* скользящая сумма трат категории за ``budget_days`` дней — очередь дневных
+  сумм, из которой вытесняются дни за пределами окна; оповещение ``budget``
+  срабатывает, когда сумма переходит бюджет категории;
+* среднее и дисперсия трат по карте и по категории — алгоритм Уэлфорда;
+  оповещение ``anomaly`` срабатывает, когда трата больше среднего на
+  ``anomaly_sigma`` стандартных отклонений (после ``anomaly_min_history`` трат).
+
+Правила берутся из ``user_settings.json``::
+
+    "alerts": {
+        "category_budgets": {"Супермаркеты": 20000, "Фастфуд": 5000},
+        "budget_days": 30,
+        "anomaly_sigma": 4,
+        "anomaly_min_history": 20,
+        "anomaly_by": ["card"]
+    }
+
+Траты — операции с отрицательной «Сумма операции». Транзакции ожидаются в
+порядке дат; ``replay`` сортирует выгрузку сам. Запуск::
+
+    python -m src.alerts data/operations.xlsx --settings user_settings.json
+"""
+import argparse
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .metrics import instrument
+from .timeseries import GROUP_COLUMNS
+from .utils import load_transactions
+from .windows import DATE_COLUMN, MISSING_KEY, calendar_columns
+
+logger = logging.getLogger(__name__)
+
+AMOUNT_COLUMN = "Сумма операции"
+DEFAULT_BUDGET_DAYS = 30
+DEFAULT_ANOMALY_SIGMA = 4.0
+DEFAULT_MIN_HISTORY = 20
+NANOSECONDS_PER_DAY = 86_400 * 10 ** 9
+
+
+class Alert(NamedTuple):
+    kind: str  # budget или anomaly
+    group: str  # category или card
+    key: Any  # категория или номер карты
+    date: pd.Timestamp
+    amount: float  # трата, вызвавшая оповещение (положительная)
+    value: float  # сумма за окно (budget) или отклонение в сигмах (anomaly)
+    limit: float  # бюджет или порог в сигмах
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "group": self.group,
+            "key": self.key,
+            "date": self.date.isoformat(),
+            "amount": round(self.amount, 2),
+            "value": round(self.value, 2),
+            "limit": self.limit,
+        }
+
+
+class AlertRules(NamedTuple):
+    category_budgets: Dict[Any, float] = {}
+    budget_days: int = DEFAULT_BUDGET_DAYS
+    anomaly_sigma: float = DEFAULT_ANOMALY_SIGMA
+    anomaly_min_history: int = DEFAULT_MIN_HISTORY
+    anomaly_by: Tuple[str, ...] = ("card",)
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "AlertRules":
+        """Правила из секции ``alerts`` настроек; отсутствующие поля — по умолчанию."""
+        section = settings.get("alerts") or {}
+        anomaly_by = tuple(section.get("anomaly_by", cls._field_defaults["anomaly_by"]))
+        unknown = set(anomaly_by) - set(GROUP_COLUMNS)
+        if unknown:
+            raise ValueError(f"anomaly_by must be a subset of {sorted(GROUP_COLUMNS)}, got {sorted(unknown)}")
+        return cls(
+            category_budgets={key: float(value) for key, value in section.get("category_budgets", {}).items()},
+            budget_days=int(section.get("budget_days", DEFAULT_BUDGET_DAYS)),
+            anomaly_sigma=float(section.get("anomaly_sigma", DEFAULT_ANOMALY_SIGMA)),
+            anomaly_min_history=int(section.get("anomaly_min_history", DEFAULT_MIN_HISTORY)),
+            anomaly_by=anomaly_by,
+        )
+
+
+class _Window:
+    """Сумма трат за последние ``days`` дней: очередь (день, сумма за день)."""
+
+    __slots__ = ("days", "total")
+
+    def __init__(self) -> None:
+        self.days: Deque[List[float]] = deque()
+        self.total = 0.0
+
+    def add(self, day: int, spend: float, length: int) -> Optional[float]:
+        """Добавляет трату дня day; возвращает сумму окна до нее или None, если трата старше окна."""
+        queue = self.days
+        if queue and day <= queue[-1][0] - length:
+            return None
+        start = day - length
+        while queue and queue[0][0] <= start:
+            self.total -= queue.popleft()[1]
+        if queue and queue[-1][0] >= day:
+            # Опоздавшая трата засчитывается в последний день окна
+            queue[-1][1] += spend
+        else:
+            queue.append([day, spend])
+        before = self.total
+        self.total = before + spend
+        return before
+
+
+def _day_ordinal(date: pd.Timestamp) -> int:
+    return date.value // NANOSECONDS_PER_DAY
+
+
+class AlertEngine:
+    """Инкрементальная оценка правил: состояние по категориям и картам обновляется на каждую трату."""
+
+    def __init__(self, rules: Optional[AlertRules] = None, on_alert: Optional[Callable[[Alert], None]] = None) -> None:
+        self.rules = rules or AlertRules()
+        self.on_alert = on_alert
+        self.processed = 0
+        self._windows: Dict[Any, _Window] = {}
+        # Группа -> ключ -> [число трат, среднее, сумма квадратов отклонений]
+        self._moments: Dict[str, Dict[Any, List[float]]] = {group: {} for group in GROUP_COLUMNS}
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any], **kwargs: Any) -> "AlertEngine":
+        return cls(AlertRules.from_settings(settings), **kwargs)
+
+    def category_total(self, category: Any) -> float:
+        """Траты категории в текущем окне бюджета."""
+        window = self._windows.get(category)
+        return window.total if window is not None else 0.0
+
+    def spending_stats(self, group: str, key: Any) -> Tuple[int, float, float]:
+        """Число трат, среднее и стандартное отклонение для карты или категории."""
+        count, mean, squares = self._moments[group].get(key, (0, 0.0, 0.0))
+        std = math.sqrt(squares / (count - 1)) if count > 1 else 0.0
+        return int(count), mean, std
+
+    def process(self, date: Any, amount: float, category: Any = None, card: Any = None) -> List[Alert]:
+        """Обрабатывает одну транзакцию и возвращает сработавшие оповещения."""
+        date = pd.Timestamp(date)
+        if pd.isna(date):
+            return []
+        return self._update([date], [_day_ordinal(date)], [amount], [category], [card])
+
+    def process_batch(self, df: pd.DataFrame) -> List[Alert]:
+        """Обрабатывает пачку транзакций в порядке строк."""
+        if df.empty or DATE_COLUMN not in df.columns or AMOUNT_COLUMN not in df.columns:
+            return []
+        days = calendar_columns(df)[1]
+        return self._update(
+            df[DATE_COLUMN].to_numpy(),
+            days.tolist(),
+            df[AMOUNT_COLUMN].to_numpy(dtype="float64", na_value=np.nan).tolist(),
+            self._column(df, GROUP_COLUMNS["category"]),
+            self._column(df, GROUP_COLUMNS["card"]),
+        )
+
+    @staticmethod
+    def _column(df: pd.DataFrame, column: str) -> List[Any]:
+        if column not in df.columns:
+            return [None] * len(df)
+        return df[column].astype(object).where(df[column].notna(), None).tolist()
+
+    def _update(
+            self,
+            dates: Sequence[Any],
+            days: Sequence[int],
+            amounts: Sequence[float],
+            categories: Sequence[Any],
+            cards: Sequence[Any]
+    ) -> List[Alert]:
+        # Горячий цикл: атрибуты и правила вынесены в локальные переменные
+        rules = self.rules
+        budgets = rules.category_budgets
+        budget_days = rules.budget_days
+        sigma = rules.anomaly_sigma
+        min_history = rules.anomaly_min_history
+        windows = self._windows
+        by_category = self._moments["category"]
+        by_card = self._moments["card"]
+        check_category = "category" in rules.anomaly_by
+        check_card = "card" in rules.anomaly_by
+        fired: List[Tuple[int, str, str, Any, float, float, float]] = []
+
+        for row, (day, amount, category, card) in enumerate(zip(days, amounts, categories, cards)):
+            if not amount < 0 or day == MISSING_KEY:
+                continue
+            spend = -amount
+
+            if category is not None:
+                window = windows.get(category)
+                if window is None:
+                    window = windows[category] = _Window()
+                before = window.add(day, spend, budget_days)
+                budget = budgets.get(category)
+                if budget is not None and before is not None and before <= budget < window.total:
+                    fired.append((row, "budget", "category", category, spend, window.total, budget))
+
+            for group, key, moments, check in (
+                    ("category", category, by_category, check_category),
+                    ("card", card, by_card, check_card),
+            ):
+                if key is None:
+                    continue
+                state = moments.get(key)
+                if state is None:
+                    moments[key] = [1, spend, 0.0]
+                    continue
+                count, mean, squares = state
+                if check and count >= min_history and squares > 0:
+                    deviation = (spend - mean) / math.sqrt(squares / (count - 1))
+                    if deviation > sigma:
+                        fired.append((row, "anomaly", group, key, spend, deviation, sigma))
+                # Уэлфорд: обновление среднего и суммы квадратов отклонений за O(1)
+                count += 1
+                delta = spend - mean
+                mean += delta / count
+                state[0], state[1], state[2] = count, mean, squares + delta * (spend - mean)
+
+        self.processed += len(amounts)
+        alerts = [
+            Alert(kind, group, key, pd.Timestamp(dates[row]), spend, value, limit)
+            for row, kind, group, key, spend, value, limit in fired
+        ]
+        if self.on_alert is not None:
+            for alert in alerts:
+                self.on_alert(alert)
+        return alerts
+
+
+@instrument
+def replay(
+        transactions: Union[str, pd.DataFrame],
+        settings: Optional[Dict[str, Any]] = None,
+        batch_size: int = 100_000
+) -> List[Alert]:
+    """Прогоняет выгрузку через движок в порядке дат пачками по batch_size строк."""
+    from .views import load_user_settings
+
+    df = load_transactions(transactions) if isinstance(transactions, str) else transactions
+    engine = AlertEngine.from_settings(load_user_settings() if settings is None else settings)
+    if DATE_COLUMN not in df.columns:
+        return []
+    ordered = df.sort_values(DATE_COLUMN, kind="stable", na_position="last")
+    alerts: List[Alert] = []
+    for start in range(0, len(ordered), batch_size):
+        alerts.extend(engine.process_batch(ordered.iloc[start:start + batch_size]))
+    return alerts
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from .responses import dumps
+    from .views import SETTINGS_PATH, load_user_settings
+
+    parser = argparse.ArgumentParser(description="Оповещения о бюджетах и аномальных тратах по выгрузке")
+    parser.add_argument("file", help="файл выгрузки (.xlsx/.xls/.csv/.parquet)")
+    parser.add_argument("--settings", default=SETTINGS_PATH, help="файл настроек с секцией alerts")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    df = load_transactions(args.file)
+    started = time.perf_counter()
+    alerts = replay(df, load_user_settings(args.settings))
+    elapsed = time.perf_counter() - started
+    for alert in alerts:
+        print(dumps(alert.to_dict()).decode("utf-8"))
+    logger.info(f"Транзакций: {len(df)}, оповещений: {len(alerts)}, {len(df) / max(elapsed, 1e-9):,.0f} в секунду")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Пакетный запуск отчетов по множеству выгрузок на нескольких процессах.
+
+Задание — пара (путь к файлу, спецификация отчета), спецификация — словарь
+с именем отчета и его параметрами::
+
+    jobs = [
+        ("exports/client_1.xlsx",
+         {"report": "spending_by_category", "category": "Супермаркеты", "date": "2023-12-31"}),
+        ("exports/client_1.xlsx", {"report": "spending_by_weekday", "date": "2023-12-31"}),
+        ("exports/client_2.xlsx", {"report": "events_page", "date_time": "2023-12-31 23:59:59", "period": "Y"}),
+    ]
+    results = run_batch(jobs, max_workers=8, progress=print)
+
+Задания одного файла выполняются одним процессом: файл загружается один раз,
+все отчеты считаются по общему TransactionStore. Результаты возвращаются в
+порядке заданий и в тех же форматах, что и у одиночных вызовов.
+
+Память ограничена тем, что в работе одновременно не больше ``max_pending``
+файлов, а процессы пула перезапускаются каждые ``max_tasks_per_child`` файлов
+(Python 3.11+), чтобы фрагментация кучи не копилась за ночь.
+"""
+import logging
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .reports import spending_by_category, spending_by_weekday
+from .store import TransactionStore
+from .utils import load_transactions
+from .views import events_page
+
+logger = logging.getLogger(__name__)
+
+ReportSpec = Dict[str, Any]
+Job = Tuple[str, ReportSpec]
+ProgressCallback = Callable[[int, int], None]
+
+DEFAULT_MAX_TASKS_PER_CHILD = 50
+
+
+def _spending_by_category(source: TransactionStore, spec: ReportSpec) -> Dict[str, float]:
+    return spending_by_category(source, spec["category"], spec.get("date"))
+
+
+def _spending_by_weekday(source: TransactionStore, spec: ReportSpec) -> Dict[str, float]:
+    return spending_by_weekday(source, spec.get("date"))
+
+
+def _events_page(source: TransactionStore, spec: ReportSpec) -> Dict[str, Any]:
+    return events_page(spec["date_time"], spec.get("period", "M"), df=source)
+
+
+REPORTS: Dict[str, Callable[[TransactionStore, ReportSpec], Dict[str, Any]]] = {
+    "spending_by_category": _spending_by_category,
+    "spending_by_weekday": _spending_by_weekday,
+    "events_page": _events_page,
+}
+
+
+def run_file_reports(file_path: str, specs: Sequence[ReportSpec]) -> List[Dict[str, Any]]:
+    """Загружает файл один раз и считает по нему все отчеты (выполняется в процессе пула).
+
+    Ошибка чтения файла пробрасывается: пустые отчеты по сломанной выгрузке не
+    отличить от клиента без трат, поэтому все отчеты файла получают ошибку.
+    """
+    store = TransactionStore(load_transactions(file_path, raise_errors=True))
+    results = []
+    for spec in specs:
+        try:
+            results.append(REPORTS[spec["report"]](store, spec))
+        except Exception as e:
+            logger.error(f"Ошибка отчета {spec.get('report')} для {file_path}: {e}")
+            results.append({"error": str(e)})
+    return results
+
+
+def group_jobs(jobs: Sequence[Job]) -> Dict[str, List[int]]:
+    """Номера заданий по файлам в порядке первого появления файла."""
+    groups: Dict[str, List[int]] = {}
+    for position, (file_path, spec) in enumerate(jobs):
+        if spec.get("report") not in REPORTS:
+            raise ValueError(f"Unknown report: {spec.get('report')}")
+        groups.setdefault(file_path, []).append(position)
+    return groups
+
+
+def run_batch(
+        jobs: Sequence[Job],
+        max_workers: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None,
+        max_pending: Optional[int] = None,
+        max_tasks_per_child: Optional[int] = DEFAULT_MAX_TASKS_PER_CHILD
+) -> List[Dict[str, Any]]:
+    """Выполняет задания на пуле процессов и возвращает результаты в порядке заданий.
+
+    ``progress(done, total)`` вызывается в текущем процессе после каждого
+    обработанного файла. ``max_pending`` (по умолчанию 2 * max_workers) —
+    сколько файлов одновременно отправлено в пул.
+    """
+    groups = group_jobs(jobs)
+    results: List[Dict[str, Any]] = [{} for _ in jobs]
+    if not groups:
+        return results
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * max_workers
+    pool_options: Dict[str, Any] = {"max_workers": max_workers}
+    if max_tasks_per_child and sys.version_info >= (3, 11):
+        pool_options["max_tasks_per_child"] = max_tasks_per_child
+
+    pending_files = iter(groups.items())
+    running: Dict[Future, List[int]] = {}
+    done_count = 0
+    logger.info(f"Пакетный запуск: {len(jobs)} отчетов по {len(groups)} файлам, процессов: {max_workers}")
+
+    with ProcessPoolExecutor(**pool_options) as executor:
+
+        def submit_next() -> bool:
+            item = next(pending_files, None)
+            if item is None:
+                return False
+            file_path, positions = item
+            future = executor.submit(run_file_reports, file_path, [jobs[i][1] for i in positions])
+            running[future] = positions
+            return True
+
+        while len(running) < max_pending and submit_next():
+            pass
+
+        while running:
+            finished: Set[Future] = wait(running, return_when=FIRST_COMPLETED).done
+            for future in finished:
+                positions = running.pop(future)
+                try:
+                    file_results = future.result()
+                except Exception as e:
+                    # Файл не прочитан или процесс пула упал (например, из-за нехватки памяти) —
+                    # отмечаем отчеты файла ошибкой
+                    logger.error(f"Ошибка обработки файла {jobs[positions[0]][0]}: {e}")
+                    file_results = [{"error": str(e)} for _ in positions]
+                for position, result in zip(positions, file_results):
+                    results[position] = result
+                done_count += 1
+                if progress is not None:
+                    progress(done_count, len(groups))
+                submit_next()
+
+    return results
@@ -0,0 +1,197 @@
+"""Колоночный кэш (sidecar) для load_transactions.
+
+Рядом с исходным файлом выгрузки хранятся два файла:
+``<имя>.cache.feather`` (или ``.cache.pkl``, если pyarrow не установлен) с уже
+нормализованным DataFrame и ``<имя>.cache.json`` с отпечатком исходника.
+Кэш считается актуальным, пока совпадают размер и mtime исходного файла;
+если mtime изменился, а размер нет, сверяется SHA-256 содержимого.
+
+Запуск из командной строки::
+
+    python -m src.cache warm data/operations.xlsx
+    python -m src.cache purge data/operations.xlsx
+
+pandas и pyarrow импортируются при первом чтении или записи кэша.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Увеличивается при изменении нормализации в load_transactions: старые кэши перестраиваются
+CACHE_VERSION = 3
+META_SUFFIX = ".cache.json"
+FEATHER_SUFFIX = ".cache.feather"
+PICKLE_SUFFIX = ".cache.pkl"
+
+_UNSET: Any = object()
+# Модуль pyarrow.feather (None, если pyarrow не установлен); импортируется при первом обращении
+feather: Any = _UNSET
+
+
+def _get_feather() -> Any:
+    global feather
+    if feather is _UNSET:
+        try:
+            import pyarrow.feather as module
+        except ImportError:  # pragma: no cover - зависит от окружения
+            module = None
+        feather = module
+    return feather
+
+
+def _data_path(file_path: str) -> str:
+    """Путь к файлу с данными кэша для выбранного формата."""
+    return file_path + (FEATHER_SUFFIX if _get_feather() is not None else PICKLE_SUFFIX)
+
+
+def content_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 содержимого файла, читается блоками."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(file_path: str) -> Dict[str, Any]:
+    """Отпечаток исходного файла: размер, mtime и хэш содержимого."""
+    stat = os.stat(file_path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": content_hash(file_path),
+    }
+
+
+def _read_meta(file_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(file_path + META_SUFFIX, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    return meta
+
+
+def _write_meta(file_path: str, meta: Dict[str, Any]) -> None:
+    tmp_path = file_path + META_SUFFIX + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, file_path + META_SUFFIX)
+
+
+def _is_fresh(file_path: str, meta: Dict[str, Any]) -> bool:
+    """Проверяет, что кэш соответствует текущему исходному файлу."""
+    stat = os.stat(file_path)
+    if stat.st_size != meta.get("size"):
+        return False
+    if stat.st_mtime_ns == meta.get("mtime_ns"):
+        return True
+    # mtime изменился (например, файл скопировали или сделали touch) — сверяем содержимое
+    if content_hash(file_path) != meta.get("sha256"):
+        return False
+    meta["mtime_ns"] = stat.st_mtime_ns
+    _write_meta(file_path, meta)
+    return True
+
+
+def read_cache(file_path: str) -> Optional[pd.DataFrame]:
+    """Возвращает DataFrame из кэша или None, если кэша нет или он устарел."""
+    meta = _read_meta(file_path)
+    if meta is None:
+        return None
+    data_path = file_path + meta.get("data_suffix", "")
+    try:
+        if not os.path.exists(data_path) or not _is_fresh(file_path, meta):
+            return None
+        import numpy as np
+        import pandas as pd
+
+        if meta["data_suffix"] == FEATHER_SUFFIX:
+            if _get_feather() is None:
+                return None
+            # Числовые колонки читаются из memory-mapped файла без лишнего копирования
+            df = feather.read_table(data_path, memory_map=True).to_pandas()
+            # Arrow возвращает пропуски в строковых колонках как None, pandas при чтении Excel — как NaN
+            object_columns = df.columns[df.dtypes == object]
+            return df.fillna({col: np.nan for col in object_columns}) if len(object_columns) else df
+        return pd.read_pickle(data_path)
+    except Exception as e:
+        logger.warning(f"Не удалось прочитать кэш {data_path}: {e}")
+        return None
+
+
+def write_cache(file_path: str, df: pd.DataFrame, fingerprint: Optional[Dict[str, Any]] = None) -> bool:
+    """Сохраняет DataFrame в кэш.
+
+    ``fingerprint`` лучше снимать до чтения исходного файла, чтобы изменение файла
+    во время парсинга не привело к сохранению устаревших данных под новым отпечатком.
+    """
+    try:
+        if fingerprint is None:
+            fingerprint = source_fingerprint(file_path)
+        data_path = _data_path(file_path)
+        tmp_path = data_path + ".tmp"
+        if _get_feather() is not None:
+            feather.write_feather(df.reset_index(drop=True), tmp_path, compression="uncompressed")
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, data_path)
+        meta = dict(fingerprint, version=CACHE_VERSION, data_suffix=data_path[len(file_path):])
+        _write_meta(file_path, meta)
+        logger.info(f"Кэш для {file_path} сохранен в {data_path}")
+        return True
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить кэш для {file_path}: {e}")
+        return False
+
+
+def purge_cache(file_path: str) -> bool:
+    """Удаляет все файлы кэша для исходного файла. Возвращает True, если что-то удалено."""
+    removed = False
+    for suffix in (META_SUFFIX, FEATHER_SUFFIX, PICKLE_SUFFIX):
+        try:
+            os.remove(file_path + suffix)
+            removed = True
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def warm_cache(file_path: str) -> pd.DataFrame:
+    """Строит кэш, если он отсутствует или устарел, и возвращает данные."""
+    from .utils import load_transactions
+
+    return load_transactions(file_path, use_cache=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI для прогрева и очистки кэша."""
+    parser = argparse.ArgumentParser(prog="python -m src.cache", description="Кэш транзакций")
+    parser.add_argument("command", choices=["warm", "purge"])
+    parser.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    for file_path in args.files:
+        if args.command == "warm":
+            df = warm_cache(file_path)
+            print(f"{file_path}: {len(df)} строк в кэше")
+        else:
+            status = "удален" if purge_cache(file_path) else "отсутствует"
+            print(f"{file_path}: кэш {status}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
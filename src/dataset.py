@@ -0,0 +1,232 @@
+"""Набор транзакций из каталога помесячных выгрузок с отсечением партиций.
+
+Каждый файл каталога (.xlsx, .xls, .csv, .parquet, в том числе во вложенных
+каталогах по счетам) — отдельная партиция. В ``manifest.json`` для каждой
+партиции хранятся размер и mtime файла, число строк, минимальная и максимальная
+дата операции, карты и категории. Запрос за период открывает только партиции,
+чьи даты пересекаются с окном (и которые содержат нужную карту/категорию);
+партиции загружаются параллельно в пуле потоков через ``load_transactions``
+(с колоночным кэшем рядом с файлом).
+
+PartitionedDataset принимается представлениями и отчетами так же, как
+TransactionStore: методы ``slice``, ``window`` и ``month`` совпадают.
+"""
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import pandas as pd
+
+from .utils import load_transactions
+from .windows import DATE_COLUMN, DateLike, window_bounds
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+PARTITION_EXTENSIONS = (".xlsx", ".xls", ".csv", ".parquet")
+
+T = TypeVar("T")
+
+
+def _values(df: pd.DataFrame, column: str) -> List[str]:
+    if column not in df.columns:
+        return []
+    return sorted(str(value) for value in df[column].dropna().unique())
+
+
+def _empty_frame() -> pd.DataFrame:
+    """Пустой DataFrame с основными колонками транзакций."""
+    return pd.DataFrame({
+        DATE_COLUMN: pd.Series(dtype="datetime64[ns]"),
+        "Сумма операции": pd.Series(dtype="float64"),
+        "Сумма платежа": pd.Series(dtype="float64"),
+        "Кешбэк": pd.Series(dtype="float64"),
+        "Категория": pd.Series(dtype=object),
+        "Описание": pd.Series(dtype=object),
+        "Номер карты": pd.Series(dtype=object),
+    })
+
+
+def describe_partition(df: pd.DataFrame) -> Dict[str, Any]:
+    """Статистика партиции для манифеста."""
+    dates = df[DATE_COLUMN].dropna() if DATE_COLUMN in df.columns else pd.Series(dtype="datetime64[ns]")
+    return {
+        "rows": len(df),
+        "min_date": dates.min().isoformat() if len(dates) else None,
+        "max_date": dates.max().isoformat() if len(dates) else None,
+        "cards": _values(df, "Номер карты"),
+        "categories": _values(df, "Категория"),
+    }
+
+
+class PartitionedDataset:
+    """Каталог партиций с манифестом; выборки открывают только нужные файлы."""
+
+    def __init__(self, directory: str, max_workers: Optional[int] = None, manifest_path: Optional[str] = None) -> None:
+        self.directory = directory
+        self.manifest_path = manifest_path or os.path.join(directory, MANIFEST_NAME)
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.partitions: Dict[str, Dict[str, Any]] = {}
+        self.refresh()
+
+    def _discover(self) -> List[str]:
+        """Относительные пути файлов-партиций (файлы кэша и манифест пропускаются)."""
+        paths = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(PARTITION_EXTENSIONS) and ".cache." not in name:
+                    paths.append(os.path.relpath(os.path.join(root, name), self.directory).replace(os.sep, "/"))
+        return sorted(paths)
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest.get("partitions", {})
+
+    def _write_manifest(self) -> None:
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "partitions": self.partitions}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _map(self, func: Callable[[str], T], paths: Sequence[str]) -> List[T]:
+        """Применяет func к партициям в пуле потоков, сохраняя порядок."""
+        if len(paths) <= 1:
+            return [func(path) for path in paths]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(paths))) as executor:
+            return list(executor.map(func, paths))
+
+    def load_partition(self, path: str) -> pd.DataFrame:
+        return load_transactions(os.path.join(self.directory, path))
+
+    def _stamp(self, path: str) -> Dict[str, int]:
+        stat = os.stat(os.path.join(self.directory, path))
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def fingerprint(self) -> Tuple[Tuple[Any, ...], ...]:
+        """Версия данных, по которым считаются выборки.
+
+        Набор партиций и их статистика берутся из манифеста в памяти (меняются
+        только в ``refresh``), а содержимое — из файлов; поэтому в отпечатке
+        и записанные размер и mtime партиции, и текущие. Новые файлы каталога
+        до ``refresh`` в выборки не попадают и отпечаток не меняют.
+        """
+        return tuple(
+            (path, info["size"], info["mtime_ns"], *self._stamp(path).values())
+            for path, info in self.partitions.items()
+        )
+
+    def refresh(self) -> bool:
+        """Обновляет манифест: новые и измененные партиции читаются заново, удаленные убираются."""
+        known = self._read_manifest()
+        partitions: Dict[str, Dict[str, Any]] = {}
+        stale = []
+        for path in self._discover():
+            stamp = self._stamp(path)
+            entry = known.get(path)
+            if entry is not None and all(entry.get(key) == value for key, value in stamp.items()):
+                partitions[path] = entry
+            else:
+                stale.append(path)
+                partitions[path] = stamp
+
+        for path, df in zip(stale, self._map(self.load_partition, stale)):
+            partitions[path].update(describe_partition(df))
+
+        changed = bool(stale) or set(partitions) != set(known)
+        self.partitions = partitions
+        if changed:
+            logger.info(f"Манифест {self.manifest_path}: {len(partitions)} партиций, обновлено {len(stale)}")
+            try:
+                self._write_manifest()
+            except OSError as e:
+                # Каталог только для чтения: манифест остается в памяти
+                logger.warning(f"Не удалось сохранить манифест {self.manifest_path}: {e}")
+        return changed
+
+    def prune(
+            self,
+            start: DateLike = None,
+            end: DateLike = None,
+            category: Optional[str] = None,
+            card: Optional[str] = None
+    ) -> List[str]:
+        """Партиции, которые могут содержать строки окна [start, end] с заданной категорией и картой."""
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        selected = []
+        for path, info in self.partitions.items():
+            if info["min_date"] is None:
+                continue
+            if end is not None and pd.Timestamp(info["min_date"]) > end:
+                continue
+            if start is not None and pd.Timestamp(info["max_date"]) < start:
+                continue
+            if category is not None and category not in info["categories"]:
+                continue
+            if card is not None and card not in info["cards"]:
+                continue
+            selected.append(path)
+        return selected
+
+    def _concat(self, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        if not frames:
+            return _empty_frame()
+        frame = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return frame.sort_values(DATE_COLUMN, kind="mergesort", na_position="last").reset_index(drop=True)
+
+    def slice(
+            self,
+            start: DateLike = None,
+            end: DateLike = None,
+            category: Optional[str] = None,
+            card: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Транзакции с датой в [start, end], опционально по категории и/или карте (по возрастанию даты)."""
+        paths = self.prune(start, end, category, card)
+        frames = []
+        for df in self._map(self.load_partition, paths):
+            dates = df[DATE_COLUMN]
+            mask = dates.notna()
+            if start is not None:
+                mask &= dates >= pd.Timestamp(start)
+            if end is not None:
+                mask &= dates <= pd.Timestamp(end)
+            if category is not None:
+                mask &= df["Категория"] == category
+            if card is not None:
+                mask &= df["Номер карты"] == card
+            frames.append(df[mask])
+        logger.debug("Выборка [%s, %s]: открыто %s из %s партиций", start, end, len(paths), len(self.partitions))
+        return self._concat(frames)
+
+    def window(self, date: DateLike, period: str = "M", **filters: Optional[str]) -> pd.DataFrame:
+        """Транзакции за период M/Q/Y, заканчивающийся датой date."""
+        return self.slice(*window_bounds(date, period), **filters)
+
+    def month(self, year: int, month: int, **filters: Optional[str]) -> pd.DataFrame:
+        """Транзакции за календарный месяц."""
+        start = pd.Timestamp(year=year, month=month, day=1)
+        end = start + pd.DateOffset(months=1) - pd.Timedelta(1, "ns")
+        return self.slice(start, end, **filters)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Все партиции одним DataFrame (строки без даты — в конце)."""
+        return self._concat(self._map(self.load_partition, list(self.partitions)))
+
+    def __len__(self) -> int:
+        return sum(info["rows"] for info in self.partitions.values())
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
@@ -0,0 +1,110 @@
+"""Компактные типы колонок транзакций.
+
+После чтения выгрузки текстовые колонки — это object-массивы Python-строк,
+суммы — float64, а даты могут оставаться строками вида «31.12.2021 16:44:00».
+``compact_transactions`` приводит их к компактным типам один раз при загрузке:
+
+* категория, карта, статус и валюты — ``category`` (коды + словарь значений);
+* даты операции и платежа — ``datetime64[ns]`` (ISO 8601 и формат банка ``dd.mm.YYYY``);
+* суммы по запросу (``minor_units=True``) — точные целые копейки ``int64``.
+
+Копейки включаются явно: отчеты и представления считают в рублях, а
+целочисленные суммы нужны там, где важна точность (см. ``services.investment_bank``).
+Кадр в копейках помечается ``df.attrs["minor_units"] = True``.
+"""
+import logging
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CATEGORICAL_COLUMNS = ["Категория", "Номер карты", "Статус", "Валюта операции", "Валюта платежа"]
+AMOUNT_COLUMNS = ["Сумма операции", "Сумма платежа", "Кешбэк", "Кэшбэк"]
+DATE_COLUMNS = ["Дата операции", "Дата платежа"]
+# Форматы банковских выгрузок, которые не распознаются как ISO 8601
+DAY_FIRST_FORMATS = ["%d.%m.%Y %H:%M:%S", "%d.%m.%Y"]
+MINOR_UNITS = 100
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Даты в datetime64: ISO 8601, затем форматы «день.месяц.год»; нераспознанные — NaT."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    parsed = pd.to_datetime(values, format="ISO8601", errors="coerce")
+    for date_format in DAY_FIRST_FORMATS:
+        remaining = parsed.isna() & values.notna()
+        if not remaining.any():
+            break
+        parsed[remaining] = pd.to_datetime(values[remaining].astype(str), format=date_format, errors="coerce")
+    return parsed
+
+
+def to_minor_units(values: pd.Series) -> pd.Series:
+    """Суммы в целых копейках: int64, а при пропусках — nullable Int64."""
+    if pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype("int64") * MINOR_UNITS
+    numbers = pd.to_numeric(values, errors="coerce")
+    kopecks = np.round(numbers.to_numpy(dtype="float64") * MINOR_UNITS)
+    if np.isnan(kopecks).any():
+        return pd.Series(kopecks, index=values.index).astype("Int64")
+    return pd.Series(kopecks.astype("int64"), index=values.index)
+
+
+def from_minor_units(values: pd.Series) -> pd.Series:
+    """Суммы из копеек обратно в рубли (float64)."""
+    return values.astype("float64") / MINOR_UNITS
+
+
+def compact_transactions(
+        df: pd.DataFrame,
+        minor_units: bool = False,
+        categorical_columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Приводит колонки к компактным типам (на месте) и возвращает тот же DataFrame."""
+    for column in DATE_COLUMNS:
+        if column in df.columns:
+            df[column] = parse_dates(df[column])
+
+    for column in CATEGORICAL_COLUMNS if categorical_columns is None else categorical_columns:
+        if column in df.columns and df[column].dtype == object:
+            df[column] = df[column].astype("category")
+
+    if minor_units and not df.attrs.get("minor_units"):
+        for column in AMOUNT_COLUMNS:
+            if column in df.columns:
+                df[column] = to_minor_units(df[column])
+        df.attrs["minor_units"] = True
+    return df
+
+
+def memory_footprint(df: pd.DataFrame) -> pd.Series:
+    """Занимаемая память по колонкам в байтах (с учетом содержимого строк)."""
+    return df.memory_usage(index=False, deep=True)
+
+
+def memory_report(df: pd.DataFrame, minor_units: bool = False) -> pd.DataFrame:
+    """Сравнение памяти и типов колонок до и после ``compact_transactions``."""
+    before = memory_footprint(df)
+    compacted = compact_transactions(df.copy(), minor_units=minor_units)
+    after = memory_footprint(compacted)
+    report = pd.DataFrame({
+        "dtype_before": df.dtypes.astype(str),
+        "bytes_before": before,
+        "dtype_after": compacted.dtypes.astype(str),
+        "bytes_after": after,
+    })
+    report.loc["total"] = ["", before.sum(), "", after.sum()]
+    return report
+
+
+def print_memory_report(df: pd.DataFrame, minor_units: bool = False) -> pd.DataFrame:
+    """Печатает отчет о памяти до и после нормализации и возвращает его."""
+    report = memory_report(df, minor_units=minor_units)
+    total_before, total_after = report.loc["total", "bytes_before"], report.loc["total", "bytes_after"]
+    print(report.to_string())
+    if total_before:
+        print(f"Память: {total_before / 2**20:.2f} MiB -> {total_after / 2**20:.2f} MiB "
+              f"({total_after / total_before:.0%})")
+    return report
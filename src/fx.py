@@ -0,0 +1,216 @@
+"""Пересчет сумм транзакций в базовую валюту по исторической таблице курсов.
+
+Таблица курсов — файл ``data/rates.csv`` (или ``.parquet``) с колонками
+``date``, ``currency``, ``rate``: сколько единиц базовой валюты стоит единица
+``currency`` на дату; необязательная колонка ``base`` задает базовую валюту
+(по умолчанию RUB). Таблица читается один раз и хранится в памяти, пока не
+изменится файл, поэтому пересчет работает без сети. ``update_rate_table``
+дозагружает недостающие даты из ExchangeRate-API и дописывает их в файл.
+
+``convert_transactions`` пересчитывает «Сумма операции» и «Сумма платежа»
+одним ``merge_asof`` по дате и валюте (курс на последнюю дату не позже даты
+операции). Суммы в базовой валюте записываются в исходные колонки, поэтому
+отчеты и представления работают с ними без изменений; исходные суммы
+сохраняются в колонках ``... в валюте``. ``load_transactions`` делает это
+сам, если задана настройка ``FINANCE_BASE_CURRENCY``.
+"""
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .dtypes import from_minor_units, to_minor_units
+
+logger = logging.getLogger(__name__)
+
+RATES_PATH = "data/rates.csv"
+BASE_CURRENCY = "RUB"
+# Колонка суммы -> колонка ее валюты
+AMOUNT_CURRENCIES = {
+    "Сумма операции": "Валюта операции",
+    "Сумма платежа": "Валюта платежа",
+}
+ORIGINAL_SUFFIX = " в валюте"
+
+_tables: Dict[str, Tuple[Tuple[int, int], pd.DataFrame]] = {}
+
+
+def original_column(column: str) -> str:
+    """Колонка с исходной суммой до пересчета."""
+    return column + ORIGINAL_SUFFIX
+
+
+def _read_table(path: str) -> pd.DataFrame:
+    table = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    missing = {"date", "currency", "rate"} - set(table.columns)
+    if missing:
+        raise ValueError(f"Rate table {path} has no columns: {sorted(missing)}")
+    if "base" not in table.columns:
+        table["base"] = BASE_CURRENCY
+    table["date"] = pd.to_datetime(table["date"]).astype("datetime64[ns]")
+    table["rate"] = pd.to_numeric(table["rate"], errors="coerce")
+    table = table.dropna(subset=["date", "currency", "rate"])
+    return table.sort_values(["date", "currency"], kind="mergesort", ignore_index=True)
+
+
+def load_rate_table(path: str = RATES_PATH) -> pd.DataFrame:
+    """Таблица курсов из файла; повторные вызовы без изменения файла не читают его заново."""
+    stat = os.stat(path)
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    key = os.path.abspath(path)
+    cached = _tables.get(key)
+    if cached is None or cached[0] != stamp:
+        table = _read_table(path)
+        _tables[key] = (stamp, table)
+        logger.info(f"Загружена таблица курсов {path}: {len(table)} строк")
+        return table
+    return cached[1]
+
+
+def rate_table_stamp(path: str = RATES_PATH) -> Tuple[str, int, int]:
+    """Версия файла курсов (путь, размер, mtime) для ключей кэшей."""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def conversion_rates(
+        dates: pd.Series,
+        currencies: pd.Series,
+        rates: pd.DataFrame,
+        base: str = BASE_CURRENCY
+) -> np.ndarray:
+    """Курс к базовой валюте на дату каждой строки (as-of); NaN — курса на дату нет."""
+    table_base = rates["base"].iloc[0] if len(rates) else base
+    if table_base != base:
+        raise ValueError(f"Rate table is quoted in {table_base}, not {base}")
+
+    # Валюты кодируются целыми числами по списку валют таблицы: merge_asof по int-ключу
+    known = pd.Index(rates["currency"].unique())
+    codes = known.get_indexer(currencies.astype(object))
+    date_values = dates.to_numpy(dtype="datetime64[ns]")
+    result = np.full(len(dates), np.nan)
+    result[(currencies == base).to_numpy()] = 1.0
+    foreign = (codes >= 0) & ~np.isnat(date_values) & np.isnan(result)
+
+    if foreign.any():
+        rows = np.flatnonzero(foreign)
+        left = pd.DataFrame({"date": date_values[rows], "code": codes[rows], "row": rows})
+        left = left.sort_values("date", kind="stable")
+        right = pd.DataFrame({
+            "date": rates["date"].to_numpy(),
+            "code": known.get_indexer(rates["currency"]),
+            "rate": rates["rate"].to_numpy(dtype="float64"),
+        })
+        merged = pd.merge_asof(left, right, on="date", by="code", direction="backward")
+        result[merged["row"].to_numpy()] = merged["rate"].to_numpy()
+
+    unknown = int((np.isnan(result) & currencies.notna().to_numpy()).sum())
+    if unknown:
+        logger.warning(f"Нет курса к {base} для {unknown} транзакций")
+    return result
+
+
+def convert_transactions(
+        df: pd.DataFrame,
+        rates: Optional[pd.DataFrame] = None,
+        base: str = BASE_CURRENCY
+) -> pd.DataFrame:
+    """Копия транзакций с суммами в базовой валюте (исходные — в колонках ``... в валюте``).
+
+    Суммы в копейках (``minor_units``) пересчитываются в рубли базовой валюты.
+    """
+    rates = load_rate_table() if rates is None else rates
+    date_column = "Дата операции"
+    if date_column not in df.columns:
+        return df
+    converted = df.copy(deep=False)
+    for amount_column, currency_column in AMOUNT_CURRENCIES.items():
+        if amount_column not in df.columns or currency_column not in df.columns:
+            continue
+        if original_column(amount_column) in df.columns:
+            # Уже пересчитано: исходные суммы берутся из сохраненной колонки
+            amounts = df[original_column(amount_column)]
+        else:
+            amounts = df[amount_column]
+            converted[original_column(amount_column)] = amounts
+        factors = conversion_rates(df[date_column], df[currency_column], rates, base)
+        if df.attrs.get("minor_units"):
+            amounts = from_minor_units(amounts)
+        values = amounts.to_numpy(dtype="float64", na_value=np.nan) * factors
+        converted[amount_column] = np.round(values, 2)
+    converted.attrs = {**df.attrs, "base_currency": base}
+    converted.attrs.pop("minor_units", None)
+    return converted
+
+
+def original_amounts(df: pd.DataFrame) -> pd.DataFrame:
+    """Кадр с исходными суммами вместо пересчитанных (для записи и ключей транзакций)."""
+    originals = {
+        column: original_column(column) for column in AMOUNT_CURRENCIES if original_column(column) in df.columns
+    }
+    if not originals:
+        return df
+    restored = df.drop(columns=list(originals.values()))
+    for column, original in originals.items():
+        # Исходные суммы хранятся в рублях и в кадре в копейках (minor_units)
+        restored[column] = to_minor_units(df[original]) if df.attrs.get("minor_units") else df[original]
+    restored.attrs = {key: value for key, value in df.attrs.items() if key != "base_currency"}
+    return restored
+
+
+def _history_url(day: pd.Timestamp, base: str) -> str:
+    from .utils import _setting
+
+    return (f"{_setting('CURRENCY_API_URL')}/v6/{_setting('CURRENCY_API_KEY')}"
+            f"/history/{base}/{day.year}/{day.month}/{day.day}")
+
+
+def fetch_rates(days: Iterable[pd.Timestamp], currencies: Sequence[str], base: str = BASE_CURRENCY) -> pd.DataFrame:
+    """Курсы за даты из ExchangeRate-API (history); даты с ошибкой пропускаются."""
+    from .utils import get_market_client
+
+    days = list(days)
+    responses = get_market_client().get_json_many(
+        [_history_url(day, base) for day in days],
+        validate=lambda data: data.get("result") != "error",
+    )
+    rows: List[Dict[str, Any]] = []
+    for day, data in zip(days, responses):
+        if isinstance(data, Exception) or not data.get("conversion_rates"):
+            logger.error(f"Не удалось получить курсы за {day.date()}: {data}")
+            continue
+        for currency in currencies:
+            quote = data["conversion_rates"].get(currency)
+            if quote:
+                # API отдает, сколько единиц валюты стоит единица базовой; в таблице — наоборот
+                rows.append({"date": day, "currency": currency, "rate": 1 / float(quote), "base": base})
+    return pd.DataFrame(rows, columns=["date", "currency", "rate", "base"])
+
+
+def update_rate_table(
+        start: Any,
+        end: Any,
+        currencies: Sequence[str],
+        path: str = RATES_PATH,
+        base: str = BASE_CURRENCY
+) -> pd.DataFrame:
+    """Дозагружает в файл курсы за дни [start, end], которых в нем нет, и возвращает таблицу."""
+    columns = ["date", "currency", "rate", "base"]
+    existing = _read_table(path) if os.path.exists(path) else pd.DataFrame(columns=columns)
+    days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+    missing = days.difference(pd.DatetimeIndex(existing["date"]))
+    if len(missing):
+        fetched = fetch_rates(missing, currencies, base)
+        frames = [frame for frame in (existing, fetched) if len(frame)]
+        table = pd.concat(frames, ignore_index=True) if frames else existing
+        table = table.sort_values(["date", "currency"], kind="mergesort", ignore_index=True)
+        tmp_path = path + ".tmp"
+        if path.endswith(".parquet"):
+            table.to_parquet(tmp_path, index=False)
+        else:
+            table.to_csv(tmp_path, index=False, date_format="%Y-%m-%d")
+        os.replace(tmp_path, path)
+        logger.info(f"В таблицу курсов {path} добавлено {len(fetched)} строк")
+    return load_rate_table(path)
@@ -0,0 +1,206 @@
+"""Идемпотентное добавление выгрузок в каталог партиций с дедупликацией по хэшу.
+
+Новые выгрузки банка пересекаются с уже загруженными. Вместо перечитывания и
+перезаписи всей книги (``save_transactions``) каждая выгрузка сливается в
+каталог ``PartitionedDataset``:
+
+* каждой транзакции сопоставляется 64-битный ключ — хэш даты, суммы (в
+  копейках), карты и описания, а также номера повтора среди одинаковых строк
+  одной выгрузки (две одинаковые покупки подряд не схлопываются);
+* ключи уже загруженных строк хранятся в ``.index/`` — по отсортированному
+  массиву ``.npy`` на партицию; проверка новой выгрузки — бинарный поиск, то
+  есть O(новых строк · log n) без чтения старых партиций;
+* записываются только новые строки — отдельной партицией
+  (``delta-<время>.parquet``, без pyarrow — ``.csv``) и ее сегментом индекса;
+  суммы пишутся и хэшируются исходные, даже если выгрузка загружена с
+  пересчетом в базовую валюту.
+
+Повторное добавление той же выгрузки ничего не пишет. Партиции, добавленные в
+каталог вручную, индексируются при следующем добавлении.
+
+Запуск::
+
+    python -m src.ingest data/partitions exports/2024-01.xlsx exports/2024-02.xlsx
+"""
+import argparse
+import logging
+import os
+import time
+from typing import List, NamedTuple, Optional, Sequence, Set, Union
+
+import numpy as np
+import pandas as pd
+
+from .dataset import PartitionedDataset
+from .dtypes import parse_dates, to_minor_units
+from .fx import original_amounts
+from .utils import load_transactions
+from .windows import DATE_COLUMN, drop_calendar_columns
+
+logger = logging.getLogger(__name__)
+
+IDENTITY_COLUMNS = [DATE_COLUMN, "Сумма операции", "Номер карты", "Описание"]
+INDEX_DIRECTORY = ".index"
+SEGMENT_SUFFIX = ".keys.npy"
+# Серии ключей в памяти сливаются в одну, когда их становится больше
+MAX_SEGMENTS = 32
+# Ключ строки без суммы или даты
+MISSING_VALUE = np.iinfo(np.int64).min
+
+
+class AppendResult(NamedTuple):
+    partition: Optional[str]
+    added: int
+    duplicates: int
+
+
+def transaction_keys(df: pd.DataFrame) -> np.ndarray:
+    """64-битные ключи транзакций по дате, сумме, карте и описанию (uint64, в порядке строк).
+
+    Сумма берется исходная: ключ не зависит от пересчета в базовую валюту (см. ``src.fx``).
+    """
+    df = original_amounts(df)
+    columns = {}
+    if DATE_COLUMN in df.columns:
+        dates = parse_dates(df[DATE_COLUMN]).to_numpy(dtype="datetime64[ns]")
+        columns[DATE_COLUMN] = np.where(np.isnat(dates), MISSING_VALUE, dates.view("i8"))
+    if "Сумма операции" in df.columns:
+        amounts = df["Сумма операции"]
+        kopecks = amounts if df.attrs.get("minor_units") else to_minor_units(amounts)
+        columns["Сумма операции"] = pd.array(kopecks, dtype="Int64").fillna(MISSING_VALUE).to_numpy("int64")
+    for column in IDENTITY_COLUMNS[2:]:
+        if column in df.columns:
+            values = df[column].astype(object)
+            columns[column] = values.where(values.notna(), "").astype(str).to_numpy()
+    identity = pd.DataFrame(columns, index=pd.RangeIndex(len(df)))
+    # Номер повтора среди одинаковых строк: повторная выгрузка дает те же ключи, а одинаковые покупки различаются
+    identity["occurrence"] = identity.groupby(list(columns), sort=False).cumcount() if columns else 0
+    return pd.util.hash_pandas_object(identity, index=False).to_numpy()
+
+
+class HashIndex:
+    """Множество ключей загруженных транзакций.
+
+    На диске — отсортированный сегмент ключей на каждую партицию; в памяти —
+    несколько отсортированных серий, которые сливаются, когда их становится
+    больше ``MAX_SEGMENTS``.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = os.path.join(directory, INDEX_DIRECTORY)
+        self._covered: Set[str] = set()
+        self._runs: List[np.ndarray] = []
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                if name.endswith(SEGMENT_SUFFIX):
+                    self._covered.add(name[:-len(SEGMENT_SUFFIX)])
+                    self._runs.append(np.load(os.path.join(self.directory, name)))
+        self._merge()
+
+    @staticmethod
+    def _segment_name(partition: str) -> str:
+        return partition.replace("/", "__")
+
+    def _merge(self) -> None:
+        if len(self._runs) > MAX_SEGMENTS:
+            self._runs = [np.unique(np.concatenate(self._runs))]
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys in self._runs)
+
+    def covers(self, partition: str) -> bool:
+        """Есть ли сегмент для партиции."""
+        return self._segment_name(partition) in self._covered
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        """Маска ключей, которые уже есть в индексе."""
+        found = np.zeros(len(keys), dtype=bool)
+        for run in self._runs:
+            positions = np.searchsorted(run, keys)
+            in_range = positions < len(run)
+            found[in_range] |= run[positions[in_range]] == keys[in_range]
+        return found
+
+    def add(self, partition: str, keys: np.ndarray) -> None:
+        """Сохраняет сегмент ключей партиции (запись через временный файл)."""
+        os.makedirs(self.directory, exist_ok=True)
+        name = self._segment_name(partition)
+        segment = np.unique(keys)
+        path = os.path.join(self.directory, name + SEGMENT_SUFFIX)
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, segment)
+        os.replace(tmp_path, path)
+        self._covered.add(name)
+        self._runs.append(segment)
+        self._merge()
+
+
+def _delta_extension() -> str:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:  # pragma: no cover - зависит от окружения
+        return ".csv"
+    return ".parquet"
+
+
+def _write_partition(df: pd.DataFrame, path: str) -> None:
+    tmp_path = path + ".tmp"
+    frame = drop_calendar_columns(original_amounts(df))
+    if path.endswith(".parquet"):
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def sync_index(directory: str, index: Optional[HashIndex] = None) -> HashIndex:
+    """Индекс каталога с сегментами для всех партиций (непроиндексированные читаются один раз)."""
+    index = index or HashIndex(directory)
+    dataset = PartitionedDataset(directory)
+    for partition in dataset.partitions:
+        if not index.covers(partition):
+            logger.info(f"Индексирование партиции {partition}")
+            index.add(partition, transaction_keys(dataset.load_partition(partition)))
+    return index
+
+
+def append_transactions(
+        export: Union[str, pd.DataFrame],
+        directory: str,
+        index: Optional[HashIndex] = None
+) -> AppendResult:
+    """Добавляет в каталог только новые транзакции выгрузки (файл или DataFrame)."""
+    df = load_transactions(export) if isinstance(export, str) else export
+    os.makedirs(directory, exist_ok=True)
+    index = sync_index(directory, index)
+
+    keys = transaction_keys(df)
+    new = ~index.contains(keys)
+    duplicates = int(len(keys) - new.sum())
+    if not new.any():
+        logger.info(f"Новых транзакций нет, дубликатов: {duplicates}")
+        return AppendResult(None, 0, duplicates)
+
+    partition = f"delta-{time.time_ns()}{_delta_extension()}"
+    # Сначала партиция, затем сегмент: после сбоя между ними партиция будет проиндексирована при синхронизации
+    _write_partition(df[new], os.path.join(directory, partition))
+    index.add(partition, keys[new])
+    logger.info(f"Добавлено транзакций: {int(new.sum())} в {partition}, дубликатов: {duplicates}")
+    return AppendResult(partition, int(new.sum()), duplicates)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Добавление выгрузок в каталог партиций без дубликатов")
+    parser.add_argument("directory", help="каталог партиций (см. src.dataset)")
+    parser.add_argument("exports", nargs="+", help="файлы выгрузок (.xlsx/.xls/.csv/.parquet)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    index = HashIndex(args.directory)
+    for export in args.exports:
+        result = append_transactions(export, args.directory, index)
+        print(f"{export}: добавлено {result.added}, дубликатов {result.duplicates}")
+
+
+if __name__ == "__main__":
+    main()
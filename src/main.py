@@ -1,40 +1,208 @@
-"""Main module for running the finance analyzer."""
+"""Main module for running the finance analyzer.
+
+Command-line interface::
+
+    python -m src.main                                  # demo run over data/operations.xlsx
+    python -m src.main greeting
+    python -m src.main main-page --date-time "2021-12-31 16:44:00"
+    python -m src.main events --date-time "2021-12-31 16:44:00" --period M
+    python -m src.main report category "Супермаркеты" --date 2021-12-31
+    python -m src.main report weekday --date 2021-12-31 --backend sqlite
+    python -m src.main search "супермаркет" --limit 10
+    python -m src.main serve --port 8000
+    python -m src.main cache warm data/operations.xlsx
+    python -m src.main ingest data/partitions exports/2024-01.xlsx
+    python -m src.main alerts data/operations.xlsx --settings user_settings.json
+
+Each subcommand imports only the modules it needs, so e.g. ``greeting`` and
+``--help`` start without loading pandas.
+"""
+import argparse
+import json
 import logging
 from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
-from .utils import load_transactions
-from .views import main_page
-from .services import simple_search
-from .reports import spending_by_category
+DEFAULT_FILE = "data/operations.xlsx"
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
 
-def main():
-    """Main function to run the finance analyzer."""
-    logging.basicConfig(level=logging.INFO)
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _to_builtin(value: Any) -> Any:
+    # numpy-скаляры в ответах приводятся к обычным числам, остальное — к строке
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def _print_json(payload: Any) -> None:
+    print(json.dumps(payload, ensure_ascii=False, indent=2, default=_to_builtin))
+
+
+def run_demo(args: argparse.Namespace) -> None:
+    """Demo run: main page, search and category report over one file."""
+    from .reports import spending_by_category
+    from .services import simple_search
+    from .utils import load_transactions
+    from .views import main_page
+
     logger = logging.getLogger(__name__)
 
     try:
         # Load transactions
-        df = load_transactions('data/operations.xlsx')
+        df = load_transactions(args.file)
 
         # Generate main page response
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        main_page_response = main_page(current_time, df)
+        current_time = _now()
+        main_page(current_time, df)
         logger.info("Generated main page response")
 
         # Example of simple search
-        transactions = df.to_dict('records')
-        search_results = simple_search("супермаркет", transactions)
+        search_results = simple_search("супермаркет", df)
         logger.info(f"Found {search_results['total_found']} matching transactions")
 
         # Generate category spending report
-        report = spending_by_category(df, "Супермаркеты")
-        logger.info(f"Generated spending report for category 'Супермаркеты'")
+        spending_by_category(df, "Супермаркеты")
+        logger.info("Generated spending report for category 'Супермаркеты'")
 
     except Exception as e:
         logger.error(f"Error in main: {e}")
         raise
 
 
+def run_greeting(args: argparse.Namespace) -> None:
+    from .utils import get_greeting
+
+    print(get_greeting(datetime.strptime(args.date_time, "%Y-%m-%d %H:%M:%S")))
+
+
+def run_main_page(args: argparse.Namespace) -> None:
+    from .utils import load_transactions
+    from .views import main_page
+
+    _print_json(main_page(args.date_time, load_transactions(args.file)))
+
+
+def run_events(args: argparse.Namespace) -> None:
+    from .utils import load_transactions
+    from .views import events_page
+
+    _print_json(events_page(args.date_time, args.period, df=load_transactions(args.file)))
+
+
+def run_report(args: argparse.Namespace) -> None:
+    from .reports import spending_by_category, spending_by_weekday
+    from .sqlbackend import open_transactions
+
+    transactions = open_transactions(args.file, args.backend)
+    if args.report == "category":
+        _print_json(spending_by_category(transactions, args.category, args.date))
+    else:
+        _print_json(spending_by_weekday(transactions, args.date))
+
+
+def run_search(args: argparse.Namespace) -> None:
+    from .services import simple_search
+    from .utils import load_transactions
+
+    _print_json(simple_search(args.query, load_transactions(args.file), limit=args.limit))
+
+
+def run_serve(args: argparse.Namespace, extra: List[str]) -> None:
+    from .server import main as server_main
+
+    server_main(extra)
+
+
+def run_cache(args: argparse.Namespace, extra: List[str]) -> None:
+    from .cache import main as cache_main
+
+    cache_main(extra)
+
+
+def run_ingest(args: argparse.Namespace, extra: List[str]) -> None:
+    from .ingest import main as ingest_main
+
+    ingest_main(extra)
+
+
+def run_alerts(args: argparse.Namespace, extra: List[str]) -> None:
+    from .alerts import main as alerts_main
+
+    alerts_main(extra)
+
+
+# Подкоманды, которые передают остальные аргументы в CLI соответствующего модуля
+PASSTHROUGH: Dict[str, Callable[[argparse.Namespace, List[str]], None]] = {
+    "serve": run_serve,
+    "cache": run_cache,
+    "ingest": run_ingest,
+    "alerts": run_alerts,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.main", description="Finance analyzer")
+    parser.add_argument("--file", default=DEFAULT_FILE, help="transactions file (.xlsx/.xls/.csv/.parquet)")
+    parser.add_argument("--log-level", default="INFO")
+    parser.set_defaults(handler=run_demo)
+    commands = parser.add_subparsers(dest="command")
+
+    greeting = commands.add_parser("greeting", help="greeting for the given time")
+    greeting.add_argument("--date-time", default=_now())
+    greeting.set_defaults(handler=run_greeting)
+
+    main_page = commands.add_parser("main-page", help="main page JSON")
+    main_page.add_argument("--date-time", default=_now())
+    main_page.set_defaults(handler=run_main_page)
+
+    events = commands.add_parser("events", help="events page JSON")
+    events.add_argument("--date-time", default=_now())
+    events.add_argument("--period", default="M", choices=["M", "Q", "Y"])
+    events.set_defaults(handler=run_events)
+
+    # Общие опции отчетов объявлены у каждого отчета, чтобы их можно было указать после его имени
+    report_options = argparse.ArgumentParser(add_help=False)
+    report_options.add_argument("--date")
+    report_options.add_argument("--backend", choices=["pandas", "sqlite"],
+                                help="storage backend (default: FINANCE_BACKEND)")
+    report = commands.add_parser("report", help="spending reports")
+    reports = report.add_subparsers(dest="report", required=True)
+    category = reports.add_parser("category", parents=[report_options],
+                                  help="spending by category for the last 3 months")
+    category.add_argument("category")
+    reports.add_parser("weekday", parents=[report_options], help="average spending by weekday")
+    report.set_defaults(handler=run_report)
+
+    search = commands.add_parser("search", help="search transactions by description/category")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int)
+    search.set_defaults(handler=run_search)
+
+    commands.add_parser("serve", help="run the HTTP server (see python -m src.server --help)", add_help=False)
+    commands.add_parser("cache", help="warm or purge the cache (see python -m src.cache --help)", add_help=False)
+    commands.add_parser("ingest", help="append exports without duplicates (see python -m src.ingest --help)",
+                        add_help=False)
+    commands.add_parser("alerts", help="replay an export through budget and anomaly alerts "
+                        "(see python -m src.alerts --help)", add_help=False)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Main function to run the finance analyzer."""
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    passthrough = PASSTHROUGH.get(args.command)
+    if extra and passthrough is None:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    logging.basicConfig(level=args.log_level.upper(), format=LOG_FORMAT)
+    if passthrough is not None:
+        passthrough(args, extra)
+    else:
+        args.handler(args)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,118 @@
+"""HTTP-клиент для рыночных данных: пул соединений, параллельные запросы и TTL-кэш.
+
+Кэш работает по схеме stale-while-revalidate: в течение ``ttl`` секунд ответ
+отдается из памяти без обращения к сети; следующие ``stale_ttl`` секунд
+отдается устаревший ответ, а обновление запускается в фоне. Ответы старше
+``ttl + stale_ttl`` запрашиваются синхронно.
+
+requests импортируется при создании клиента, а не при импорте модуля.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300.0
+DEFAULT_STALE_TTL = 3600.0
+DEFAULT_TIMEOUT = 10.0
+
+Validator = Callable[[Any], bool]
+
+
+class MarketDataClient:
+    """Клиент с общей requests.Session, пулом потоков и кэшем JSON-ответов по URL."""
+
+    def __init__(
+            self,
+            ttl: float = DEFAULT_TTL,
+            stale_ttl: float = DEFAULT_STALE_TTL,
+            timeout: float = DEFAULT_TIMEOUT,
+            max_workers: int = 8,
+            session: Optional[requests.Session] = None,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self._clock = clock
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self._session = session
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-data")
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+    def _fetch(self, url: str, validate: Optional[Validator]) -> Any:
+        response = self._session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        # Ответы с ошибкой API (лимиты, неверный ключ) не кэшируем
+        if validate is None or validate(data):
+            with self._lock:
+                self._cache[url] = (self._clock(), data)
+        return data
+
+    def _refresh(self, url: str, validate: Optional[Validator]) -> None:
+        try:
+            self._fetch(url, validate)
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {url}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(url)
+
+    def get_json(self, url: str, validate: Optional[Validator] = None) -> Any:
+        """JSON-ответ по URL с учетом кэша. Сетевые ошибки пробрасываются как requests-исключения."""
+        with self._lock:
+            cached = self._cache.get(url)
+            now = self._clock()
+            if cached is not None:
+                age = now - cached[0]
+                if age < self.ttl:
+                    return cached[1]
+                if age < self.ttl + self.stale_ttl:
+                    if url not in self._refreshing:
+                        self._refreshing.add(url)
+                        self._executor.submit(self._refresh, url, validate)
+                    return cached[1]
+        return self._fetch(url, validate)
+
+    def get_json_many(
+            self,
+            urls: Sequence[str],
+            validate: Optional[Validator] = None
+    ) -> List[Union[Any, Exception]]:
+        """Параллельно запрашивает несколько URL; на месте неудачных запросов — исключение."""
+        futures = [self._executor.submit(self.get_json, url, validate) for url in urls]
+        results: List[Union[Any, Exception]] = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def clear(self) -> None:
+        """Очищает кэш ответов."""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        """Останавливает пул потоков и закрывает сессию."""
+        self._executor.shutdown(wait=True)
+        self._session.close()
@@ -0,0 +1,307 @@
+"""Мемоизация результатов представлений и отчетов.
+
+Ключ результата — отпечаток набора данных и нормализованные аргументы:
+
+* ``TransactionStore``/``MonthlyAggregates`` — номер версии хранилища (новый при
+  каждом построении и ``append``); окно дат заменяется границами строк в
+  отсортированном хранилище, поэтому запросы, чьи окна покрывают одни и те же
+  транзакции, используют одну запись;
+* ``PartitionedDataset`` — размеры и mtime файлов каталога на момент запроса;
+* ``SqlTransactions`` — файл базы и номер версии (новый при каждом открытии);
+* DataFrame — только полученный из ``load_transactions`` (файл, размер, mtime).
+  Такие кадры считаются неизменяемыми; производные кадры (срезы, копии) и
+  вызовы без данных не кэшируются.
+
+Когда ``load_transactions`` видит новую версию файла, записи по старой версии
+удаляются. Память ограничена числом записей (LRU) и временем жизни (TTL).
+
+Настройка: ``FINANCE_MEMO=0`` — выключить, ``FINANCE_MEMO_SIZE`` — число
+записей, ``FINANCE_MEMO_TTL`` — время жизни в секундах. Счетчики: ``stats()``
+и ``to_prometheus()``. ``shared`` хранит по тем же ключам объекты, построенные
+по данным (поисковый индекс), без копирования.
+"""
+import copy
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple, TypeVar, cast
+
+import pandas as pd
+
+from .aggregates import MonthlyAggregates
+from .dataset import PartitionedDataset
+from .sqlbackend import SqlTransactions
+from .store import TransactionStore
+from .windows import DateLike
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+T = TypeVar("T")
+
+DEFAULT_MAXSIZE = 256
+DEFAULT_TTL = 300.0
+
+# Источник кадра: абсолютный путь, размер, mtime, единицы сумм и валюта пересчета
+# (базовая валюта и версия таблицы курсов или None)
+SourceToken = Tuple[str, int, int, bool, Optional[Tuple[Any, ...]]]
+
+
+class _Entry(NamedTuple):
+    expires: float
+    source: Optional[str]
+    value: Any
+
+
+class Memo:
+    """Потокобезопасный LRU-кэш результатов с TTL и счетчиками попаданий."""
+
+    def __init__(
+            self,
+            maxsize: int = DEFAULT_MAXSIZE,
+            ttl: float = DEFAULT_TTL,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = True
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.bypasses = self.evictions = self.invalidations = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """(найдено, значение); устаревшая по TTL запись удаляется."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= self._clock():
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry.value
+
+    def put(self, key: Hashable, value: Any, source: Optional[str] = None, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            expires = self._clock() + (self.ttl if ttl is None else ttl)
+            self._entries[key] = _Entry(expires, source, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, source: Optional[str] = None) -> int:
+        """Удаляет записи по файлу source (или все); возвращает число удаленных."""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if source is None or entry.source == source]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def bypass(self) -> None:
+        with self._lock:
+            self.bypasses += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.bypasses = self.evictions = self.invalidations = 0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        logger.warning(f"Некорректное значение {name}, используется {default}")
+        return default
+
+
+memo = Memo(int(_env_float("FINANCE_MEMO_SIZE", DEFAULT_MAXSIZE)), _env_float("FINANCE_MEMO_TTL", DEFAULT_TTL))
+memo.enabled = os.getenv("FINANCE_MEMO") != "0"
+
+# Кадры из load_transactions: id -> (слабая ссылка, источник); последние версии файлов
+_frames: Dict[int, Tuple["weakref.ref[pd.DataFrame]", SourceToken]] = {}
+_sources: Dict[str, SourceToken] = {}
+_registry_lock = threading.Lock()
+
+
+def file_stamp(
+        file_path: str,
+        minor_units: bool = False,
+        currency: Optional[Tuple[Any, ...]] = None
+) -> SourceToken:
+    """Версия файла для ключей: путь, размер и mtime (снимается до чтения файла)."""
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, minor_units, currency
+
+
+def register_frame(df: pd.DataFrame, token: SourceToken) -> None:
+    """Отмечает кадр, возвращенный load_transactions; новая версия файла сбрасывает записи по старой."""
+    path = token[0]
+    with _registry_lock:
+        previous = _sources.get(path)
+        _sources[path] = token
+        key = id(df)
+
+        def forget(ref: "weakref.ref[pd.DataFrame]") -> None:
+            with _registry_lock:
+                if _frames.get(key, (None,))[0] is ref:
+                    del _frames[key]
+
+        _frames[key] = (weakref.ref(df, forget), token)
+    if previous is not None and previous[1:3] != token[1:3]:
+        removed = memo.invalidate(path)
+        logger.info(f"Данные {path} изменились, удалено результатов из кэша: {removed}")
+
+
+def dataset_fingerprint(data: Any) -> Optional[Hashable]:
+    """Отпечаток набора данных или None, если версию данных нельзя установить."""
+    if isinstance(data, MonthlyAggregates):
+        data = data.store
+    if isinstance(data, TransactionStore):
+        return "store", data.version
+    if isinstance(data, PartitionedDataset):
+        return ("dataset", data.directory) + data.fingerprint()
+    if isinstance(data, SqlTransactions):
+        return ("sqlite",) + data.fingerprint()
+    if isinstance(data, pd.DataFrame):
+        with _registry_lock:
+            ref, token = _frames.get(id(data), (None, None))
+        if ref is not None and ref() is data:
+            return ("file",) + token
+    return None
+
+
+def _source(data: Any) -> Optional[str]:
+    if isinstance(data, pd.DataFrame):
+        with _registry_lock:
+            ref, token = _frames.get(id(data), (None, None))
+        return token[0] if ref is not None and ref() is data else None
+    return None
+
+
+def window_key(data: Any, start: DateLike, end: DateLike) -> Hashable:
+    """Окно дат с точностью, которая влияет на результат.
+
+    В хранилище — границы строк (окна с одинаковым набором транзакций совпадают),
+    в остальных источниках — метки времени в наносекундах.
+    """
+    if isinstance(data, MonthlyAggregates):
+        data = data.store
+    if isinstance(data, TransactionStore):
+        return ("rows",) + data.positions(start, end)
+    return tuple(None if value is None else pd.Timestamp(value).value for value in (start, end))
+
+
+KeyFunction = Callable[..., Optional[Hashable]]
+
+
+def shared(name: str, data: Any, build: Callable[[], T]) -> T:
+    """Объект, построенный по набору данных (например, индекс), общий для вызовов с теми же данными.
+
+    Хранится в ``memo`` без копирования, поэтому не должен изменяться после
+    построения. Если версию данных установить нельзя, строится заново.
+    """
+    fingerprint = dataset_fingerprint(data) if memo.enabled else None
+    if fingerprint is None:
+        memo.bypass()
+        return build()
+    key = ("shared", name, fingerprint)
+    found, value = memo.get(key)
+    if not found:
+        value = build()
+        memo.put(key, value, _source(data))
+    return value
+
+
+def memoize(key: KeyFunction, data: str, ttl: Optional[float] = None) -> Callable[[F], F]:
+    """Кэширует результат функции в ``memo``.
+
+    ``key`` получает аргументы вызова по именам (со значениями по умолчанию) и
+    возвращает нормализованный ключ или None — тогда результат не кэшируется.
+    ``data`` — имя аргумента с набором данных. Значения хранятся и отдаются копиями.
+    """
+
+    def decorate(func: F) -> F:
+        signature = inspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not memo.enabled:
+                return func(*args, **kwargs)
+            try:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                fingerprint = dataset_fingerprint(bound.arguments[data])
+                arguments = key(**bound.arguments) if fingerprint is not None else None
+            except Exception:
+                # Некорректные аргументы обрабатывает сама функция
+                arguments = None
+            if arguments is None:
+                memo.bypass()
+                return func(*args, **kwargs)
+
+            cache_key = (name, fingerprint, arguments)
+            found, value = memo.get(cache_key)
+            if found:
+                return copy.deepcopy(value)
+            value = func(*args, **kwargs)
+            memo.put(cache_key, copy.deepcopy(value), _source(bound.arguments[data]), ttl)
+            return value
+
+        return cast(F, wrapper)
+
+    return decorate
+
+
+def configure(maxsize: Optional[int] = None, ttl: Optional[float] = None, enabled: Optional[bool] = None) -> None:
+    """Меняет размер, TTL или включение кэша (записи сбрасываются)."""
+    if maxsize is not None:
+        memo.maxsize = maxsize
+    if ttl is not None:
+        memo.ttl = ttl
+    if enabled is not None:
+        memo.enabled = enabled
+    memo.invalidate()
+
+
+def stats() -> Dict[str, Any]:
+    return memo.stats()
+
+
+def to_prometheus() -> str:
+    """Счетчики кэша в текстовом формате Prometheus."""
+    current = memo.stats()
+    lines = []
+    for counter in ("hits", "misses", "bypasses", "evictions", "invalidations"):
+        lines.append(f"# TYPE finance_memo_{counter}_total counter")
+        lines.append(f"finance_memo_{counter}_total {current[counter]}")
+    lines.append("# TYPE finance_memo_entries gauge")
+    lines.append(f"finance_memo_entries {current['entries']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,241 @@
+"""Метрики и профилирование для представлений, отчетов и сервисов.
+
+Декоратор ``instrument`` считает вызовы, ошибки, гистограмму времени и число
+обработанных строк. По умолчанию сбор выключен, и обертка только проверяет
+флаг и вызывает функцию. Включение:
+
+* ``FINANCE_METRICS=1`` или ``metrics.enable()`` — сбор метрик;
+* ``FINANCE_PROFILE=cprofile|pyinstrument`` или ``metrics.enable_profiling()`` —
+  профиль каждого запроса (функции с ``profile=True``) в ``FINANCE_PROFILE_DIR``;
+* ``FINANCE_METRICS_FILE=path.json`` — выгрузка метрик в JSON при завершении процесса.
+
+Экспорт: ``to_prometheus()`` (текстовый формат Prometheus), ``snapshot()``
+и ``dump_json(path)``.
+"""
+import atexit
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+_enabled = os.getenv("FINANCE_METRICS") == "1"
+_profiler = os.getenv("FINANCE_PROFILE") or None
+_profile_dir = os.getenv("FINANCE_PROFILE_DIR", "profiles")
+_local = threading.local()
+
+
+class _FunctionStats:
+    __slots__ = ("calls", "errors", "seconds", "rows", "buckets")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+class MetricsRegistry:
+    """Потокобезопасное хранилище метрик по именам функций."""
+
+    def __init__(self) -> None:
+        self._stats: Dict[str, _FunctionStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, rows: int, error: bool = False) -> None:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _FunctionStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.seconds += seconds
+            stats.rows += rows
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Метрики в виде словаря, пригодного для JSON."""
+        with self._lock:
+            return {
+                name: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "seconds_total": stats.seconds,
+                    "rows_total": stats.rows,
+                    "latency_buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], stats.buckets)),
+                }
+                for name, stats in sorted(self._stats.items())
+            }
+
+    def to_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus."""
+        lines: List[str] = [
+            "# TYPE finance_calls_total counter",
+            "# TYPE finance_errors_total counter",
+            "# TYPE finance_rows_processed_total counter",
+            "# TYPE finance_latency_seconds histogram",
+        ]
+        for name, stats in self.snapshot().items():
+            label = f'function="{name}"'
+            lines.append(f"finance_calls_total{{{label}}} {stats['calls']}")
+            lines.append(f"finance_errors_total{{{label}}} {stats['errors']}")
+            lines.append(f"finance_rows_processed_total{{{label}}} {stats['rows_total']}")
+            cumulative = 0
+            for bound, count in stats["latency_buckets"].items():
+                cumulative += count
+                lines.append(f'finance_latency_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"finance_latency_seconds_sum{{{label}}} {stats['seconds_total']}")
+            lines.append(f"finance_latency_seconds_count{{{label}}} {stats['calls']}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def enable(flag: bool = True) -> None:
+    """Включает или выключает сбор метрик."""
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable_profiling(profiler: Optional[str] = "cprofile", directory: Optional[str] = None) -> None:
+    """Включает профилирование запросов (cprofile или pyinstrument); None — выключает."""
+    global _profiler, _profile_dir
+    if profiler not in (None, "cprofile", "pyinstrument"):
+        raise ValueError(f"Unknown profiler: {profiler}")
+    _profiler = profiler
+    if directory:
+        _profile_dir = directory
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    return registry.snapshot()
+
+
+def to_prometheus() -> str:
+    return registry.to_prometheus()
+
+
+def dump_json(path: str) -> None:
+    """Сохраняет снимок метрик в JSON-файл."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(registry.snapshot(), f, ensure_ascii=False, indent=2)
+
+
+def _count_rows(args: Tuple[Any, ...]) -> int:
+    """Размер входных данных: первый позиционный аргумент-коллекция (DataFrame, список, хранилище)."""
+    for arg in args:
+        if arg is None or isinstance(arg, (str, bytes, dict)):
+            continue
+        try:
+            return len(arg)
+        except TypeError:
+            continue
+    return 0
+
+
+def _run_profiled(name: str, func: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+    """Выполняет вызов под профилировщиком и сохраняет отчет в каталог профилей."""
+    os.makedirs(_profile_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{time.perf_counter_ns() % 10**6:06d}"
+    _local.profiling = True
+    try:
+        if _profiler == "pyinstrument":
+            from pyinstrument import Profiler
+
+            profiler = Profiler()
+            profiler.start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.stop()
+                with open(os.path.join(_profile_dir, f"{name}-{stamp}.html"), "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+        import cProfile
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Профилировщик уже активен (например, запрос в соседнем потоке) — выполняем без профиля
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            profile.dump_stats(os.path.join(_profile_dir, f"{name}-{stamp}.prof"))
+    finally:
+        _local.profiling = False
+
+
+def _observed_call(
+        name: str,
+        target: Callable[..., Any],
+        profile: bool,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any]
+) -> Any:
+    """Вызов с профилированием и/или записью метрик (только когда что-то из этого включено)."""
+    profiled = profile and _profiler is not None and not getattr(_local, "profiling", False)
+    if not _enabled:
+        return _run_profiled(name, target, args, kwargs) if profiled else target(*args, **kwargs)
+
+    started = time.perf_counter()
+    error = False
+    try:
+        return _run_profiled(name, target, args, kwargs) if profiled else target(*args, **kwargs)
+    except BaseException:
+        error = True
+        raise
+    finally:
+        registry.observe(name, time.perf_counter() - started, _count_rows(args), error)
+
+
+def instrument(func: Optional[F] = None, *, name: Optional[str] = None, profile: bool = False) -> Any:
+    """Декоратор сбора метрик; ``profile=True`` помечает функцию как точку входа запроса."""
+
+    def decorate(target: F) -> F:
+        metric_name = name or f"{target.__module__.rsplit('.', 1)[-1]}.{target.__qualname__}"
+
+        @functools.wraps(target)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # Выключенный сбор стоит одной проверки флагов
+            if not _enabled and _profiler is None:
+                return target(*args, **kwargs)
+            return _observed_call(metric_name, target, profile, args, kwargs)
+
+        return cast(F, wrapper)
+
+    if func is not None:
+        return decorate(func)
+    return decorate
+
+
+def _dump_on_exit() -> None:
+    path = os.getenv("FINANCE_METRICS_FILE")
+    if path and _enabled:
+        try:
+            dump_json(path)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить метрики в {path}: {e}")
+
+
+atexit.register(_dump_on_exit)
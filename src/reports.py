@@ -1,12 +1,22 @@
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Callable
+from typing import Dict, Hashable, Iterable, Optional, Callable, Tuple, Union
 import logging
 import functools
 
-logging.basicConfig(level=logging.INFO)
+from .aggregates import WEEKDAY_NAMES, MonthlyAggregates
+from .dataset import PartitionedDataset
+from .memo import memoize, window_key
+from .metrics import instrument
+from .sqlbackend import SqlTransactions
+from .store import TransactionStore
+from .windows import calendar_columns, has_calendar_columns, operation_dates, period_start, weekdays, window_bounds
+
 logger = logging.getLogger(__name__)
 
+# Отчеты считаются за последние 3 месяца до даты
+REPORT_PERIOD = "Q"
+
 def handle_report_errors(func: Callable) -> Callable:
     """Декоратор для обработки ошибок в функциях отчетов."""
     @functools.wraps(func)
@@ -15,16 +25,46 @@ def handle_report_errors(func: Callable) -> Callable:
             return func(*args, **kwargs)
         except Exception as e:
             logger.error(f"Ошибка в функции {func.__name__}: {e}")
-            if func.__name__ == "spending_by_category":
+            if func.__name__ in ("spending_by_category", "spending_by_category_chunks"):
                 return {"total": 0.0}
-            if func.__name__ == "spending_by_weekday":
+            if func.__name__ in ("spending_by_weekday", "spending_by_weekday_chunks"):
                 return {}
             return {}
     return wrapper
 
+
+def _report_window(date: Optional[str]) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """Окно отчета: границы для заданной даты кэшируются, без даты окно заканчивается текущим моментом."""
+    if date:
+        return window_bounds(date, REPORT_PERIOD)
+    now = pd.Timestamp(datetime.now())
+    return period_start(now, REPORT_PERIOD), now
+
+
+def _category_key(transactions: object, category: str, date: Optional[str]) -> Optional[Hashable]:
+    """Ключ memo: категория и окно отчета. Без даты окно зависит от текущего момента —
+    такой результат кэшируется только для хранилища, где окно сводится к границам строк."""
+    if not date and not isinstance(transactions, (TransactionStore, MonthlyAggregates)):
+        return None
+    return category, window_key(transactions, *_report_window(date))
+
+
+def _weekday_key(transactions: object, date: Optional[str]) -> Hashable:
+    """Ключ memo: окно отчета или все транзакции, если дата не задана."""
+    return window_key(transactions, *_report_window(date)) if date else "all"
+
+
+def _weekday_names(by_weekday: pd.Series) -> pd.Series:
+    """Заменяет коды дней недели (0 — понедельник) названиями, порядок — по названию."""
+    by_weekday.index = [WEEKDAY_NAMES[day] for day in by_weekday.index]
+    return by_weekday.sort_index()
+
+
+@memoize(_category_key, data="transactions")
 @handle_report_errors
+@instrument
 def spending_by_category(
-        transactions: pd.DataFrame,
+        transactions: Union[pd.DataFrame, TransactionStore, MonthlyAggregates, PartitionedDataset, SqlTransactions],
         category: str,
         date: Optional[str] = None
 ) -> Dict[str, float]:
@@ -38,20 +78,27 @@ def spending_by_category(
         logger.warning("Не указана категория")
         return {"total": 0.0}
 
-    # Конвертируем дату, явно указывая формат
-    if not pd.api.types.is_datetime64_any_dtype(transactions["Дата операции"]):
-        transactions["Дата операции"] = pd.to_datetime(transactions["Дата операции"], format="%Y-%m-%d")
-
     # Устанавливаем дату для фильтрации
-    date = pd.to_datetime(date) if date else pd.to_datetime(datetime.now())
-    start_date = date - pd.DateOffset(months=3)
+    start_date, date = _report_window(date)
+
+    if isinstance(transactions, (MonthlyAggregates, SqlTransactions)):
+        # Полные месяцы берутся из куба, неполные — из строк хранилища; в SQLite сумма считается запросом
+        total, rows = transactions.category_spending(category, start_date, date)
+        if not rows:
+            logger.warning(f"Нет данных по категории {category} за указанный период")
+            return {"total": 0.0}
+        logger.info("Рассчитана сумма трат по категории %s: %s", category, abs(total))
+        return {"total": abs(total)}
 
-    # Фильтруем транзакции
-    filtered = transactions[
-        (transactions["Категория"] == category) &
-        (transactions["Дата операции"] >= start_date) &
-        (transactions["Дата операции"] <= date)
-    ]
+    if isinstance(transactions, (TransactionStore, PartitionedDataset)):
+        # Хранилище отдает срез по индексу категории без просмотра остальных строк,
+        # набор партиций — только по файлам, где есть категория и даты окна
+        filtered = transactions.slice(start_date, date, category=category)
+    else:
+        # Исходный DataFrame только читается: даты не в datetime приводятся в локальную серию
+        dates = operation_dates(transactions)
+        mask = (transactions["Категория"] == category) & (dates >= start_date) & (dates <= date)
+        filtered = transactions.loc[mask, ["Сумма операции"]]
 
     # Проверяем наличие данных после фильтрации
     if filtered.empty:
@@ -59,70 +106,156 @@ def spending_by_category(
         return {"total": 0.0}
 
     # Считаем сумму трат
-    total = filtered[filtered["Сумма операции"] < 0]["Сумма операции"].sum()
-    
-    logger.info(f"Рассчитана сумма трат по категории {category}: {abs(total)}")
+    amounts = filtered["Сумма операции"]
+    total = amounts[amounts < 0].sum()
+
+    logger.info("Рассчитана сумма трат по категории %s: %s", category, abs(total))
     return {"total": abs(total)}
 
+@memoize(_weekday_key, data="transactions")
 @handle_report_errors
-def spending_by_weekday(transactions: pd.DataFrame, date: Optional[str] = None) -> Dict[str, float]:
+@instrument
+def spending_by_weekday(
+        transactions: Union[pd.DataFrame, TransactionStore, MonthlyAggregates, PartitionedDataset, SqlTransactions],
+        date: Optional[str] = None
+) -> Dict[str, float]:
     """Средние траты по дням недели."""
     # Проверяем входные данные
     if transactions.empty:
         logger.warning("Получен пустой DataFrame")
         return {}
-        
+
+    if isinstance(transactions, (MonthlyAggregates, SqlTransactions)):
+        start_date, end_date = _report_window(date) if date else (None, None)
+        grouped = transactions.weekday_spending(start_date, end_date)
+        if grouped.empty:
+            logger.warning("Нет данных о тратах после фильтрации")
+            return {}
+        result = (grouped["spend_sum"] / grouped["spend_count"]).sort_index().to_dict()
+        logger.debug("Сформирован отчет по дням недели: %s", result)
+        return result
+
+    if isinstance(transactions, (TransactionStore, PartitionedDataset)):
+        if date:
+            transactions = transactions.slice(*_report_window(date))
+        else:
+            transactions = transactions.frame
+        date = None
+
     # Проверяем наличие необходимых колонок
     required_columns = ["Дата операции", "Сумма операции"]
     if not all(col in transactions.columns for col in required_columns):
         logger.error(f"Отсутствуют необходимые колонки. Требуются: {required_columns}")
         return {}
         
-    # Проверяем, что даты уже в формате datetime
-    if not pd.api.types.is_datetime64_any_dtype(transactions["Дата операции"]):
-        try:
-            transactions["Дата операции"] = pd.to_datetime(transactions["Дата операции"])
-        except Exception as e:
-            logger.error(f"Ошибка преобразования даты: {e}")
-            return {}
+    # Даты приводятся в локальную серию, исходный DataFrame не меняется
+    try:
+        dates = operation_dates(transactions, date_format=None)
+    except Exception as e:
+        logger.error(f"Ошибка преобразования даты: {e}")
+        return {}
 
     # Фильтруем транзакции только если указана дата
-    filtered = transactions
+    in_window = None
     if date:
-        date = pd.to_datetime(date)
-        start_date = date - pd.DateOffset(months=3)
-        filtered = transactions[
-            (transactions["Дата операции"] >= start_date) &
-            (transactions["Дата операции"] <= date)
-        ]
+        start_date, date = _report_window(date)
+        in_window = (dates >= start_date) & (dates <= date)
 
     # Проверка наличия данных после фильтрации
-    if filtered.empty:
+    if in_window is not None and not in_window.any():
         logger.warning("Нет данных после фильтрации")
         return {}
 
-    # Фильтруем только траты (отрицательные суммы)
-    spending_transactions = filtered[filtered["Сумма операции"] < 0].copy()
+    # Только траты (отрицательные суммы): маска вместо копии подмножества строк
+    amounts = transactions["Сумма операции"]
+    spending = amounts < 0
+    if in_window is not None:
+        spending &= in_window
 
-    if spending_transactions.empty:
+    if not spending.any():
         logger.warning("Нет данных о тратах после фильтрации")
         return {}
 
-    # Вычисляем день недели
-    spending_transactions["weekday"] = spending_transactions["Дата операции"].dt.day_name()
-    # Берем абсолютные значения трат для расчета среднего
-    spending_transactions["Сумма операции"] = spending_transactions["Сумма операции"].abs()
-
-    # Агрегируем данные по дням недели
-    grouped = spending_transactions.groupby("weekday")["Сумма операции"].mean()
-
-    # Получаем результат в виде словаря
-    result = grouped.to_dict()
+    # Группируем по целочисленному коду дня недели (из day_ordinal, если колонки рассчитаны при загрузке);
+    # модуль берется от уже сгруппированного среднего
+    if has_calendar_columns(transactions):
+        codes = weekdays(calendar_columns(transactions)[1][spending.to_numpy()])
+    else:
+        codes = dates[spending].dt.weekday.to_numpy()
+    grouped = amounts[spending].groupby(codes).mean().abs()
+    result = _weekday_names(grouped).to_dict()
 
     # Проверка результата
     if not result:
         logger.warning("Не удалось сформировать отчет по дням недели")
         return {}
 
-    logger.info(f"Сформирован отчет по дням недели: {result}")
-    return result
\ No newline at end of file
+    # Словарь форматируется только если уровень DEBUG включен
+    logger.debug("Сформирован отчет по дням недели: %s", result)
+    return result
+
+@handle_report_errors
+@instrument
+def spending_by_category_chunks(
+        chunks: Iterable[pd.DataFrame],
+        category: str,
+        date: Optional[str] = None
+) -> Dict[str, float]:
+    """Траты по категории за последние 3 месяца, агрегируемые по частям (см. utils.iter_transactions)."""
+    if not category:
+        logger.warning("Не указана категория")
+        return {"total": 0.0}
+
+    start_date, date = _report_window(date)
+
+    # В памяти держим только текущую часть и накопленную сумму
+    total = 0.0
+    found = False
+    for chunk in chunks:
+        filtered = chunk[
+            (chunk["Категория"] == category) &
+            (chunk["Дата операции"] >= start_date) &
+            (chunk["Дата операции"] <= date)
+        ]
+        if filtered.empty:
+            continue
+        found = True
+        total += filtered[filtered["Сумма операции"] < 0]["Сумма операции"].sum()
+
+    if not found:
+        logger.warning(f"Нет данных по категории {category} за указанный период")
+        return {"total": 0.0}
+
+    logger.info("Рассчитана сумма трат по категории %s: %s", category, abs(total))
+    return {"total": abs(total)}
+
+
+@handle_report_errors
+@instrument
+def spending_by_weekday_chunks(chunks: Iterable[pd.DataFrame], date: Optional[str] = None) -> Dict[str, float]:
+    """Средние траты по дням недели, агрегируемые по частям (см. utils.iter_transactions)."""
+    start_date, end_date = _report_window(date) if date else (None, None)
+
+    # Для среднего накапливаем сумму и количество трат по каждому дню недели
+    sums = pd.Series(dtype="float64")
+    counts = pd.Series(dtype="int64")
+    for chunk in chunks:
+        spending = chunk[chunk["Сумма операции"] < 0]
+        if end_date is not None:
+            spending = spending[
+                (spending["Дата операции"] >= start_date) &
+                (spending["Дата операции"] <= end_date)
+            ]
+        if spending.empty:
+            continue
+        grouped = spending["Сумма операции"].groupby(spending["Дата операции"].dt.weekday)
+        sums = sums.add(grouped.sum(), fill_value=0)
+        counts = counts.add(grouped.count(), fill_value=0)
+
+    if sums.empty:
+        logger.warning("Нет данных о тратах после фильтрации")
+        return {}
+
+    result = _weekday_names((sums / counts).abs()).to_dict()
+    logger.debug("Сформирован отчет по дням недели: %s", result)
+    return result
@@ -0,0 +1,78 @@
+"""Сборка ответов представлений целыми колонками и сериализация в JSON.
+
+Списки для ``main_page`` и ``events_page`` строятся без построчных ``apply``:
+даты форматируются одним ``dt.strftime``, суммы округляются ``Series.round``,
+записи собираются ``to_dict("records")``. Результат совпадает с построчной
+сборкой по структуре, типам и значениям.
+
+``dumps`` отдает JSON в байтах через orjson, если он установлен
+(``poetry install -E fast-json``), иначе через стандартный json с теми же
+компактными разделителями — байты ответа от выбора библиотеки не зависят.
+"""
+import json
+import math
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+TOP_TRANSACTION_COLUMNS = ["Сумма операции", "Дата операции", "Категория", "Описание"]
+TOP_DATE_FORMAT = "%d.%m.%Y"
+
+
+def top_transactions(df: pd.DataFrame, n: int = 5) -> List[Dict[str, Any]]:
+    """Топ-n транзакций по сумме операции: дата, сумма, категория и описание."""
+    if not all(column in df.columns for column in TOP_TRANSACTION_COLUMNS):
+        return []
+    top = df.nlargest(n, "Сумма операции")
+    return pd.DataFrame({
+        "date": top["Дата операции"].dt.strftime(TOP_DATE_FORMAT),
+        "amount": top["Сумма операции"].round(2),
+        "category": top["Категория"],
+        "description": top["Описание"],
+    }).to_dict("records")
+
+
+def category_amounts(by_category: pd.Series, absolute: bool = False) -> List[Dict[str, Any]]:
+    """Суммы по категориям (индекс — категория) списком ``{"category", "amount"}`` в порядке серии."""
+    amounts = by_category.abs() if absolute else by_category
+    return pd.DataFrame({
+        "category": by_category.index.to_numpy(dtype=object),
+        "amount": amounts.to_numpy(),
+    }).to_dict("records")
+
+
+def _default(value: Any) -> Any:
+    """Значения numpy и pandas, которые встречаются в ответах."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return _finite(value.tolist())
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _finite(value: Any) -> Any:
+    """NaN и бесконечности заменяются на None (так же их пишет orjson)."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def dumps(payload: Any) -> bytes:
+    """JSON ответа в UTF-8 без пробелов между элементами."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    text = json.dumps(_finite(payload), ensure_ascii=False, separators=(",", ":"), default=_default)
+    return text.encode("utf-8")
@@ -0,0 +1,74 @@
+"""Поиск шаблонов (телефоны, карты, переводы, магазины) в описаниях транзакций.
+
+Все шаблоны объединяются в одно регулярное выражение с именованными группами,
+поэтому колонка «Описание» просматривается один раз для всех детекторов.
+Шаблоны не должны пересекаться: в одной позиции строки засчитывается первый
+подошедший шаблон.
+"""
+import logging
+import re
+from typing import Dict, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PHONE_PATTERN = r"\+7\s?\d{3}\s?\d{3}[- ]?\d{2}[- ]?\d{2}"
+CARD_PATTERN = r"\*\d{4}\b|\b\d{4}(?:[ -]?\d{4}){3}\b"
+# «Перевод ...» или получатель в виде «Имя Ф.», как в банковских выгрузках
+TRANSFER_PATTERN = r"(?i:\bперевод\w*)|\b[А-ЯЁ][а-яё]+ [А-ЯЁ]\."
+
+DEFAULT_PATTERNS = {
+    "phone": PHONE_PATTERN,
+    "card": CARD_PATTERN,
+    "transfer": TRANSFER_PATTERN,
+}
+
+
+def merchant_pattern(names: Iterable[str]) -> str:
+    """Шаблон для списка названий магазинов (без учета регистра)."""
+    alternatives = "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    return rf"(?i:\b(?:{alternatives})\b)"
+
+
+class PatternScanner:
+    """Набор именованных шаблонов, скомпилированных в одно выражение."""
+
+    def __init__(self, patterns: Mapping[str, str] = DEFAULT_PATTERNS) -> None:
+        for name, pattern in patterns.items():
+            if not name.isidentifier():
+                raise ValueError(f"Недопустимое имя шаблона: {name}")
+            if re.compile(pattern).groups:
+                raise ValueError(f"Шаблон {name} не должен содержать захватывающих групп, используйте (?:...)")
+        self.patterns: Dict[str, str] = dict(patterns)
+        self._regex = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in self.patterns.items()))
+
+    def scan(self, descriptions: pd.Series) -> pd.DataFrame:
+        """Таблица совпадений: индекс исходной строки, колонки tag и match.
+
+        На строку может приходиться несколько совпадений разных шаблонов.
+        """
+        text = descriptions.dropna().astype(str)
+        matches = text.str.extractall(self._regex)
+        if matches.empty:
+            return pd.DataFrame({"tag": pd.Series(dtype=object), "match": pd.Series(dtype=object)})
+
+        # В каждой строке extractall заполнена ровно одна группа — по ней определяем шаблон
+        columns = matches.notna().to_numpy().argmax(axis=1)
+        table = pd.DataFrame({
+            "tag": matches.columns[columns],
+            "match": matches.to_numpy()[np.arange(len(matches)), columns],
+        }, index=matches.index)
+        return table.droplevel("match")
+
+    def tags(self, descriptions: pd.Series) -> pd.DataFrame:
+        """Булева таблица «строка x шаблон» с тем же индексом, что и descriptions."""
+        table = self.scan(descriptions)
+        flags = pd.DataFrame(False, index=descriptions.index, columns=list(self.patterns))
+        for tag, rows in table.groupby("tag").groups.items():
+            flags.loc[rows.unique(), tag] = True
+        return flags
+
+
+DEFAULT_SCANNER = PatternScanner()
@@ -0,0 +1,141 @@
+"""Полнотекстовый поиск по описаниям и категориям транзакций."""
+import bisect
+import logging
+import re
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .windows import drop_calendar_columns
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ("Описание", "Категория")
+TOKEN_PATTERN = re.compile(r"\w+")
+
+Records = Union[List[Dict[str, Any]], pd.DataFrame]
+
+
+def normalize_text(text: str) -> str:
+    """Приводит текст к единому виду: casefold и «ё» -> «е»."""
+    return text.casefold().replace("ё", "е")
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает текст на нормализованные слова (кириллица и латиница)."""
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+
+class SearchIndex:
+    """Инвертированный индекс: слово -> отсортированные номера транзакций.
+
+    Поиск идет по префиксам слов запроса (все слова запроса должны найтись).
+    Точное совпадение слова весит больше, чем совпадение по префиксу; при равном
+    весе сохраняется исходный порядок транзакций. Новые строки добавляются через
+    ``add`` без перестроения индекса.
+    """
+
+    def __init__(self, transactions: Records = (), fields: Sequence[str] = SEARCH_FIELDS) -> None:
+        self.fields = tuple(fields)
+        self.size = 0
+        self._postings: Dict[str, List[np.ndarray]] = {}
+        self._vocabulary: List[str] = []
+        self._segments: List[Tuple[int, Records]] = []
+        self._bases: List[int] = []
+        if len(transactions):
+            self.add(transactions)
+
+    def add(self, transactions: Records) -> None:
+        """Добавляет транзакции в конец индекса."""
+        if not isinstance(transactions, (list, pd.DataFrame)):
+            transactions = list(transactions)
+        frame = transactions if isinstance(transactions, pd.DataFrame) else pd.DataFrame(transactions)
+        if frame.empty:
+            return
+        base = self.size
+
+        text = pd.Series("", index=frame.index)
+        for field in self.fields:
+            if field in frame.columns:
+                values = frame[field]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    values = values.astype(object)
+                text = text + " " + values.fillna("").astype(str)
+
+        # Описания в выгрузках сильно повторяются, поэтому токенизируем только уникальные строки
+        codes, uniques = pd.factorize(text.to_numpy())
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+
+        new_postings: Dict[str, List[np.ndarray]] = {}
+        for code, value in enumerate(uniques):
+            docs = order[bounds[code]:bounds[code + 1]] + base
+            for token in set(tokenize(value)):
+                new_postings.setdefault(token, []).append(docs)
+
+        for token, parts in new_postings.items():
+            docs = np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+            if token not in self._postings:
+                self._postings[token] = []
+                bisect.insort(self._vocabulary, token)
+            self._postings[token].append(docs)
+
+        self._segments.append((base, transactions))
+        self._bases.append(base)
+        self.size += len(frame)
+        logger.info(f"В поисковый индекс добавлено {len(frame)} транзакций, всего {self.size}")
+
+    def _docs(self, token: str) -> np.ndarray:
+        """Номера транзакций со словом token (части, добавленные через add, склеиваются лениво)."""
+        parts = self._postings[token]
+        if len(parts) > 1:
+            parts[:] = [np.concatenate(parts)]
+        return parts[0]
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        lo = bisect.bisect_left(self._vocabulary, prefix)
+        hi = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff")
+        return self._vocabulary[lo:hi]
+
+    def search(self, query: str) -> np.ndarray:
+        """Номера найденных транзакций, от более релевантных к менее."""
+        matched = None
+        scores = None
+        for token in set(tokenize(query)):
+            terms = self._prefix_terms(token)
+            if not terms:
+                return np.empty(0, dtype=np.intp)
+            if len(terms) == 1:
+                docs = self._docs(terms[0])
+            else:
+                docs = np.unique(np.concatenate([self._docs(term) for term in terms]))
+            token_scores = np.ones(len(docs))
+            if token in self._postings:
+                token_scores += np.isin(docs, self._docs(token), assume_unique=True)
+
+            if matched is None:
+                matched, scores = docs, token_scores
+            else:
+                matched, left, right = np.intersect1d(matched, docs, assume_unique=True, return_indices=True)
+                scores = scores[left] + token_scores[right]
+
+        if matched is None:
+            return np.empty(0, dtype=np.intp)
+        return matched[np.lexsort((matched, -scores))]
+
+    def records(self, ids: np.ndarray) -> List[Dict[str, Any]]:
+        """Транзакции по номерам из индекса в том же порядке."""
+        result: List[Dict[str, Any]] = [{}] * len(ids)
+        segment_of = np.searchsorted(self._bases, ids, side="right") - 1
+        for segment in np.unique(segment_of):
+            positions = np.flatnonzero(segment_of == segment)
+            base, data = self._segments[segment]
+            local = ids[positions] - base
+            if isinstance(data, pd.DataFrame):
+                rows = drop_calendar_columns(data.iloc[local]).to_dict("records")
+            else:
+                rows = [data[i] for i in local]
+            for position, row in zip(positions, rows):
+                result[position] = row
+        return result
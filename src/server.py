@@ -0,0 +1,298 @@
+"""HTTP-сервер с резидентными данными для представлений и отчетов.
+
+Запуск::
+
+    python -m src.server --file data/operations.xlsx --port 8000
+
+Транзакции загружаются один раз при старте (через кэш ``load_transactions``)
+и хранятся как MonthlyAggregates или, с ``--backend sqlite``, в файле SQLite
+(см. ``src.sqlbackend``), настройки пользователя — как словарь.
+Фоновый поток следит за изменением файлов и подменяет данные целиком, поэтому
+обработчики запросов никогда не разбирают Excel и не читают файлы с диска.
+Каждый запрос обслуживается в своем потоке: ожидание рыночных данных одного
+запроса не задерживает остальные, а клиент рыночных данных отдает ответы из
+TTL-кэша.
+
+Эндпоинты (GET, ответы в JSON):
+
+* ``/main?date_time=YYYY-MM-DD HH:MM:SS``
+* ``/events?date_time=...&period=M|Q|Y``
+* ``/reports/category?category=...&date=...``
+* ``/reports/weekday?date=...``
+* ``/reports/series?freq=D|W|M&by=category|card&start=...&end=...``
+* ``/reports/rolling?windows=30,90&by=...&start=...&end=...``
+* ``/reports/month-over-month?by=...&start=...&end=...``
+* ``/metrics`` — метрики в формате Prometheus (см. ``src.metrics`` и счетчики ``src.memo``)
+* ``/health``
+"""
+import argparse
+import logging
+import os
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+from . import memo, metrics
+from .aggregates import MonthlyAggregates
+from .sqlbackend import BACKENDS, SqlTransactions, open_transactions
+from .reports import spending_by_category, spending_by_weekday
+from .responses import dumps
+from .timeseries import (
+    FREQUENCIES,
+    GROUP_COLUMNS,
+    ROLLING_WINDOWS,
+    month_over_month,
+    rolling_spending,
+    spending_series,
+)
+from .views import SETTINGS_PATH, events_page, load_user_settings, main_page
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATCH_INTERVAL = 2.0
+
+FileStamp = Optional[Tuple[int, int]]
+Resident = Union[MonthlyAggregates, SqlTransactions]
+
+
+def _file_stamp(path: str) -> FileStamp:
+    """(mtime_ns, size) файла или None, если файла нет."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DataState:
+    """Резидентные транзакции и настройки с перезагрузкой при изменении файлов.
+
+    Данные подменяются одной ссылкой на кортеж, поэтому запрос всегда видит
+    согласованную пару (транзакции, настройки) без блокировок.
+    """
+
+    def __init__(self, file_path: str, settings_path: str = SETTINGS_PATH, backend: Optional[str] = None) -> None:
+        self.file_path = file_path
+        self.settings_path = settings_path
+        self.backend = backend
+        # Отметки берутся до чтения: изменение во время загрузки будет подхвачено следующей проверкой
+        self._stamps: Tuple[FileStamp, FileStamp] = (_file_stamp(file_path), _file_stamp(settings_path))
+        self._snapshot: Tuple[Resident, Dict[str, Any]] = (
+            open_transactions(file_path, backend),
+            load_user_settings(settings_path),
+        )
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def transactions(self) -> Resident:
+        return self._snapshot[0]
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        return self._snapshot[1]
+
+    def reload_if_changed(self) -> bool:
+        """Перечитывает измененные файлы; возвращает True, если данные обновились."""
+        with self._lock:
+            data_stamp, settings_stamp = _file_stamp(self.file_path), _file_stamp(self.settings_path)
+            if (data_stamp, settings_stamp) == self._stamps:
+                return False
+            transactions, settings = self._snapshot
+            if data_stamp != self._stamps[0]:
+                logger.info(f"Файл транзакций изменился, перезагрузка: {self.file_path}")
+                try:
+                    transactions = open_transactions(self.file_path, self.backend, raise_errors=True)
+                    if len(transactions) == 0:
+                        raise ValueError("no transactions in file")
+                except Exception as e:
+                    # Файл дописывается или поврежден: остаются прежние данные, проверка повторится
+                    logger.error(f"Не удалось перезагрузить {self.file_path}, данные не изменены: {e}")
+                    transactions, data_stamp = self._snapshot[0], self._stamps[0]
+            if (data_stamp, settings_stamp) == self._stamps:
+                return False
+            if settings_stamp != self._stamps[1]:
+                logger.info(f"Настройки изменились, перезагрузка: {self.settings_path}")
+                settings = load_user_settings(self.settings_path)
+            self._snapshot = (transactions, settings)
+            self._stamps = (data_stamp, settings_stamp)
+            return True
+
+    def watch(self, interval: float = DEFAULT_WATCH_INTERVAL) -> None:
+        """Запускает фоновую проверку файлов каждые ``interval`` секунд."""
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    logger.error(f"Ошибка перезагрузки данных: {e}")
+
+        self._watcher = threading.Thread(target=loop, name="data-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+Endpoint = Callable[[DataState, Dict[str, str]], Any]
+
+
+def _main(state: DataState, params: Dict[str, str]) -> Any:
+    return main_page(params.get("date_time", _now()), state.transactions, state.settings)
+
+
+def _events(state: DataState, params: Dict[str, str]) -> Any:
+    return events_page(params.get("date_time", _now()), params.get("period", "M"), df=state.transactions)
+
+
+def _category_report(state: DataState, params: Dict[str, str]) -> Any:
+    if "category" not in params:
+        raise ValueError("Parameter 'category' is required")
+    return spending_by_category(state.transactions, params["category"], params.get("date"))
+
+
+def _weekday_report(state: DataState, params: Dict[str, str]) -> Any:
+    return spending_by_weekday(state.transactions, params.get("date"))
+
+
+def _series_params(params: Dict[str, str]) -> Dict[str, Any]:
+    """Общие параметры временных рядов; ошибки в них — ответ 400, а не пустой отчет."""
+    by = params.get("by")
+    if by is not None and by not in GROUP_COLUMNS:
+        raise ValueError(f"Parameter 'by' must be one of {sorted(GROUP_COLUMNS)}")
+    return {"by": by, "start": params.get("start"), "end": params.get("end")}
+
+
+def _series(state: DataState, params: Dict[str, str]) -> Any:
+    freq = params.get("freq", "M")
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Parameter 'freq' must be one of {sorted(FREQUENCIES)}")
+    return spending_series(state.transactions, freq, **_series_params(params))
+
+
+def _rolling(state: DataState, params: Dict[str, str]) -> Any:
+    try:
+        windows = [int(w) for w in params["windows"].split(",")] if "windows" in params else list(ROLLING_WINDOWS)
+    except ValueError:
+        raise ValueError("Parameter 'windows' must be a comma-separated list of days") from None
+    if not windows or min(windows) < 1:
+        raise ValueError("Parameter 'windows' must be a comma-separated list of days")
+    return rolling_spending(state.transactions, windows, **_series_params(params))
+
+
+def _month_over_month(state: DataState, params: Dict[str, str]) -> Any:
+    return month_over_month(state.transactions, **_series_params(params))
+
+
+ENDPOINTS: Dict[str, Endpoint] = {
+    "/main": _main,
+    "/events": _events,
+    "/reports/category": _category_report,
+    "/reports/weekday": _weekday_report,
+    "/reports/series": _series,
+    "/reports/rolling": _rolling,
+    "/reports/month-over-month": _month_over_month,
+}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов; данные берутся из ``self.server.state``."""
+
+    server: "FinanceServer"
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            body = metrics.to_prometheus() + memo.to_prometheus()
+            self._send(200, body.encode(), "text/plain; version=0.0.4")
+            return
+        if url.path == "/health":
+            self._send_json(200, {"status": "ok", "rows": len(self.server.state.transactions)})
+            return
+        endpoint = ENDPOINTS.get(url.path)
+        if endpoint is None:
+            self._send_json(404, {"error": f"Unknown endpoint: {url.path}"})
+            return
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            self._send_json(200, endpoint(self.server.state, params))
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Ошибка обработки {self.path}: {e}")
+            self._send_json(500, {"error": str(e)})
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        self._send(status, dumps(payload), "application/json; charset=utf-8")
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class FinanceServer(ThreadingHTTPServer):
+    """Многопоточный HTTP-сервер с общим состоянием данных."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], state: DataState) -> None:
+        super().__init__(address, RequestHandler)
+        self.state = state
+
+
+def serve(
+        file_path: str,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        settings_path: str = SETTINGS_PATH,
+        watch_interval: float = DEFAULT_WATCH_INTERVAL,
+        backend: Optional[str] = None
+) -> None:
+    """Загружает данные и обслуживает запросы до прерывания (Ctrl+C)."""
+    state = DataState(file_path, settings_path, backend)
+    if watch_interval > 0:
+        state.watch(watch_interval)
+    server = FinanceServer((host, port), state)
+    logger.info(f"Сервер запущен на http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        state.stop()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="HTTP-сервер finance-analyzer")
+    parser.add_argument("--file", default="data/operations.xlsx", help="файл с транзакциями")
+    parser.add_argument("--settings", default=SETTINGS_PATH, help="файл настроек пользователя")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_WATCH_INTERVAL,
+                        help="период проверки файлов в секундах (0 — без перезагрузки)")
+    parser.add_argument("--backend", choices=BACKENDS, help="хранилище данных (по умолчанию FINANCE_BACKEND)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    serve(args.file, args.host, args.port, args.settings, args.watch_interval, args.backend)
+
+
+if __name__ == "__main__":
+    main()
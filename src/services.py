@@ -1,47 +1,152 @@
-import pandas as pd
-from typing import List, Dict, Any
 import logging
+from typing import List, Dict, Any, Iterable, Optional, Union
+
+import pandas as pd
+
+from .dtypes import MINOR_UNITS, to_minor_units
+from .memo import shared
+from .metrics import instrument
+from .scanners import DEFAULT_SCANNER, PHONE_PATTERN, PatternScanner
+from .search import SearchIndex
+from .store import TransactionStore
+from .windows import calendar_columns, drop_calendar_columns, month_mask, month_start, parse_month
+
+Transactions = Union[List[Dict[str, Any]], pd.DataFrame, TransactionStore]
 
+
+def _as_frame(transactions: Transactions) -> pd.DataFrame:
+    """Список словарей или хранилище -> DataFrame."""
+    if isinstance(transactions, TransactionStore):
+        return transactions.frame
+    if isinstance(transactions, pd.DataFrame):
+        return transactions
+    return pd.DataFrame(transactions)
+
+
+@instrument
+def cashback_categories_df(df: pd.DataFrame, year: int, month: int) -> Dict[str, float]:
+    """Кешбэк по категориям за месяц, посчитанный по колонкам DataFrame."""
+    if df.empty:
+        return {}
+    in_month = month_mask(df, year, month)
+    if "Кешбэк" in df.columns:
+        cashback = df.loc[in_month, "Кешбэк"]
+    else:
+        cashback = pd.Series(0, index=df.index[in_month])
+    grouped = cashback.groupby(df.loc[in_month, "Категория"], sort=False, dropna=False, observed=True).sum()
+    # tolist() возвращает значения как обычные int/float, как и в построчной версии
+    return dict(zip(grouped.index, grouped.tolist()))
+
+
+@instrument
 def cashback_categories(
-    transactions: List[Dict[str, Any]], 
+    transactions: Transactions,
     year: int, 
     month: int
 ) -> Dict[str, float]:
     """Возвращает сумму кешбэка по категориям за месяц."""
+    try:
+        if isinstance(transactions, TransactionStore):
+            # Из хранилища берем только строки нужного месяца
+            return cashback_categories_df(transactions.month(year, month), year, month)
+        return cashback_categories_df(_as_frame(transactions), year, month)
+    except Exception as e:
+        logging.error(f"Ошибка в cashback_categories: {e}")
+        return {}
+
+
+@instrument
+def cashback_categories_chunks(
+    chunks: Iterable[pd.DataFrame],
+    year: int,
+    month: int
+) -> Dict[str, float]:
+    """Кешбэк по категориям за месяц с потоковой агрегацией по частям (см. utils.iter_transactions)."""
     try:
         result = {}
-        for tx in transactions:
-            tx_date = pd.to_datetime(tx["Дата операции"])
-            if tx_date.year == year and tx_date.month == month:
-                category = tx["Категория"]
-                result[category] = result.get(category, 0) + tx.get("Кешбэк", 0)
+        for chunk in chunks:
+            for category, value in cashback_categories_df(chunk, year, month).items():
+                result[category] = result.get(category, 0) + value
         return result
     except Exception as e:
-        logging.error(f"Ошибка в cashback_categories: {e}")
+        logging.error(f"Ошибка в cashback_categories_chunks: {e}")
         return {}
 
-import math
 
+@instrument
+def investment_bank_df(month: str, df: pd.DataFrame, limit: int = 10) -> float:
+    """Инвесткопилка по колонкам DataFrame: округление вверх до кратного limit.
+
+    Суммы могут быть в рублях или в копейках (``load_transactions(..., minor_units=True)``).
+    """
+    if df.empty:
+        return 0.0
+    in_month = calendar_columns(df)[0] == parse_month(month)
+    amounts = df.loc[in_month, "Сумма операции"]
+    if not len(amounts):
+        return 0.0
+    # Считаем в целых копейках: округление до кратного limit — остаток от деления, без ошибок float
+    kopecks = amounts if df.attrs.get("minor_units") else to_minor_units(amounts)
+    step = int(round(limit * MINOR_UNITS))
+    differences = -kopecks.to_numpy(dtype="int64", na_value=0) % step
+    return round(int(differences.sum()) / MINOR_UNITS, 2)
+
+
+@instrument
 def investment_bank(
     month: str,
-    transactions: List[Dict[str, Any]],
+    transactions: Transactions,
     limit: int = 10
 ) -> float:
     """Считает сумму для инвесткопилки."""
-    total = 0.0
-    for tx in transactions:
-        if tx["Дата операции"].startswith(month):
-            rounded = math.ceil(tx["Сумма операции"] / limit) * limit
-            total += rounded - tx["Сумма операции"]
-    return round(total, 2)
+    if isinstance(transactions, TransactionStore):
+        start = month_start(parse_month(month))
+        return investment_bank_df(month, transactions.month(start.year, start.month), limit)
+    return investment_bank_df(month, _as_frame(transactions), limit)
+
+def _get_search_index(transactions: Transactions) -> SearchIndex:
+    """Индекс набора данных: у хранилища — свой, у кадра из load_transactions — общий до изменения файла."""
+    if isinstance(transactions, TransactionStore):
+        return transactions.search_index
+    return shared("search_index", transactions, lambda: SearchIndex(transactions))
+
+
+@instrument
+def simple_search(query: str, transactions: Transactions, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Поиск транзакций по словам из описания и категории.
+
+    Индекс строится один раз для TransactionStore (и заново после ``append``)
+    и для кадра из ``load_transactions`` (пока не изменился файл); для списков
+    и прочих кадров — на каждый вызов, так как их изменения не отследить.
+    """
+    try:
+        index = _get_search_index(transactions)
+        ids = index.search(query)
+        found = ids if limit is None else ids[:limit]
+        return {"total_found": len(ids), "transactions": index.records(found)}
+    except Exception as e:
+        logging.error(f"Ошибка в simple_search: {e}")
+        return {"total_found": 0, "transactions": []}
+
+
+@instrument
+def scan_transactions(transactions: Transactions, scanner: PatternScanner = DEFAULT_SCANNER) -> pd.DataFrame:
+    """Таблица совпадений шаблонов в описаниях: номер строки, tag и match."""
+    frame = _as_frame(transactions)
+    if "Описание" not in frame.columns:
+        return scanner.scan(pd.Series(dtype=object))
+    return scanner.scan(frame["Описание"])
+
+
+_phone_scanner = PatternScanner({"phone": PHONE_PATTERN})
 
-import re
 
-def find_phone_transactions(transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+@instrument
+def find_phone_transactions(transactions: Transactions) -> List[Dict[str, Any]]:
     """Ищет транзакции с номерами телефонов в описании."""
-    phone_pattern = re.compile(r"\+7\s?\d{3}\s?\d{3}[- ]?\d{2}[- ]?\d{2}")
-    result = []
-    for tx in transactions:
-        if "Описание" in tx and phone_pattern.search(tx["Описание"]):
-            result.append(tx)
-    return result
\ No newline at end of file
+    if isinstance(transactions, TransactionStore):
+        transactions = transactions.frame
+    rows = scan_transactions(transactions, _phone_scanner).index.unique()
+    if isinstance(transactions, pd.DataFrame):
+        return drop_calendar_columns(transactions.loc[rows]).to_dict('records')
+    return [transactions[row] for row in rows]
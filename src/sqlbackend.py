@@ -0,0 +1,325 @@
+"""Хранение транзакций во встроенной базе SQLite с агрегацией на стороне SQL.
+
+Для многолетней истории отчеты и страница событий не поднимают все строки в
+память: транзакции из ``load_transactions`` один раз импортируются в файл
+базы с индексами по дате, категории и карте, а суммы по категориям, дням
+недели, периодам и картам считаются запросами — в Python возвращаются только
+строки результата.
+
+``SqlTransactions`` повторяет интерфейс ``MonthlyAggregates``
+(``category_spending``, ``weekday_spending``, ``payments_by_category``) и
+``TransactionStore`` (``slice``, ``window``, ``month``, ``frame``), поэтому
+принимается представлениями и отчетами вместо них. Суммы хранятся в целых
+копейках и складываются точно; с расчетом pandas по float они совпадают до
+копейки.
+
+Выбор хранилища — настройка ``FINANCE_BACKEND`` (``pandas`` или ``sqlite``,
+см. ``open_transactions``). Файл базы по умолчанию лежит рядом с выгрузкой
+(``<имя>.sqlite``) и пересобирается, когда меняется исходный файл.
+"""
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from . import utils
+from .aggregates import WEEKDAY_NAMES, MonthlyAggregates
+from .dtypes import MINOR_UNITS, to_minor_units
+from .utils import EMPTY_COLUMNS, load_transactions
+from .windows import DATE_COLUMN, DateLike, MISSING_KEY, calendar_columns, weekdays, window_bounds
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pandas", "sqlite")
+DB_SUFFIX = ".sqlite"
+SCHEMA_VERSION = 1
+
+# Колонки DataFrame и базы: суммы — в копейках
+TEXT_COLUMNS = {
+    "Категория": "category",
+    "Номер карты": "card",
+    "Описание": "description",
+}
+AMOUNT_COLUMNS = {
+    "Сумма операции": "amount",
+    "Сумма платежа": "payment",
+    "Кешбэк": "cashback",
+}
+
+SCHEMA = """
+CREATE TABLE transactions (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER,
+    month_key INTEGER,
+    weekday INTEGER,
+    category TEXT,
+    card TEXT,
+    description TEXT,
+    amount INTEGER,
+    payment INTEGER,
+    cashback INTEGER
+);
+CREATE INDEX transactions_ts ON transactions (ts);
+CREATE INDEX transactions_category_ts ON transactions (category, ts);
+CREATE INDEX transactions_card_ts ON transactions (card, ts);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_versions = itertools.count(1)
+
+
+def _nanoseconds(date: DateLike) -> Optional[int]:
+    return None if date is None else pd.Timestamp(date).as_unit("ns").value
+
+
+def _rubles(kopecks: Optional[int]) -> float:
+    """Сумма в рублях; деление целых копеек дает то же число, что и исходная запись суммы."""
+    return 0.0 if kopecks is None else kopecks / MINOR_UNITS
+
+
+def _records(df: pd.DataFrame) -> pd.DataFrame:
+    """Строки DataFrame в колонках базы (порядок строк сохраняется в id)."""
+    dates = pd.to_datetime(df[DATE_COLUMN]) if DATE_COLUMN in df.columns else pd.Series(pd.NaT, index=df.index)
+    month_keys, day_ordinals = calendar_columns(df.assign(**{DATE_COLUMN: dates}))
+    missing = month_keys == MISSING_KEY
+    records = pd.DataFrame({
+        "ts": dates.to_numpy(dtype="datetime64[ns]").view("i8"),
+        "month_key": month_keys.astype("int64"),
+        "weekday": weekdays(day_ordinals).astype("int64"),
+    }, index=df.index).astype("Int64")
+    # Строки без даты хранятся с NULL и не попадают ни в одно окно
+    records.loc[missing] = pd.NA
+    for column, name in TEXT_COLUMNS.items():
+        records[name] = df[column].astype(object).where(df[column].notna(), None) if column in df.columns else None
+    for column, name in AMOUNT_COLUMNS.items():
+        if column not in df.columns:
+            records[name] = None
+        else:
+            kopecks = df[column] if df.attrs.get("minor_units") else to_minor_units(df[column])
+            records[name] = kopecks.astype("Int64")
+    return records
+
+
+class SqlTransactions:
+    """Транзакции в файле SQLite; выборки и агрегаты считаются запросами.
+
+    Суммы складываются в целых копейках и возвращаются в рублях, а pandas складывает
+    float: итоги двух хранилищ совпадают с точностью до копейки, а не побитово.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self._local = threading.local()
+        self.version = next(_versions)
+        self._rows = self._query("SELECT COUNT(*) FROM transactions")[0][0]
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, db_path: str, source: Optional[Dict[str, Any]] = None) -> "SqlTransactions":
+        """Импортирует DataFrame в новый файл базы (старый файл заменяется атомарно)."""
+        tmp_path = db_path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        connection = sqlite3.connect(tmp_path)
+        try:
+            connection.executescript(SCHEMA)
+            _records(df).to_sql("transactions", connection, if_exists="append", index=False, chunksize=50_000)
+            meta = {"schema": SCHEMA_VERSION, **(source or {})}
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [(k, str(v)) for k, v in meta.items()])
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(tmp_path, db_path)
+        logger.info(f"Транзакции импортированы в {db_path}: {len(df)} строк")
+        return cls(db_path)
+
+    @classmethod
+    def from_file(cls, file_path: str, db_path: Optional[str] = None) -> "SqlTransactions":
+        """База для файла выгрузки; пересобирается, если исходный файл изменился.
+
+        Ошибка чтения выгрузки пробрасывается: база строится и помечается версией
+        файла только по успешно прочитанным данным.
+        """
+        db_path = db_path or file_path + DB_SUFFIX
+        stat = os.stat(file_path)
+        source = {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+        base_currency = utils.FINANCE_BASE_CURRENCY
+        if base_currency:
+            # Суммы в базе пересчитаны: смена валюты или таблицы курсов требует пересборки
+            rates = os.stat(utils.FINANCE_RATES_PATH)
+            source.update(base_currency=base_currency, rates_size=rates.st_size, rates_mtime_ns=rates.st_mtime_ns)
+        if os.path.exists(db_path):
+            try:
+                existing = cls(db_path)
+                meta = dict(existing._query("SELECT key, value FROM meta"))
+                if meta == {"schema": str(SCHEMA_VERSION), **{k: str(v) for k, v in source.items()}}:
+                    return existing
+            except sqlite3.DatabaseError as e:
+                logger.warning(f"Не удалось прочитать базу {db_path}: {e}")
+        return cls.build(load_transactions(file_path, raise_errors=True), db_path, source)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Соединение на поток: сервер обслуживает запросы в разных потоках
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            self._local.connection = connection
+        return connection
+
+    def _query(self, sql: str, params: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+        return self._connection().execute(sql, params).fetchall()
+
+    @staticmethod
+    def _where(
+            start: DateLike = None,
+            end: DateLike = None,
+            category: Optional[str] = None,
+            card: Optional[str] = None
+    ) -> Tuple[str, Tuple[Any, ...]]:
+        """Условие WHERE по окну дат и фильтрам (строки без даты исключаются)."""
+        clauses, params = ["ts IS NOT NULL"], []
+        for clause, value in (("ts >= ?", _nanoseconds(start)), ("ts <= ?", _nanoseconds(end)),
+                              ("category = ?", category), ("card = ?", card)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return " AND ".join(clauses), tuple(params)
+
+    def fingerprint(self) -> Tuple[str, int]:
+        return self.db_path, self.version
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def empty(self) -> bool:
+        return self._rows == 0
+
+    def _frame(
+            self,
+            where: str,
+            params: Tuple[Any, ...],
+            order: str = "ts IS NULL, ts, id",
+            limit: Optional[int] = None
+    ) -> pd.DataFrame:
+        """Строки запроса в колонках DataFrame, суммы — в рублях."""
+        columns = ", ".join(["ts", *TEXT_COLUMNS.values(), *AMOUNT_COLUMNS.values()])
+        sql = f"SELECT {columns} FROM transactions WHERE {where} ORDER BY {order}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        rows = pd.read_sql_query(sql, self._connection(), params=params)
+        frame = pd.DataFrame({DATE_COLUMN: pd.to_datetime(rows["ts"].astype("Int64"), unit="ns")})
+        for column, name in TEXT_COLUMNS.items():
+            frame[column] = rows[name]
+        for column, name in AMOUNT_COLUMNS.items():
+            frame[column] = rows[name].astype("float64") / MINOR_UNITS
+        return frame
+
+    def slice(
+            self,
+            start: DateLike = None,
+            end: DateLike = None,
+            category: Optional[str] = None,
+            card: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Транзакции с датой в [start, end], опционально по категории и/или карте (по возрастанию даты)."""
+        return self._frame(*self._where(start, end, category, card))
+
+    def window(self, date: DateLike, period: str = "M", **filters: Optional[str]) -> pd.DataFrame:
+        """Транзакции за период M/Q/Y, заканчивающийся датой date."""
+        return self.slice(*window_bounds(date, period), **filters)
+
+    def month(self, year: int, month: int, **filters: Optional[str]) -> pd.DataFrame:
+        """Транзакции за календарный месяц (по индексу даты)."""
+        start = pd.Timestamp(year=year, month=month, day=1)
+        return self.slice(start, start + pd.DateOffset(months=1) - pd.Timedelta(1, "ns"), **filters)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Все транзакции одним DataFrame (строки без даты — в конце)."""
+        return self._frame("1", ())
+
+    def category_spending(self, category: str, start: DateLike = None, end: DateLike = None) -> Tuple[float, int]:
+        """Сумма трат и число строк категории за окно."""
+        where, params = self._where(start, end, category)
+        spend, rows = self._query(
+            f"SELECT SUM(CASE WHEN amount < 0 THEN amount ELSE 0 END), COUNT(*) FROM transactions WHERE {where}",
+            params,
+        )[0]
+        return _rubles(spend), rows
+
+    def weekday_spending(self, start: DateLike = None, end: DateLike = None) -> pd.DataFrame:
+        """Сумма модулей трат и их количество по дням недели (индекс — название дня)."""
+        where, params = self._where(start, end)
+        rows = self._query(
+            f"SELECT weekday, -SUM(amount), COUNT(*) FROM transactions WHERE {where} AND amount < 0 "
+            "GROUP BY weekday ORDER BY weekday",
+            params,
+        )
+        return pd.DataFrame(
+            {"spend_sum": [_rubles(total) for _, total, _ in rows], "spend_count": [count for *_, count in rows]},
+            index=[WEEKDAY_NAMES[day] for day, *_ in rows],
+        )
+
+    def payments_by_category(self, start: DateLike = None, end: DateLike = None) -> Tuple[pd.DataFrame, pd.Series]:
+        """Расходы и поступления по категориям за окно и итоги по всем строкам (включая без категории)."""
+        where, params = self._where(start, end)
+        rows = self._query(
+            "SELECT category, "
+            "SUM(CASE WHEN payment < 0 THEN payment ELSE 0 END), SUM(payment < 0), "
+            "SUM(CASE WHEN payment > 0 THEN payment ELSE 0 END), SUM(payment > 0) "
+            f"FROM transactions WHERE {where} GROUP BY category ORDER BY category",
+            params,
+        )
+        columns = ["expense_sum", "expense_count", "income_sum", "income_count"]
+        by_category = pd.DataFrame(
+            [(_rubles(expense), expense_count or 0, _rubles(income), income_count or 0)
+             for _, expense, expense_count, income, income_count in rows],
+            index=pd.Index([row[0] for row in rows], name="category"),
+            columns=columns,
+        )
+        totals = by_category.sum()
+        return by_category[by_category.index.notna()], totals
+
+    def card_spending(self) -> List[Dict[str, Any]]:
+        """Траты и кешбэк 1% по картам в порядке первого появления карты (как ``views.summarize_cards``)."""
+        rows = self._query(
+            "SELECT card, -SUM(CASE WHEN amount < 0 THEN amount ELSE 0 END) FROM transactions "
+            "WHERE card IS NOT NULL GROUP BY card ORDER BY MIN(id)"
+        )
+        return [
+            {"last_digits": str(card), "total_spent": round(_rubles(total), 2),
+             "cashback": round(_rubles(total) * 0.01, 2)}
+            for card, total in rows
+        ]
+
+    def largest(self, n: int) -> pd.DataFrame:
+        """n транзакций с наибольшей суммой операции (при равенстве — в порядке импорта, как ``nlargest``)."""
+        return self._frame("amount IS NOT NULL", (), order="amount DESC, id", limit=n)
+
+
+def open_transactions(
+        file_path: str,
+        backend: Optional[str] = None,
+        raise_errors: bool = False
+) -> Union[MonthlyAggregates, SqlTransactions]:
+    """Резидентные транзакции выбранного хранилища: настройка ``FINANCE_BACKEND`` или аргумент backend.
+
+    С ``raise_errors`` ошибка чтения файла пробрасывается, а не дает пустой набор.
+    """
+    backend = backend or utils.FINANCE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    if backend == "sqlite":
+        try:
+            return SqlTransactions.from_file(file_path, utils.FINANCE_DB_PATH)
+        except Exception as e:
+            if raise_errors:
+                raise
+            # Пустой набор в памяти: база не записывается, следующий вызов снова прочитает файл
+            logger.error(f"Не удалось открыть транзакции {file_path}: {e}")
+            return MonthlyAggregates.from_frame(pd.DataFrame(columns=EMPTY_COLUMNS))
+    return MonthlyAggregates.from_frame(load_transactions(file_path, raise_errors=raise_errors))
@@ -0,0 +1,171 @@
+"""Хранилище транзакций с индексом по дате для быстрых выборок по периодам."""
+import itertools
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .search import SearchIndex
+from .utils import load_transactions
+from .windows import (  # noqa: F401 - период и тип даты исторически импортируются из store
+    DATE_COLUMN,
+    PERIOD_OFFSETS,
+    DateLike,
+    add_calendar_columns,
+    has_calendar_columns,
+    period_start,
+    window_bounds,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEXED_COLUMNS = ("Категория", "Номер карты")
+
+# Номера версий хранилищ: уникальны в процессе и не переиспользуются, в отличие от id()
+_versions = itertools.count(1)
+
+
+def _to_i8(date: DateLike) -> Optional[int]:
+    """Дата в наносекундах для сравнения с индексом (None — граница не задана)."""
+    if date is None:
+        return None
+    return pd.Timestamp(date).as_unit("ns").value
+
+
+class TransactionStore:
+    """Транзакции, отсортированные по дате операции.
+
+    Выборки за период делаются бинарным поиском (searchsorted) и возвращают
+    непрерывный срез. Для категорий и карт хранятся вторичные индексы —
+    отсортированные по дате позиции строк, поэтому выборка «категория + период»
+    не затрагивает строки других категорий. Строки без даты хранятся в конце
+    и попадают только в ``frame``. Исходный порядок строк сохраняется для
+    ответов, которые от него зависят (``in_source_order``).
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        frame = df.reset_index(drop=True).sort_values(DATE_COLUMN, kind="mergesort", na_position="last")
+        # Позиция в frame для каждой строки исходного кадра
+        self._source_positions = np.empty(len(frame), dtype=np.intp)
+        self._source_positions[frame.index.to_numpy()] = np.arange(len(frame))
+        frame = frame.reset_index(drop=True)
+        dates = pd.to_datetime(frame[DATE_COLUMN]).astype("datetime64[ns]")
+        frame[DATE_COLUMN] = dates
+        if not has_calendar_columns(frame):
+            add_calendar_columns(frame)
+        self._valid = int(dates.notna().sum())
+        self._dates = dates.to_numpy()[:self._valid].view("i8")
+        self.frame = frame
+        self._search_index: Optional[SearchIndex] = None
+        # Новая версия при каждом построении (в том числе в append): по ней memo отличает данные
+        self.version = next(_versions)
+        # Для каждого значения храним позиции строк и их даты (оба массива упорядочены по дате)
+        self._indexes: Dict[str, Dict[object, Tuple[np.ndarray, np.ndarray]]] = {}
+        for column in INDEXED_COLUMNS:
+            if column in frame.columns:
+                groups = frame.iloc[:self._valid].groupby(column, sort=False, observed=True).indices
+                self._indexes[column] = {
+                    value: (positions, self._dates[positions]) for value, positions in groups.items()
+                }
+        logger.info(f"Построено хранилище транзакций: {len(frame)} строк")
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "TransactionStore":
+        """Загружает транзакции из файла и строит хранилище."""
+        return cls(load_transactions(file_path))
+
+    def append(self, df: pd.DataFrame) -> None:
+        """Добавляет транзакции и перестраивает индексы по дате.
+
+        Новые выгрузки обычно позже уже загруженных, поэтому стабильная
+        сортировка почти упорядоченных данных обходится дешево. Поисковый
+        индекс, если он уже построен, не перестраивается: в него добавляются
+        только новые строки.
+        """
+        search_index, previous = self._search_index, len(self)
+        self.__init__(pd.concat([self.in_source_order(), df], ignore_index=True))
+        if search_index is not None:
+            search_index.add(self.frame.take(self._source_positions[previous:]).reset_index(drop=True))
+            self._search_index = search_index
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def search_index(self) -> SearchIndex:
+        """Полнотекстовый индекс строк в исходном порядке; строится при первом обращении.
+
+        Номер строки в индексе — ее позиция в ``in_source_order``, поэтому строки
+        из ``append`` получают номера после уже проиндексированных.
+        """
+        index = self._search_index
+        if index is None:
+            # Одновременное построение в двух потоках дает одинаковые индексы, последний остается
+            index = self._search_index = SearchIndex(self.in_source_order())
+        return index
+
+    def in_source_order(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Все строки в порядке исходного кадра (и добавленных выгрузок), опционально только columns."""
+        frame = self.frame if columns is None else self.frame[list(columns)]
+        return frame.take(self._source_positions).reset_index(drop=True)
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    @property
+    def columns(self) -> pd.Index:
+        return self.frame.columns
+
+    def _lookup(self, column: str, value: object) -> Tuple[np.ndarray, np.ndarray]:
+        index = self._indexes.get(column)
+        if index is None:
+            raise KeyError(f"Нет индекса по колонке {column}")
+        return index.get(value, (np.empty(0, dtype=np.intp), np.empty(0, dtype="i8")))
+
+    def positions(self, start: DateLike = None, end: DateLike = None) -> Tuple[int, int]:
+        """Границы [lo, hi) строк с датой в [start, end] в отсортированном frame."""
+        start_i8, end_i8 = _to_i8(start), _to_i8(end)
+        lo = 0 if start_i8 is None else int(np.searchsorted(self._dates, start_i8, side="left"))
+        hi = self._valid if end_i8 is None else int(np.searchsorted(self._dates, end_i8, side="right"))
+        return lo, max(lo, hi)
+
+    def slice(
+            self,
+            start: DateLike = None,
+            end: DateLike = None,
+            category: Optional[str] = None,
+            card: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Транзакции с датой в [start, end], опционально по категории и/или карте."""
+        if category is None and card is None:
+            lo, hi = self.positions(start, end)
+            return self.frame.iloc[lo:hi]
+
+        start_i8, end_i8 = _to_i8(start), _to_i8(end)
+
+        if card is None:
+            positions, dates = self._lookup("Категория", category)
+        elif category is None:
+            positions, dates = self._lookup("Номер карты", card)
+        else:
+            positions = np.intersect1d(
+                self._lookup("Категория", category)[0], self._lookup("Номер карты", card)[0], assume_unique=True
+            )
+            dates = self._dates[positions]
+
+        # Позиции отсортированы по дате, поэтому окно внутри них тоже ищется бинарным поиском
+        lo = 0 if start_i8 is None else int(np.searchsorted(dates, start_i8, side="left"))
+        hi = len(dates) if end_i8 is None else int(np.searchsorted(dates, end_i8, side="right"))
+        return self.frame.iloc[positions[lo:max(lo, hi)]]
+
+    def window(self, date: DateLike, period: str = "M", **filters: Optional[str]) -> pd.DataFrame:
+        """Транзакции за период M/Q/Y, заканчивающийся датой date."""
+        return self.slice(*window_bounds(date, period), **filters)
+
+    def month(self, year: int, month: int, **filters: Optional[str]) -> pd.DataFrame:
+        """Транзакции за календарный месяц."""
+        start = pd.Timestamp(year=year, month=month, day=1)
+        end = start + pd.DateOffset(months=1) - pd.Timedelta(1, "ns")
+        return self.slice(start, end, **filters)
@@ -0,0 +1,189 @@
+"""Временные ряды трат: суммы по дням/неделям/месяцам, скользящие суммы и изменения месяц к месяцу.
+
+В отличие от ``spending_by_category``, который считает одну сумму за окно,
+здесь весь ряд строится одним проходом: траты группируются по началу
+интервала (и по категории или карте), пустые интервалы заполняются нулями,
+скользящие суммы считаются ``rolling`` по дневной таблице за O(n).
+
+Ответы — словари с датами-строками в ключах, как у отчетов ``src.reports``:
+
+* ``{"2021-12": 1500.0, ...}`` — без группировки;
+* ``{"Супермаркеты": {"2021-12": 1500.0, ...}, ...}`` — с ``by="category"`` или ``by="card"``.
+"""
+import logging
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .aggregates import MonthlyAggregates
+from .dataset import PartitionedDataset
+from .dtypes import from_minor_units
+from .metrics import instrument
+from .reports import handle_report_errors
+from .sqlbackend import SqlTransactions
+from .store import TransactionStore
+from .windows import DATE_COLUMN, DateLike, operation_dates
+
+logger = logging.getLogger(__name__)
+
+# Интервал ряда: частота периода (начало интервала), частота диапазона и формат ключа
+FREQUENCIES = {
+    "D": ("D", "D", "%Y-%m-%d"),
+    "W": ("W-SUN", "W-MON", "%Y-%m-%d"),
+    "M": ("M", "MS", "%Y-%m"),
+}
+GROUP_COLUMNS = {
+    "category": "Категория",
+    "card": "Номер карты",
+}
+ROLLING_WINDOWS = (30, 90)
+TOTAL_COLUMN = "total"
+
+Transactions = Union[pd.DataFrame, TransactionStore, MonthlyAggregates, PartitionedDataset, SqlTransactions]
+
+
+def _spending(transactions: Transactions, start: DateLike, end: DateLike, by: Optional[str]) -> pd.DataFrame:
+    """Траты окна [start, end] как положительные суммы: колонки date, amount и group (если задан by)."""
+    if by is not None and by not in GROUP_COLUMNS:
+        raise ValueError(f"Unknown grouping: {by}")
+    if isinstance(transactions, MonthlyAggregates):
+        transactions = transactions.store
+    if isinstance(transactions, (TransactionStore, PartitionedDataset, SqlTransactions)):
+        # Окно выбирается по индексу даты; в SQLite — запросом по индексу
+        frame = transactions.slice(start, end)
+        dates = frame[DATE_COLUMN]
+        mask = dates.notna()
+    else:
+        # Исходный DataFrame только читается, как и в src.reports
+        frame = transactions
+        dates = operation_dates(frame, date_format=None)
+        mask = dates.notna()
+        if start is not None:
+            mask &= dates >= pd.Timestamp(start)
+        if end is not None:
+            mask &= dates <= pd.Timestamp(end)
+
+    amounts = frame["Сумма операции"]
+    if frame.attrs.get("minor_units"):
+        amounts = from_minor_units(amounts)
+    mask &= amounts < 0
+    spending = pd.DataFrame({"date": dates[mask], "amount": -amounts[mask].astype("float64")})
+    if by is not None:
+        spending["group"] = frame.loc[mask, GROUP_COLUMNS[by]]
+    return spending
+
+
+def _binned(spending: pd.DataFrame, freq: str, by: Optional[str]) -> pd.DataFrame:
+    """Суммы трат по интервалам: строки — все интервалы диапазона (пустые — нули), колонки — группы."""
+    period_freq, range_freq, _ = FREQUENCIES[freq]
+    bins = spending["date"].dt.to_period(period_freq).dt.start_time.rename("date")
+    keys = [bins] if by is None else [bins, spending["group"]]
+    sums = spending["amount"].groupby(keys, observed=True).sum()
+    table = sums.to_frame(TOTAL_COLUMN) if by is None else sums.unstack(fill_value=0.0)
+    index = pd.date_range(table.index.min(), table.index.max(), freq=range_freq)
+    return table.reindex(index, fill_value=0.0)
+
+
+def _number(value: float) -> Optional[float]:
+    """Значение для JSON: округление до копеек, NaN и бесконечность — None."""
+    return round(float(value), 2) if np.isfinite(value) else None
+
+
+def _series_json(table: pd.DataFrame, freq: str, by: Optional[str]) -> Dict[str, Any]:
+    labels = table.index.strftime(FREQUENCIES[freq][2])
+    result = {str(column): dict(zip(labels, map(_number, table[column].to_numpy()))) for column in table.columns}
+    return result if by is not None else result.get(TOTAL_COLUMN, {})
+
+
+def _check_frequency(freq: str) -> None:
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unknown frequency: {freq}")
+
+
+@handle_report_errors
+@instrument
+def spending_series(
+        transactions: Transactions,
+        freq: str = "M",
+        by: Optional[str] = None,
+        start: DateLike = None,
+        end: DateLike = None
+) -> Dict[str, Any]:
+    """Траты по дням ("D"), неделям с понедельника ("W") или месяцам ("M"), всего или по категориям/картам."""
+    _check_frequency(freq)
+    if transactions.empty:
+        logger.warning("Получен пустой DataFrame")
+        return {}
+    spending = _spending(transactions, start, end, by)
+    if spending.empty:
+        logger.warning("Нет данных о тратах за указанный период")
+        return {}
+    return _series_json(_binned(spending, freq, by), freq, by)
+
+
+@handle_report_errors
+@instrument
+def rolling_spending(
+        transactions: Transactions,
+        windows: Sequence[int] = ROLLING_WINDOWS,
+        by: Optional[str] = None,
+        start: DateLike = None,
+        end: DateLike = None
+) -> Dict[str, Any]:
+    """Скользящие суммы трат за последние N дней на каждый день: ``{"30d": {...}, "90d": {...}}``."""
+    if transactions.empty:
+        logger.warning("Получен пустой DataFrame")
+        return {}
+    # Первые точки ряда с заданным start должны учитывать траты до него — берем запас в самое длинное окно
+    load_start = None if start is None else pd.Timestamp(start).normalize() - pd.Timedelta(days=max(windows) - 1)
+    spending = _spending(transactions, load_start, end, by)
+    if spending.empty:
+        logger.warning("Нет данных о тратах за указанный период")
+        return {}
+
+    # Дневная таблица без пропусков: окно в N строк — ровно N календарных дней
+    daily = _binned(spending, "D", by)
+    result = {}
+    for window in windows:
+        rolled = daily.rolling(window, min_periods=1).sum()
+        if start is not None:
+            rolled = rolled[rolled.index >= pd.Timestamp(start).normalize()]
+        result[f"{window}d"] = _series_json(rolled, "D", by)
+    return result
+
+
+@handle_report_errors
+@instrument
+def month_over_month(
+        transactions: Transactions,
+        by: Optional[str] = None,
+        start: DateLike = None,
+        end: DateLike = None
+) -> Dict[str, Any]:
+    """Траты по месяцам и изменение к предыдущему месяцу: ``{"2021-12": {"total", "delta", "delta_percent"}}``."""
+    if transactions.empty:
+        logger.warning("Получен пустой DataFrame")
+        return {}
+    spending = _spending(transactions, start, end, by)
+    if spending.empty:
+        logger.warning("Нет данных о тратах за указанный период")
+        return {}
+
+    monthly = _binned(spending, "M", by)
+    previous = monthly.shift()
+    delta = monthly - previous
+    # Рост от нулевого месяца не определен: деление на ноль дает inf, который становится None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = delta / previous * 100
+
+    labels = monthly.index.strftime(FREQUENCIES["M"][2])
+    result = {}
+    for column in monthly.columns:
+        result[str(column)] = {
+            label: {"total": _number(total), "delta": _number(change), "delta_percent": _number(ratio)}
+            for label, total, change, ratio in zip(
+                labels, monthly[column].to_numpy(), delta[column].to_numpy(), percent[column].to_numpy()
+            )
+        }
+    return result if by is not None else result.get(TOTAL_COLUMN, {})
@@ -1,62 +1,280 @@
-"""Utility functions for the finance analyzer."""
+"""Utility functions for the finance analyzer.
+
+Importing this module is cheap: pandas, requests and the cache/market helpers are
+imported on first use, and ``.env`` is read on first access to the API settings
+(logging is configured by entry points such as ``src.main``, not on import).
+"""
+from __future__ import annotations
+
+import functools
 import json
 import logging
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence
 import os
 
-import pandas as pd
-import requests
-from dotenv import load_dotenv
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .market import MarketDataClient
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-# Загружаем переменные окружения
-load_dotenv()
+# Настройки API из переменных окружения (и .env) с значениями по умолчанию
+ENV_SETTINGS: Dict[str, Optional[str]] = {
+    "CURRENCY_API_KEY": None,
+    "STOCK_API_KEY": None,
+    "CURRENCY_API_URL": "https://v6.exchangerate-api.com",
+    "STOCK_API_URL": "https://www.alphavantage.co",
+    # Хранилище резидентных данных: pandas или sqlite (см. src.sqlbackend)
+    "FINANCE_BACKEND": "pandas",
+    "FINANCE_DB_PATH": None,
+    # Базовая валюта сумм (пусто — без пересчета) и таблица курсов (см. src.fx)
+    "FINANCE_BASE_CURRENCY": None,
+    "FINANCE_RATES_PATH": "data/rates.csv",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def load_env() -> None:
+    """Load ``.env`` into the environment once, on first use."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def _setting(name: str) -> Optional[str]:
+    """API setting: a value assigned on the module (e.g. in tests) wins over the environment."""
+    if name in globals():
+        return globals()[name]
+    load_env()
+    return os.getenv(name, ENV_SETTINGS[name])
+
+
+def __getattr__(name: str) -> Any:
+    # utils.CURRENCY_API_KEY и др. читаются из окружения при первом обращении
+    if name in ENV_SETTINGS:
+        return _setting(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_market_client = None
+
+
+def get_market_client() -> MarketDataClient:
+    """Shared market-data client (pooled session + TTL cache), created on first use."""
+    global _market_client
+    if _market_client is None:
+        from .market import MarketDataClient
+
+        load_env()
+        _market_client = MarketDataClient(
+            ttl=float(os.getenv("MARKET_DATA_TTL", "300")),
+            timeout=float(os.getenv("MARKET_DATA_TIMEOUT", "10")),
+        )
+    return _market_client
+
+
+REQUIRED_COLUMNS = ["Дата операции", "Сумма операции", "Категория", "Описание"]
+# Колонки пустого кадра, который отдается вместо непрочитанного файла
+EMPTY_COLUMNS = REQUIRED_COLUMNS + ["Номер карты"]
+DEFAULT_CHUNK_SIZE = 50_000
 
-# Получаем API ключи из переменных окружения
-CURRENCY_API_KEY = os.getenv("CURRENCY_API_KEY")
-STOCK_API_KEY = os.getenv("STOCK_API_KEY")
 
-def load_transactions(file_path: str) -> pd.DataFrame:
-    """Load transactions from Excel file."""
+def normalize_transactions(df: pd.DataFrame, warn_missing: bool = True, compact: bool = True) -> pd.DataFrame:
+    """Validate required columns, parse dates and compact dtypes (shared by full and chunked loading).
+
+    With ``compact`` low-cardinality text columns become ``category`` (see ``src.dtypes``).
+    Integer ``month_key``/``day_ordinal`` columns are added for window arithmetic (see ``src.windows``).
+    """
+    from .dtypes import DATE_COLUMNS, compact_transactions, parse_dates
+    from .windows import add_calendar_columns
+
+    # Проверяем наличие необходимых колонок
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
+    if missing_columns:
+        if warn_missing:
+            logger.warning(f"Отсутствуют колонки: {missing_columns}")
+        # Добавляем отсутствующие колонки с пустыми значениями
+        for col in missing_columns:
+            df[col] = None
+
+    # Даты разбираются один раз: ISO 8601 из CSV и "31.12.2021 16:44:00" из выгрузок банка
+    if compact:
+        return add_calendar_columns(compact_transactions(df))
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = parse_dates(df[col])
+    return add_calendar_columns(df)
+
+
+def load_transactions(
+        file_path: str,
+        use_cache: bool = True,
+        minor_units: bool = False,
+        base_currency: Optional[str] = None,
+        raise_errors: bool = False
+) -> pd.DataFrame:
+    """Load transactions from Excel (.xlsx/.xls), CSV or Parquet file.
+
+    With ``use_cache`` the parsed frame is kept in a columnar sidecar next to the
+    source file (see ``src.cache``) and reused while the file is unchanged.
+    With ``minor_units`` amounts are returned as exact int64 kopecks.
+    With ``base_currency`` (default: the ``FINANCE_BASE_CURRENCY`` setting) amounts are
+    converted to that currency by the local rate table (see ``src.fx``).
+    Errors are logged and give an empty frame, or are re-raised with ``raise_errors``.
+    Returned frames are registered in ``src.memo``: results computed from them are
+    cached until the file changes, so callers must treat them as read-only.
+    """
+    import pandas as pd
+
+    from .cache import read_cache, source_fingerprint, write_cache
+    from .dtypes import compact_transactions
+    from .memo import file_stamp, register_frame
+
     try:
+        base_currency = base_currency or _setting("FINANCE_BASE_CURRENCY")
+        rates = None
+        currency = None
+        if base_currency:
+            from .fx import load_rate_table, rate_table_stamp
+
+            rates_path = _setting("FINANCE_RATES_PATH")
+            currency = (base_currency,) + rate_table_stamp(rates_path)
+            rates = load_rate_table(rates_path)
+
+        def finish(df: pd.DataFrame) -> pd.DataFrame:
+            if rates is not None:
+                from .fx import convert_transactions
+
+                df = convert_transactions(df, rates, base_currency)
+            return compact_transactions(df, minor_units=True) if minor_units else df
+
+        # Версия файла снимается до чтения: изменение во время загрузки даст новую версию при следующем вызове
+        stamp = file_stamp(file_path, minor_units, currency)
+        fingerprint = None
+        if use_cache:
+            cached = read_cache(file_path)
+            if cached is not None:
+                logger.info(f"Loaded transactions from cache for {file_path}")
+                df = finish(cached)
+                register_frame(df, stamp)
+                return df
+            fingerprint = source_fingerprint(file_path)
+
         # Пробуем определить формат файла по расширению
-        if file_path.endswith('.xlsx'):
-            engine = 'openpyxl'
-        elif file_path.endswith('.xls'):
-            engine = 'xlrd'
+        if file_path.endswith('.csv'):
+            df = pd.read_csv(file_path)
+        elif file_path.endswith('.parquet'):
+            df = pd.read_parquet(file_path)
         else:
-            # Если расширение не определено, пробуем openpyxl
-            engine = 'openpyxl'
-            
-        df = pd.read_excel(file_path, engine=engine)
-        
-        # Проверяем наличие необходимых колонок
-        required_columns = ["Дата операции", "Сумма операции", "Категория", "Описание"]
-        missing_columns = [col for col in required_columns if col not in df.columns]
+            if file_path.endswith('.xls'):
+                engine = 'xlrd'
+            else:
+                # Для .xlsx и неизвестных расширений пробуем openpyxl
+                engine = 'openpyxl'
+            df = pd.read_excel(file_path, engine=engine)
         
-        if missing_columns:
-            logger.warning(f"Отсутствуют колонки: {missing_columns}")
-            # Добавляем отсутствующие колонки с пустыми значениями
-            for col in missing_columns:
-                df[col] = None
-                
-        # Преобразуем даты
-        if "Дата операции" in df.columns:
-            df["Дата операции"] = pd.to_datetime(df["Дата операции"], format="%Y-%m-%d", errors='coerce')
-            
+        df = normalize_transactions(df)
+
+        if use_cache:
+            write_cache(file_path, df, fingerprint)
+
         logger.info(f"Successfully loaded transactions from {file_path}")
+        df = finish(df)
+        register_frame(df, stamp)
         return df
     except Exception as e:
         logger.error(f"Error loading transactions: {e}")
+        if raise_errors:
+            raise
         # Возвращаем пустой DataFrame с необходимыми колонками
-        return pd.DataFrame(columns=["Дата операции", "Сумма операции", "Категория", "Описание", "Номер карты"])
+        return pd.DataFrame(columns=EMPTY_COLUMNS)
+
+def _iter_xlsx_rows(file_path: str) -> Iterator[tuple]:
+    """Yield rows of the first sheet via openpyxl in read-only (streaming) mode."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _iter_xls_rows(file_path: str) -> Iterator[list]:
+    """Yield rows of the first sheet via xlrd (the legacy format has no true streaming)."""
+    import xlrd
+
+    workbook = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        sheet = workbook.sheet_by_index(0)
+        for row_index in range(sheet.nrows):
+            yield [
+                xlrd.xldate_as_datetime(cell.value, workbook.datemode) if cell.ctype == xlrd.XL_CELL_DATE
+                else cell.value
+                for cell in sheet.row(row_index)
+            ]
+    finally:
+        workbook.release_resources()
+
+
+def _iter_parquet_batches(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Yield record batches of a Parquet file (requires pyarrow)."""
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+
+
+def _rows_to_chunks(rows: Iterator[Sequence[Any]], chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Group raw sheet rows (header first) into DataFrame chunks."""
+    import pandas as pd
+
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [str(col) for col in header]
+    buffer = []
+    for row in rows:
+        if all(value is None for value in row):
+            continue
+        buffer.append(row)
+        if len(buffer) >= chunk_size:
+            yield pd.DataFrame(buffer, columns=columns).infer_objects()
+            buffer = []
+    if buffer:
+        yield pd.DataFrame(buffer, columns=columns).infer_objects()
+
+
+def iter_transactions(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Stream transactions from .xlsx/.xls/.csv/.parquet as typed DataFrame chunks.
+
+    Every chunk goes through ``normalize_transactions``, so consumers see the same
+    columns and parsed dates as with ``load_transactions`` while memory use is bounded
+    by ``chunk_size`` rows. Text columns stay ``object``: per-chunk categoricals would
+    have different categories and turn back into ``object`` on concatenation anyway.
+    """
+    import pandas as pd
+
+    if file_path.endswith('.csv'):
+        chunks = pd.read_csv(file_path, chunksize=chunk_size)
+    elif file_path.endswith('.parquet'):
+        chunks = _iter_parquet_batches(file_path, chunk_size)
+    elif file_path.endswith('.xls'):
+        chunks = _rows_to_chunks(_iter_xls_rows(file_path), chunk_size)
+    else:
+        chunks = _rows_to_chunks(_iter_xlsx_rows(file_path), chunk_size)
+
+    try:
+        for index, chunk in enumerate(chunks):
+            yield normalize_transactions(chunk, warn_missing=index == 0, compact=False)
+    except Exception as e:
+        logger.error(f"Error streaming transactions from {file_path}: {e}")
+        raise
+    logger.info(f"Successfully streamed transactions from {file_path}")
+
 
 def get_greeting(time: datetime) -> str:
     """Return appropriate greeting based on time of day."""
@@ -72,7 +290,10 @@ def get_greeting(time: datetime) -> str:
 
 def get_currency_rates(currencies: List[str]) -> List[Dict[str, Any]]:
     """Get current currency rates from ExchangeRate-API."""
-    if not CURRENCY_API_KEY:
+    import requests
+
+    currency_api_key = _setting("CURRENCY_API_KEY")
+    if not currency_api_key:
         logger.error("CURRENCY_API_KEY not found in .env file.")
         return [{"currency": cur, "rate": "Error: API key missing"} for cur in currencies]
 
@@ -80,12 +301,11 @@ def get_currency_rates(currencies: List[str]) -> List[Dict[str, Any]]:
     # Базовая валюта для ExchangeRate-API (например, USD, или можно сделать RUB, если API поддерживает)
     # Для бесплатного тарифа ExchangeRate-API часто базовая валюта USD
     base_currency = "USD" 
-    url = f"https://v6.exchangerate-api.com/v6/{CURRENCY_API_KEY}/latest/{base_currency}"
+    url = f"{_setting('CURRENCY_API_URL')}/v6/{currency_api_key}/latest/{base_currency}"
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Проверка на HTTP ошибки
-        data = response.json()
+        # Клиент проверяет HTTP-ошибки и кэширует только успешные ответы
+        data = get_market_client().get_json(url, validate=lambda data: data.get("result") != "error")
 
         if data.get("result") == "error":
             error_type = data.get("error-type", "Unknown error")
@@ -126,17 +346,24 @@ def get_currency_rates(currencies: List[str]) -> List[Dict[str, Any]]:
 
 def get_stock_prices(stocks: List[str]) -> List[Dict[str, Any]]:
     """Get current stock prices from Alpha Vantage API."""
-    if not STOCK_API_KEY:
+    import requests
+
+    stock_api_key, stock_api_url = _setting("STOCK_API_KEY"), _setting("STOCK_API_URL")
+    if not stock_api_key:
         logger.error("STOCK_API_KEY not found in .env file.")
         return [{"stock": stock, "price": "Error: API key missing"} for stock in stocks]
 
     result = []
-    for stock_symbol in stocks:
-        url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={stock_symbol}&apikey={STOCK_API_KEY}"
+    urls = [
+        f"{stock_api_url}/query?function=GLOBAL_QUOTE&symbol={stock_symbol}&apikey={stock_api_key}"
+        for stock_symbol in stocks
+    ]
+    # Запросы по всем тикерам идут параллельно через общий пул соединений
+    responses = get_market_client().get_json_many(urls, validate=lambda data: bool(data.get("Global Quote")))
+    for stock_symbol, data in zip(stocks, responses):
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
+            if isinstance(data, Exception):
+                raise data
 
             # Проверяем ответ от Alpha Vantage
             if "Global Quote" in data and data["Global Quote"] and "05. price" in data["Global Quote"]:
@@ -151,20 +378,22 @@ def get_stock_prices(stocks: List[str]) -> List[Dict[str, Any]]:
             else:
                 logger.warning(f"Unexpected response structure from Alpha Vantage for {stock_symbol}: {data}")
                 result.append({"stock": stock_symbol, "price": "Invalid data"})
-        
+
         except requests.exceptions.RequestException as e:
             logger.error(f"Error getting stock price for {stock_symbol} from Alpha Vantage: {e}")
             result.append({"stock": stock_symbol, "price": "Network Error"})
         except Exception as e: # Ловим другие возможные ошибки (например, float conversion)
             logger.error(f"Unexpected error processing stock {stock_symbol}: {e}")
             result.append({"stock": stock_symbol, "price": "Processing Error"})
-            
+
     return result
 
 def save_transactions(df: pd.DataFrame, file_path: str) -> None:
-    """Save transactions to Excel file."""
+    """Save transactions to Excel file (without the internal calendar columns)."""
+    from .windows import drop_calendar_columns
+
     try:
-        df.to_excel(file_path, index=False)
+        drop_calendar_columns(df).to_excel(file_path, index=False)
         logger.info(f"Successfully saved transactions to {file_path}")
     except Exception as e:
         logger.error(f"Error saving transactions: {e}")
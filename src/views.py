@@ -2,26 +2,55 @@
 import json
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Hashable, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 
+from .aggregates import MonthlyAggregates
+from .dataset import PartitionedDataset
+from .memo import memoize, window_key
+from .metrics import instrument
+from .responses import TOP_TRANSACTION_COLUMNS, category_amounts, top_transactions as build_top_transactions
+from .sqlbackend import SqlTransactions
+from .store import TransactionStore
+from .windows import window_bounds
 from .utils import get_greeting, get_currency_rates, get_stock_prices, load_transactions
 
+Transactions = Union[pd.DataFrame, TransactionStore, MonthlyAggregates, PartitionedDataset, SqlTransactions]
 
-def filter_transactions_by_date(df: pd.DataFrame, date_str: str, period: str = "M") -> pd.DataFrame:
+SETTINGS_PATH = "user_settings.json"
+TOP_TRANSACTIONS_LIMIT = 5
+EXPENSE_CATEGORIES_LIMIT = 7
+# Main page includes market data, so its cached responses expire sooner
+MAIN_PAGE_TTL = 60.0
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    'user_currencies': ['USD', 'EUR'],
+    'user_stocks': ['AAPL', 'GOOGL']
+}
+
+
+def load_user_settings(path: str = SETTINGS_PATH) -> Dict[str, Any]:
+    """Read user settings, falling back to defaults when the file is missing."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return dict(DEFAULT_SETTINGS)
+
+
+@instrument
+def filter_transactions_by_date(df: Transactions, date_str: str, period: str = "M") -> pd.DataFrame:
     """Filter transactions by date period."""
     try:
-        date = pd.to_datetime(date_str)
-        if period == "M":
-            start_date = date - pd.DateOffset(months=1)
-        elif period == "Q":
-            start_date = date - pd.DateOffset(months=3)
-        elif period == "Y":
-            start_date = date - pd.DateOffset(years=1)
-        else:
-            raise ValueError(f"Unknown period: {period}")
-        
+        if isinstance(df, MonthlyAggregates):
+            df = df.store
+        if isinstance(df, (TransactionStore, PartitionedDataset, SqlTransactions)):
+            # Хранилище ищет окно по индексу, набор партиций открывает только пересекающиеся файлы
+            return df.window(date_str, period)
+
+        start_date, date = window_bounds(date_str, period)
+
         return df[
             (df["Дата операции"] >= start_date) &
             (df["Дата операции"] <= date)
@@ -31,8 +60,71 @@ def filter_transactions_by_date(df: pd.DataFrame, date_str: str, period: str = "
         raise
 
 
-def main_page(date_time: str, df: pd.DataFrame = None) -> Dict[str, Any]:
-    """Generate JSON response for main page."""
+@instrument
+def summarize_cards(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Total spent and 1% cashback per card in a single pass over the frame."""
+    if 'Номер карты' not in df.columns:
+        return []
+    # Номера карт кодируются в порядке первого появления, строки без карты получают код -1
+    codes, cards = pd.factorize(df['Номер карты'])
+    amounts = df['Сумма операции'].to_numpy(dtype="float64")
+    spending = (amounts < 0) & (codes >= 0)
+
+    # Одна стабильная сортировка расходов по карте вместо отдельной маски на каждую карту.
+    # Внутри карты сохраняется исходный порядок строк, поэтому суммы совпадают с Series.sum()
+    spending_codes = codes[spending]
+    order = np.argsort(spending_codes, kind="stable")
+    values = amounts[spending][order]
+    bounds = np.searchsorted(spending_codes[order], np.arange(len(cards) + 1))
+
+    cards_summary = []
+    for code, card in enumerate(cards):
+        total_spent = abs(values[bounds[code]:bounds[code + 1]].sum())
+        cards_summary.append({
+            "last_digits": str(card),
+            "total_spent": round(total_spent, 2),
+            "cashback": round(total_spent * 0.01, 2)  # 1% cashback
+        })
+    return cards_summary
+
+
+def _main_page_key(
+        date_time: str,
+        df: Optional[Transactions],
+        settings: Optional[Dict[str, Any]],
+        top_n: int
+) -> Optional[Hashable]:
+    """Memo key: only the greeting depends on the time; settings read from disk are not cached."""
+    if settings is None:
+        return None
+    greeting = get_greeting(datetime.strptime(date_time, "%Y-%m-%d %H:%M:%S"))
+    return greeting, json.dumps(settings, sort_keys=True), top_n
+
+
+def _events_page_key(
+        date_time: str,
+        period: str,
+        file_path: str,
+        df: Optional[Transactions],
+        top_categories: int
+) -> Hashable:
+    """Memo key: the rows covered by the period window."""
+    return window_key(df, *window_bounds(date_time, period)), top_categories
+
+
+@memoize(_main_page_key, data="df", ttl=MAIN_PAGE_TTL)
+@instrument(profile=True)
+def main_page(
+        date_time: str,
+        df: Optional[Transactions] = None,
+        settings: Optional[Dict[str, Any]] = None,
+        top_n: int = TOP_TRANSACTIONS_LIMIT
+) -> Dict[str, Any]:
+    """Generate JSON response for main page.
+
+    Long-running callers (see ``src.server``) pass resident ``df`` and ``settings``,
+    so nothing is read from disk per request. Export callers may raise ``top_n``.
+    """
     try:
         current_time = datetime.strptime(date_time, "%Y-%m-%d %H:%M:%S")
         
@@ -49,48 +141,29 @@ def main_page(date_time: str, df: pd.DataFrame = None) -> Dict[str, Any]:
                     "currency_rates": get_currency_rates(['USD', 'EUR']),
                     "stock_prices": get_stock_prices(['AAPL', 'GOOGL'])
                 }
+        if isinstance(df, MonthlyAggregates):
+            df = df.store
+        if isinstance(df, SqlTransactions):
+            # Cards are aggregated in SQL, only the top rows are fetched
+            cards_summary = df.card_spending()
+            top_transactions = build_top_transactions(df.largest(top_n), top_n)
+        else:
+            if isinstance(df, TransactionStore):
+                # Order of cards and ties in the top follow the loaded file, as for a DataFrame
+                columns = ["Номер карты", *TOP_TRANSACTION_COLUMNS]
+                df = df.in_source_order([column for column in columns if column in df.columns])
+            elif isinstance(df, PartitionedDataset):
+                df = df.frame
+
+            # Get cards summary
+            cards_summary = summarize_cards(df)
 
-        # Get cards summary
-        cards_summary = []
-        if 'Номер карты' in df.columns:
-            for card in df['Номер карты'].unique():
-                if pd.isna(card):
-                    continue
-                card_df = df[df['Номер карты'] == card]
-                total_spent = abs(card_df[card_df['Сумма операции'] < 0]['Сумма операции'].sum())
-                cashback = total_spent * 0.01  # 1% cashback
-                cards_summary.append({
-                    "last_digits": str(card),
-                    "total_spent": round(total_spent, 2),
-                    "cashback": round(cashback, 2)
-                })
-
-        # Get top 5 transactions
-        top_transactions = []
-        if all(col in df.columns for col in ['Сумма операции', 'Дата операции', 'Категория', 'Описание']):
-            top_transactions = (
-                df.sort_values('Сумма операции', ascending=False)
-                .head(5)
-                .apply(
-                    lambda x: {
-                        "date": x['Дата операции'].strftime("%d.%m.%Y"),
-                        "amount": round(x['Сумма операции'], 2),
-                        "category": x['Категория'],
-                        "description": x['Описание']
-                    },
-                    axis=1
-                ).tolist()
-            )
+            # Get top transactions (columns are formatted at once, see src.responses)
+            top_transactions = build_top_transactions(df, top_n)
 
         # Load user settings
-        try:
-            with open('user_settings.json', 'r') as f:
-                settings = json.load(f)
-        except FileNotFoundError:
-            settings = {
-                'user_currencies': ['USD', 'EUR'],
-                'user_stocks': ['AAPL', 'GOOGL']
-            }
+        if settings is None:
+            settings = load_user_settings()
 
         response = {
             "greeting": get_greeting(current_time),
@@ -109,39 +182,51 @@ def main_page(date_time: str, df: pd.DataFrame = None) -> Dict[str, Any]:
         }
 
 
-def events_page(date_time: str, period: str = "M", file_path: str = "data/operations.xlsx") -> Dict:
-    """Анализ трат и поступлений за период."""
+@memoize(_events_page_key, data="df")
+@instrument(profile=True)
+def events_page(
+        date_time: str,
+        period: str = "M",
+        file_path: str = "data/operations.xlsx",
+        df: Optional[Transactions] = None,
+        top_categories: int = EXPENSE_CATEGORIES_LIMIT
+) -> Dict:
+    """Анализ трат и поступлений за период.
+
+    Если передан df (DataFrame, TransactionStore или MonthlyAggregates), файл не загружается.
+    ``top_categories`` — сколько категорий расходов попадает в ответ.
+    """
     try:
-        df = load_transactions(file_path)
-        filtered_df = filter_transactions_by_date(df, date_time, period)
+        if df is None:
+            df = load_transactions(file_path)
+
+        if isinstance(df, (MonthlyAggregates, SqlTransactions)):
+            by_category, totals = df.payments_by_category(*window_bounds(date_time, period))
+            expenses_by_category = by_category.loc[by_category["expense_count"] > 0, "expense_sum"]
+            income_by_category = by_category.loc[by_category["income_count"] > 0, "income_sum"]
+            expenses_total, income_total = totals["expense_sum"], totals["income_sum"]
+        else:
+            filtered_df = filter_transactions_by_date(df, date_time, period)
+            expenses = filtered_df[filtered_df["Сумма платежа"] < 0]
+            income = filtered_df[filtered_df["Сумма платежа"] > 0]
+            expenses_by_category = expenses.groupby("Категория", observed=True)["Сумма платежа"].sum()
+            income_by_category = income.groupby("Категория", observed=True)["Сумма платежа"].sum()
+            expenses_total, income_total = expenses["Сумма платежа"].sum(), income["Сумма платежа"].sum()
 
         # Расходы
-        expenses = filtered_df[filtered_df["Сумма платежа"] < 0]
-        expenses_main = (
-            expenses.groupby("Категория")["Сумма платежа"]
-            .sum()
-            .sort_values(ascending=False)
-            .head(7)
-            .to_dict()
-        )
+        expenses_main = expenses_by_category.sort_values(ascending=False).head(top_categories)
 
         # Поступления
-        income = filtered_df[filtered_df["Сумма платежа"] > 0]
-        income_main = (
-            income.groupby("Категория")["Сумма платежа"]
-            .sum()
-            .sort_values(ascending=False)
-            .to_dict()
-        )
+        income_main = income_by_category.sort_values(ascending=False)
 
         return {
             "expenses": {
-                "total_amount": round(expenses["Сумма платежа"].sum()),
-                "main": [{"category": k, "amount": abs(v)} for k, v in expenses_main.items()],
+                "total_amount": round(expenses_total),
+                "main": category_amounts(expenses_main, absolute=True),
             },
             "income": {
-                "total_amount": round(income["Сумма платежа"].sum()),
-                "main": [{"category": k, "amount": v} for k, v in income_main.items()],
+                "total_amount": round(income_total),
+                "main": category_amounts(income_main),
             },
         }
     except Exception as e:
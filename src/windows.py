@@ -0,0 +1,126 @@
+"""Календарные ключи и окна дат, общие для представлений, отчетов и сервисов.
+
+При загрузке (``utils.normalize_transactions``) к транзакциям добавляются
+целочисленные колонки:
+
+* ``month_key`` — номер месяца ``year * 12 + month - 1`` (выбор месяца — сравнение с числом);
+* ``day_ordinal`` — номер дня от 1970-01-01 (день недели — ``(day_ordinal + 3) % 7``).
+
+Границы окон M/Q/Y и месяцев вычисляются один раз и кэшируются, поэтому
+повторные запросы с той же датой не разбирают строку и не строят DateOffset.
+"""
+import functools
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+DATE_COLUMN = "Дата операции"
+MONTH_KEY_COLUMN = "month_key"
+DAY_ORDINAL_COLUMN = "day_ordinal"
+CALENDAR_COLUMNS = [MONTH_KEY_COLUMN, DAY_ORDINAL_COLUMN]
+
+# Значение ключей для строк без даты: не попадает ни в один месяц и ни в одно окно
+MISSING_KEY = np.iinfo(np.int32).min
+# 1970-01-01 — четверг (weekday 3)
+EPOCH_WEEKDAY = 3
+
+PERIOD_OFFSETS = {
+    "M": pd.DateOffset(months=1),
+    "Q": pd.DateOffset(months=3),
+    "Y": pd.DateOffset(years=1),
+}
+
+DateLike = Union[str, pd.Timestamp, None]
+
+
+def period_start(date: pd.Timestamp, period: str) -> pd.Timestamp:
+    """Начало окна M/Q/Y, заканчивающегося датой date."""
+    if period not in PERIOD_OFFSETS:
+        raise ValueError(f"Unknown period: {period}")
+    return date - PERIOD_OFFSETS[period]
+
+
+@functools.lru_cache(maxsize=1024)
+def window_bounds(date: Union[str, pd.Timestamp], period: str = "M") -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """Границы окна [начало, date] периода M/Q/Y (результат кэшируется по дате и периоду)."""
+    end = pd.to_datetime(date)
+    return period_start(end, period), end
+
+
+def month_key(date: pd.Timestamp) -> int:
+    """Номер месяца от начала эпохи: year * 12 + month - 1."""
+    return date.year * 12 + date.month - 1
+
+
+def month_start(key: int) -> pd.Timestamp:
+    """Начало месяца по его номеру."""
+    return pd.Timestamp(year=key // 12, month=key % 12 + 1, day=1)
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_month(month: str) -> int:
+    """Ключ месяца по строке "YYYY-MM"."""
+    period = pd.Period(month, freq="M")
+    return period.year * 12 + period.month - 1
+
+
+def operation_dates(transactions: pd.DataFrame, date_format: Optional[str] = "%Y-%m-%d") -> pd.Series:
+    """Колонка дат операций как datetime без изменения исходного DataFrame.
+
+    Отчеты рассчитывают на уже типизированный вход (см. utils.normalize_transactions):
+    тогда колонка возвращается как есть, без копирования.
+    """
+    dates = transactions[DATE_COLUMN]
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    return pd.to_datetime(dates, format=date_format)
+
+
+def _calendar_arrays(dates: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    from .dtypes import parse_dates
+
+    values = parse_dates(dates).to_numpy(dtype="datetime64[ns]")
+    missing = np.isnat(values)
+    months = values.astype("datetime64[M]").astype("int64")
+    days = values.astype("datetime64[D]").astype("int64")
+    # datetime64[M] считает месяцы от 1970-01, ключ — от нулевого года
+    month_keys = np.where(missing, MISSING_KEY, months + 1970 * 12).astype("int32")
+    day_ordinals = np.where(missing, MISSING_KEY, days).astype("int32")
+    return month_keys, day_ordinals
+
+
+def add_calendar_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Добавляет колонки month_key и day_ordinal (на месте) и возвращает тот же DataFrame."""
+    if DATE_COLUMN in df.columns:
+        df[MONTH_KEY_COLUMN], df[DAY_ORDINAL_COLUMN] = _calendar_arrays(df[DATE_COLUMN])
+    return df
+
+
+def drop_calendar_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Кадр без служебных колонок month_key и day_ordinal — для записи и выдачи пользователю."""
+    return df.drop(columns=CALENDAR_COLUMNS, errors="ignore")
+
+
+def has_calendar_columns(df: pd.DataFrame) -> bool:
+    """Есть ли в кадре целочисленные month_key и day_ordinal (после concat с кадром без них — нет)."""
+    return all(
+        column in df.columns and pd.api.types.is_integer_dtype(df[column]) for column in CALENDAR_COLUMNS
+    )
+
+
+def calendar_columns(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Ключи месяцев и номера дней: из колонок загрузки или, если их нет, вычисленные по датам."""
+    if has_calendar_columns(df):
+        return df[MONTH_KEY_COLUMN].to_numpy(), df[DAY_ORDINAL_COLUMN].to_numpy()
+    return _calendar_arrays(df[DATE_COLUMN])
+
+
+def month_mask(df: pd.DataFrame, year: int, month: int) -> np.ndarray:
+    """Строки календарного месяца — сравнение целочисленного ключа."""
+    return calendar_columns(df)[0] == year * 12 + month - 1
+
+
+def weekdays(day_ordinals: np.ndarray) -> np.ndarray:
+    """Дни недели (0 — понедельник) по номерам дней."""
+    return (day_ordinals + EPOCH_WEEKDAY) % 7
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregates import MonthlyAggregates
+from src.reports import spending_by_category, spending_by_weekday
+from src.views import events_page
+
+
+def make_transactions(rows, start="2022-01-01", seed=0):
+    rng = np.random.default_rng(seed)
+    amounts = np.round(rng.normal(-300, 800, rows), 2)
+    return pd.DataFrame({
+        "Дата операции": pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, rows), "min"),
+        "Сумма операции": amounts,
+        "Сумма платежа": amounts,
+        "Категория": rng.choice(["Еда", "Транспорт", "Аптеки", "Пополнения"], rows),
+        "Номер карты": rng.choice(["*1111", "*2222", None], rows),
+        "Описание": "Покупка",
+    })
+
+
+def assert_events_equal(left, right):
+    for section in ("expenses", "income"):
+        assert left[section]["total_amount"] == right[section]["total_amount"]
+        assert [item["category"] for item in left[section]["main"]] == \
+            [item["category"] for item in right[section]["main"]]
+        assert [item["amount"] for item in left[section]["main"]] == \
+            pytest.approx([item["amount"] for item in right[section]["main"]])
+
+
+@pytest.mark.parametrize("date", ["2022-05-17 13:45:00", "2022-04-01 00:00:00", "2022-12-31 23:59:59"])
+def test_aggregates_match_raw_rows(date):
+    """Ответы по кубу совпадают с расчетом по исходным строкам."""
+    df = make_transactions(3000)
+    aggregates = MonthlyAggregates.from_frame(df)
+
+    assert spending_by_category(aggregates, "Еда", date)["total"] == \
+        pytest.approx(spending_by_category(df.copy(), "Еда", date)["total"])
+    assert spending_by_weekday(aggregates, date) == pytest.approx(spending_by_weekday(df.copy(), date))
+    for period in ("M", "Q", "Y"):
+        assert_events_equal(events_page(date, period, df=aggregates), events_page(date, period, df=df.copy()))
+
+
+def test_aggregates_append_incrementally():
+    """Дописанные транзакции попадают в куб без полного пересчета."""
+    old, new = make_transactions(1000, seed=1), make_transactions(200, start="2023-01-01", seed=2)
+    aggregates = MonthlyAggregates.from_frame(old)
+    aggregates.append(new)
+
+    combined = pd.concat([old, new], ignore_index=True)
+    assert len(aggregates.store) == len(combined)
+    assert spending_by_weekday(aggregates) == pytest.approx(spending_by_weekday(combined.copy()))
+    assert spending_by_category(aggregates, "Аптеки", "2023-02-15")["total"] == \
+        pytest.approx(spending_by_category(combined.copy(), "Аптеки", "2023-02-15")["total"])
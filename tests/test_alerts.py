@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+
+from data.generate_data import generate_transactions
+from src.alerts import AlertEngine, AlertRules, replay
+
+SETTINGS = {
+    "alerts": {
+        "category_budgets": {"Супермаркеты": 1000},
+        "budget_days": 30,
+        "anomaly_sigma": 4,
+        "anomaly_min_history": 5,
+        "anomaly_by": ["card", "category"],
+    }
+}
+
+
+def test_rules_from_settings():
+    """Правила читаются из секции alerts, без нее действуют значения по умолчанию."""
+    rules = AlertRules.from_settings(SETTINGS)
+    assert rules.category_budgets == {"Супермаркеты": 1000.0}
+    assert rules.anomaly_by == ("card", "category")
+    assert AlertRules.from_settings({"user_currencies": ["USD"]}) == AlertRules()
+    with pytest.raises(ValueError):
+        AlertRules.from_settings({"alerts": {"anomaly_by": ["merchant"]}})
+
+
+def test_budget_window():
+    """Оповещение о бюджете срабатывает при переходе порога и снова — после выхода старых трат из окна."""
+    engine = AlertEngine.from_settings(SETTINGS)
+    assert engine.process("2023-01-01", -600, "Супермаркеты") == []
+    alerts = engine.process("2023-01-10", -500, "Супермаркеты")
+    assert [(alert.kind, alert.key, alert.value) for alert in alerts] == [("budget", "Супермаркеты", 1100)]
+    # Выше бюджета — без повторных оповещений
+    assert engine.process("2023-01-20", -100, "Супермаркеты") == []
+    # 2023-01-01 вышло из окна: 500 + 100 + 450 снова больше бюджета
+    alerts = engine.process("2023-02-05", -450, "Супермаркеты")
+    assert [alert.kind for alert in alerts] == ["budget"]
+    assert engine.category_total("Супермаркеты") == 1050
+    # Доходы и категории без бюджета не учитываются в оповещениях
+    assert engine.process("2023-02-05", 5000, "Супермаркеты") == []
+    assert engine.process("2023-02-05", -5000, "Аптеки") == []
+
+
+def test_welford_matches_numpy():
+    """Среднее и отклонение трат по карте совпадают с расчетом по всей истории."""
+    df = generate_transactions(2000, cards=3, seed=21)
+    engine = AlertEngine()
+    engine.process_batch(df)
+    for card, amounts in df[df["Сумма операции"] < 0].groupby("Номер карты")["Сумма операции"]:
+        count, mean, std = engine.spending_stats("card", card)
+        assert count == len(amounts)
+        assert mean == pytest.approx(-amounts.mean())
+        assert std == pytest.approx(amounts.std(ddof=1))
+
+
+def test_anomaly_after_history():
+    """Аномалия определяется только после минимальной истории трат."""
+    engine = AlertEngine.from_settings(SETTINGS)
+    for day, amount in enumerate([100, 110, 90, 105, 95], start=1):
+        assert engine.process(pd.Timestamp(2023, 3, day), -amount, card="*1111") == []
+    alerts = engine.process("2023-03-10", -1000, card="*1111")
+    assert [(alert.kind, alert.group, alert.key) for alert in alerts] == [("anomaly", "card", "*1111")]
+    assert alerts[0].value > 4
+    assert engine.process("2023-03-11", -120, card="*1111") == []
+
+
+def test_stream_matches_replay():
+    """Поштучная обработка дает те же оповещения, что и replay выгрузки пачками."""
+    df = generate_transactions(3000, cards=2, seed=22)
+    expected = replay(df, SETTINGS, batch_size=500)
+    assert expected
+
+    engine = AlertEngine.from_settings(SETTINGS)
+    streamed = []
+    ordered = df.sort_values("Дата операции", kind="stable")
+    columns = ["Дата операции", "Сумма операции", "Категория", "Номер карты"]
+    for date, amount, category, card in zip(*(ordered[column] for column in columns)):
+        streamed.extend(engine.process(date, amount, category, card))
+    assert streamed == expected
+    assert engine.processed == len(df)
+
+
+def test_replay_small_export():
+    """replay сортирует выгрузку по дате и дает ожидаемые оповещения (время — в benchmarks.run_benchmarks)."""
+    amounts = [-100, -110, -90, -105, -95, -2000, 300]
+    df = pd.DataFrame({
+        "Дата операции": pd.to_datetime(["2023-03-07", "2023-03-01", "2023-03-02", "2023-03-03",
+                                         "2023-03-04", "2023-03-05", "2023-03-06"]),
+        "Сумма операции": amounts[-1:] + amounts[:-1],
+        "Категория": ["Переводы", "Аптеки", "Аптеки", "Аптеки", "Аптеки", "Аптеки", "Супермаркеты"],
+        "Номер карты": ["*1111"] * 7,
+    })
+    alerts = replay(df, SETTINGS, batch_size=3)
+    assert [(alert.kind, alert.group, alert.key, alert.date) for alert in alerts] == [
+        ("budget", "category", "Супермаркеты", pd.Timestamp("2023-03-06")),
+        ("anomaly", "card", "*1111", pd.Timestamp("2023-03-06")),
+    ]
+    assert [alert.amount for alert in alerts] == [2000, 2000]
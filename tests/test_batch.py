@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from data.generate_data import generate_transactions, write_dataset
+from src.batch import run_batch
+from src.reports import spending_by_category, spending_by_weekday
+from src.views import events_page
+
+
+@pytest.fixture
+def exports(tmp_path):
+    paths = []
+    for seed in range(3):
+        path = str(tmp_path / f"client_{seed}.csv")
+        write_dataset(generate_transactions(500, seed=seed, start="2023-01-01", end="2023-06-30"), path)
+        paths.append(path)
+    return paths
+
+
+def test_batch_matches_single_calls_in_job_order(exports):
+    """Результаты совпадают с одиночными вызовами и идут в порядке заданий."""
+    date = "2023-06-30 23:59:59"
+    jobs = []
+    for path in reversed(exports):
+        jobs.append((path, {"report": "spending_by_weekday", "date": date}))
+    for path in exports:
+        jobs.append((path, {"report": "spending_by_category", "category": "Супермаркеты", "date": date}))
+        jobs.append((path, {"report": "events_page", "date_time": date, "period": "Y"}))
+
+    progress = []
+    results = run_batch(jobs, max_workers=2, max_pending=1, progress=lambda done, total: progress.append(done))
+
+    assert progress == [1, 2, 3]
+    for (path, spec), result in zip(jobs, results):
+        df = pd.read_csv(path, parse_dates=["Дата операции"])
+        if spec["report"] == "spending_by_weekday":
+            assert result == pytest.approx(spending_by_weekday(df, date))
+        elif spec["report"] == "spending_by_category":
+            assert result["total"] == pytest.approx(spending_by_category(df, "Супермаркеты", date)["total"])
+        else:
+            assert result["expenses"]["total_amount"] == events_page(date, "Y", df=df)["expenses"]["total_amount"]
+
+
+def test_batch_rejects_unknown_report(exports):
+    """Неизвестный отчет отклоняется до запуска пула."""
+    with pytest.raises(ValueError):
+        run_batch([(exports[0], {"report": "unknown"})])
+
+
+def test_batch_reports_errors_per_job(exports):
+    """Ошибка в одном отчете не мешает остальным отчетам файла."""
+    results = run_batch([
+        (exports[0], {"report": "spending_by_category"}),
+        (exports[0], {"report": "spending_by_weekday", "date": "2023-06-30"}),
+    ], max_workers=1)
+    assert "error" in results[0]
+    assert results[1]
+
+
+def test_batch_failed_file_results_are_independent(exports):
+    """Если обработка файла упала, каждый отчет файла получает свой словарь с ошибкой."""
+    with patch("src.batch.ProcessPoolExecutor", ThreadPoolExecutor), \
+            patch("src.batch.run_file_reports", side_effect=MemoryError("worker died")):
+        results = run_batch([
+            (exports[0], {"report": "spending_by_weekday", "date": "2023-06-30"}),
+            (exports[0], {"report": "spending_by_weekday", "date": "2023-05-31"}),
+        ], max_workers=1, max_tasks_per_child=None)
+    assert results == [{"error": "worker died"}, {"error": "worker died"}]
+    results[0]["error"] = "changed"
+    assert results[1] == {"error": "worker died"}
+
+
+def test_batch_missing_file(exports, tmp_path):
+    """Отчеты по отсутствующему файлу получают ошибку, а не пустые результаты."""
+    missing = str(tmp_path / "missing.xlsx")
+    results = run_batch([
+        (missing, {"report": "spending_by_category", "category": "Супермаркеты", "date": "2023-06-30"}),
+        (exports[0], {"report": "spending_by_weekday", "date": "2023-06-30"}),
+        (missing, {"report": "events_page", "date_time": "2023-06-30 12:00:00"}),
+    ], max_workers=1)
+    assert [set(result) for result in (results[0], results[2])] == [{"error"}, {"error"}]
+    assert "missing.xlsx" in results[0]["error"]
+    assert results[0] is not results[2]
+    assert "error" not in results[1]
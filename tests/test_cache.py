@@ -0,0 +1,71 @@
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.cache import main as cache_main
+from src.cache import purge_cache, read_cache
+from src.utils import load_transactions
+
+
+@pytest.fixture
+def excel_file(tmp_path):
+    file_path = str(tmp_path / "operations.xlsx")
+    pd.DataFrame({
+        "Дата операции": ["2023-01-01", "2023-01-15"],
+        "Сумма операции": [-100.5, 200.0],
+        "Категория": ["Еда", "Зарплата"],
+        "Описание": ["Кафе", "Аванс"],
+        "Номер карты": ["*1234", None],
+    }).to_excel(file_path, index=False)
+    return file_path
+
+
+def test_load_transactions_uses_cache(excel_file):
+    """Повторная загрузка берется из кэша без разбора Excel."""
+    first = load_transactions(excel_file)
+    assert read_cache(excel_file) is not None
+
+    with patch("pandas.read_excel") as mock_read:
+        second = load_transactions(excel_file)
+        mock_read.assert_not_called()
+
+    pd.testing.assert_frame_equal(first, second)
+    assert pd.api.types.is_datetime64_any_dtype(second["Дата операции"])
+
+
+def test_cache_invalidated_on_change(excel_file):
+    """Кэш сбрасывается при изменении исходного файла и переживает touch."""
+    load_transactions(excel_file)
+
+    stat = os.stat(excel_file)
+    os.utime(excel_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert read_cache(excel_file) is not None  # содержимое то же
+
+    pd.DataFrame({
+        "Дата операции": ["2023-03-01"],
+        "Сумма операции": [-1.0],
+        "Категория": ["Такси"],
+        "Описание": ["Поездка"],
+    }).to_excel(excel_file, index=False)
+    assert read_cache(excel_file) is None
+    assert len(load_transactions(excel_file)) == 1
+
+
+def test_cache_cli_warm_and_purge(excel_file, capsys):
+    """CLI прогревает и очищает кэш."""
+    assert cache_main(["warm", excel_file]) == 0
+    assert read_cache(excel_file) is not None
+
+    assert cache_main(["purge", excel_file]) == 0
+    assert read_cache(excel_file) is None
+    assert not purge_cache(excel_file)
+
+
+def test_cache_without_pyarrow(excel_file):
+    """Без pyarrow кэш сохраняется в pickle."""
+    with patch("src.cache.feather", None):
+        load_transactions(excel_file)
+        assert os.path.exists(excel_file + ".cache.pkl")
+        assert read_cache(excel_file) is not None
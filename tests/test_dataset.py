@@ -0,0 +1,79 @@
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from data.generate_data import generate_transactions, write_dataset
+from src.dataset import PartitionedDataset
+from src.reports import spending_by_category, spending_by_weekday
+from src.store import TransactionStore
+from src.views import events_page
+
+
+@pytest.fixture
+def partitioned(tmp_path):
+    """Выгрузки по месяцам для двух счетов: csv и parquet."""
+    frames = []
+    for account, extension in (("account_1", "csv"), ("account_2", "parquet")):
+        df = generate_transactions(600, cards=2, start="2023-01-01", end="2023-03-31 23:59:59",
+                                   seed=len(frames))
+        for month, part in df.groupby(df["Дата операции"].dt.month):
+            write_dataset(part, str(tmp_path / account / f"2023-{month:02d}.{extension}"))
+        frames.append(df)
+    return str(tmp_path), pd.concat(frames, ignore_index=True)
+
+
+def test_manifest_and_pruning(partitioned):
+    """Манифест описывает партиции, окно открывает только пересекающиеся файлы."""
+    directory, _ = partitioned
+    dataset = PartitionedDataset(directory, max_workers=4)
+    assert len(dataset.partitions) == 6
+    assert os.path.exists(os.path.join(directory, "manifest.json"))
+
+    assert dataset.prune("2023-02-10", "2023-02-20") == ["account_1/2023-02.csv", "account_2/2023-02.parquet"]
+    assert dataset.prune("2023-04-01", "2023-05-01") == []
+    assert dataset.prune(category="Несуществующая") == []
+
+
+def test_slices_match_store(partitioned):
+    """Выборки и отчеты совпадают с расчетом по объединенным данным."""
+    directory, df = partitioned
+    dataset = PartitionedDataset(directory)
+    store = TransactionStore(df)
+
+    window = dataset.slice("2023-02-01", "2023-03-15", category="Супермаркеты")
+    expected = store.slice("2023-02-01", "2023-03-15", category="Супермаркеты")
+    assert sorted(window["Сумма операции"].round(2)) == sorted(expected["Сумма операции"].round(2))
+
+    date = "2023-03-31 23:59:59"
+    assert spending_by_category(dataset, "Супермаркеты", date)["total"] == \
+        pytest.approx(spending_by_category(store, "Супермаркеты", date)["total"])
+    assert spending_by_weekday(dataset, date) == pytest.approx(spending_by_weekday(store, date))
+    assert events_page(date, "M", df=dataset)["expenses"]["total_amount"] == \
+        events_page(date, "M", df=store)["expenses"]["total_amount"]
+
+
+def test_manifest_reused_and_refreshed(partitioned):
+    """Повторное открытие не читает партиции; измененный файл перечитывается."""
+    directory, _ = partitioned
+    PartitionedDataset(directory)
+    with patch.object(PartitionedDataset, "load_partition", wraps=None) as load:
+        PartitionedDataset(directory)
+    load.assert_not_called()
+
+    path = os.path.join(directory, "account_1", "2023-01.csv")
+    pd.read_csv(path).iloc[:10].to_csv(path, index=False)
+    dataset = PartitionedDataset(directory)
+    assert dataset.partitions["account_1/2023-01.csv"]["rows"] == 10
+
+
+def test_empty_window(partitioned):
+    """Окно без партиций дает нулевые итоги, как и DataFrame без строк в окне."""
+    directory, df = partitioned
+    dataset = PartitionedDataset(directory)
+    with patch("src.views.get_currency_rates", return_value=[]), patch("src.views.get_stock_prices", return_value=[]):
+        expected = events_page("2024-06-30 12:00:00", "M", df=df)
+        result = events_page("2024-06-30 12:00:00", "M", df=dataset)
+    assert "error" not in result
+    assert result == expected
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from src.dtypes import compact_transactions, memory_report, parse_dates, print_memory_report, to_minor_units
+from src.services import investment_bank_df
+
+
+@pytest.fixture
+def raw_frame():
+    return pd.DataFrame({
+        "Дата операции": ["31.12.2021 16:44:00", "2021-12-30 10:00:00", "30.12.2021", None],
+        "Дата платежа": ["31.12.2021", "30.12.2021", "30.12.2021", None],
+        "Номер карты": ["*7197", "*7197", None, "*5091"],
+        "Сумма операции": [-160.89, -0.1, 64.0, None],
+        "Категория": ["Супермаркеты", "Супермаркеты", "Пополнения", "Супермаркеты"],
+        "Описание": ["Колхоз", "Колхоз", "Пополнение", "Магнит"],
+    })
+
+
+def test_parse_dates_accepts_bank_and_iso_formats(raw_frame):
+    """Разбираются и ISO 8601, и формат выгрузки банка."""
+    parsed = parse_dates(raw_frame["Дата операции"])
+    assert list(parsed[:3]) == [
+        pd.Timestamp("2021-12-31 16:44:00"), pd.Timestamp("2021-12-30 10:00:00"), pd.Timestamp("2021-12-30")
+    ]
+    assert pd.isna(parsed[3])
+
+
+def test_compact_transactions(raw_frame):
+    """Текстовые колонки становятся category, даты — datetime64, описания не меняются."""
+    df = compact_transactions(raw_frame.copy())
+    assert df["Категория"].dtype == "category"
+    assert df["Номер карты"].dtype == "category"
+    assert df["Описание"].dtype == object
+    assert pd.api.types.is_datetime64_any_dtype(df["Дата платежа"])
+    assert df["Сумма операции"].dtype == "float64"
+    assert list(df["Категория"].astype(str)) == list(raw_frame["Категория"])
+
+
+def test_minor_units_are_exact():
+    """Копейки — точные целые, пропуски сохраняются."""
+    assert to_minor_units(pd.Series([-160.89, 0.1, 0.7])).tolist() == [-16089, 10, 70]
+    assert to_minor_units(pd.Series([1, -2])).tolist() == [100, -200]
+    with_missing = to_minor_units(pd.Series([1.5, None]))
+    assert with_missing.dtype == "Int64" and with_missing.isna().tolist() == [False, True]
+
+
+def test_investment_bank_in_minor_units(raw_frame):
+    """Инвесткопилка одинакова для рублей и копеек и не накапливает ошибку float."""
+    df = compact_transactions(raw_frame.copy())
+    kopecks = compact_transactions(raw_frame.copy(), minor_units=True)
+    assert kopecks.attrs["minor_units"]
+    assert investment_bank_df("2021-12", df, 50) == investment_bank_df("2021-12", kopecks, 50) == 46.99
+
+    many = pd.DataFrame({"Дата операции": pd.Timestamp("2023-01-01"), "Сумма операции": [0.1] * 1000})
+    assert investment_bank_df("2023-01", many, 1) == 900.0
+
+
+def test_memory_report(raw_frame, capsys):
+    """Отчет о памяти показывает размер до и после нормализации."""
+    report = memory_report(raw_frame)
+    assert report.loc["Категория", "dtype_after"] == "category"
+    assert report.loc["total", "bytes_after"] < report.loc["total", "bytes_before"]
+
+    print_memory_report(raw_frame)
+    assert "MiB" in capsys.readouterr().out
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.generate_data import generate_rates, generate_transactions, write_dataset
+from src import utils
+from src.fx import conversion_rates, convert_transactions, load_rate_table, original_column, update_rate_table
+from src.reports import spending_by_category
+
+
+@pytest.fixture
+def rates_path(tmp_path):
+    path = str(tmp_path / "rates.csv")
+    write_dataset(generate_rates("2021-01-01", "2023-12-31", seed=3), path)
+    return path
+
+
+def expected_rate(rates, date, currency):
+    """Курс на последнюю дату не позже date — построчный расчет для сравнения."""
+    if currency == "RUB":
+        return 1.0
+    known = rates[(rates["currency"] == currency) & (rates["date"] <= date)]
+    return known["rate"].iloc[-1] if len(known) else np.nan
+
+
+def test_conversion_rates_as_of(rates_path):
+    """Курс берется на последнюю дату не позже даты операции, для рубля — 1."""
+    rates = load_rate_table(rates_path)
+    df = generate_transactions(500, start="2020-12-25", end="2023-12-31", seed=4)
+    factors = conversion_rates(df["Дата операции"], df["Валюта операции"], rates)
+    pairs = zip(df["Дата операции"], df["Валюта операции"])
+    expected = [expected_rate(rates, date, currency) for date, currency in pairs]
+    np.testing.assert_allclose(factors, expected)
+    # До первой даты таблицы курса нет
+    assert np.isnan(factors[(df["Дата операции"] < "2021-01-01").to_numpy() & (df["Валюта операции"] != "RUB")]).all()
+
+
+def test_load_rate_table_cached(rates_path):
+    """Таблица курсов читается из файла один раз, пока файл не изменился."""
+    assert load_rate_table(rates_path) is load_rate_table(rates_path)
+    with open(rates_path, "a", encoding="utf-8") as file:
+        file.write("2024-01-01,USD,90.0\n")
+    table = load_rate_table(rates_path)
+    assert table["date"].max() == pd.Timestamp("2024-01-01")
+
+
+def test_convert_transactions_keeps_original(rates_path):
+    """Суммы пересчитываются в базовую валюту, исходные сохраняются, входной кадр не меняется."""
+    df = generate_transactions(200, seed=5)
+    before = df.copy()
+    converted = convert_transactions(df, load_rate_table(rates_path))
+    pd.testing.assert_frame_equal(df, before)
+    pd.testing.assert_series_equal(converted[original_column("Сумма операции")], df["Сумма операции"],
+                                   check_names=False)
+    rub = (df["Валюта операции"] == "RUB").to_numpy()
+    assert (converted["Сумма операции"][rub] == df["Сумма операции"][rub]).all()
+    assert (converted["Сумма операции"][~rub].abs() > df["Сумма операции"][~rub].abs()).all()
+    assert converted.attrs["base_currency"] == "RUB"
+    # Повторный пересчет дает тот же результат
+    pd.testing.assert_frame_equal(convert_transactions(converted, load_rate_table(rates_path)), converted)
+
+
+def test_convert_rejects_other_base(rates_path):
+    """Таблица в рублях не пересчитывает в другую базовую валюту."""
+    with pytest.raises(ValueError):
+        convert_transactions(generate_transactions(10, seed=6), load_rate_table(rates_path), base="USD")
+
+
+def test_load_transactions_converts(tmp_path, rates_path, monkeypatch):
+    """load_transactions с базовой валютой отдает пересчитанные суммы, и отчеты считают по ним."""
+    df = generate_transactions(300, start="2023-01-01", end="2023-06-30", seed=7)
+    source = str(tmp_path / "operations.csv")
+    write_dataset(df, source)
+    monkeypatch.setattr(utils, "FINANCE_RATES_PATH", rates_path)
+
+    plain = utils.load_transactions(source)
+    converted = utils.load_transactions(source, base_currency="RUB")
+    assert original_column("Сумма операции") in converted.columns
+    assert not converted["Сумма операции"].equals(plain["Сумма операции"])
+
+    category = df["Категория"].iloc[0]
+    expected = convert_transactions(plain, load_rate_table(rates_path))
+    assert spending_by_category(converted, category, "2023-06-30")["total"] == \
+        spending_by_category(expected, category, "2023-06-30")["total"]
+
+
+def test_convert_amounts(rates_path):
+    """Каждая сумма умножается на курс своей даты и валюты (время — в benchmarks.run_benchmarks)."""
+    df = generate_transactions(300, start="2021-02-01", end="2023-12-31", seed=8)
+    rates = load_rate_table(rates_path)
+    converted = convert_transactions(df, rates)
+    for column, currency_column in (("Сумма операции", "Валюта операции"), ("Сумма платежа", "Валюта платежа")):
+        pairs = zip(df["Дата операции"], df[currency_column])
+        expected = df[column] * [expected_rate(rates, date, currency) for date, currency in pairs]
+        assert converted[column].notna().all()
+        np.testing.assert_allclose(converted[column], expected.round(2))
+
+
+class HistoryClient:
+    """Клиент ExchangeRate-API с фиксированным ответом history (курсы от рубля)."""
+
+    def __init__(self):
+        self.urls = []
+
+    def get_json_many(self, urls, validate=None):
+        self.urls.extend(urls)
+        return [{"result": "success", "conversion_rates": {"USD": 0.0125, "EUR": 0.01}} for _ in urls]
+
+
+def test_update_rate_table_fetches_missing_days(tmp_path, monkeypatch):
+    """Дозагружаются только дни, которых нет в файле; курсы переводятся в рубли за единицу валюты."""
+    client = HistoryClient()
+    monkeypatch.setattr(utils, "_market_client", client)
+    monkeypatch.setattr(utils, "CURRENCY_API_KEY", "test")
+    path = str(tmp_path / "rates.csv")
+
+    table = update_rate_table("2024-01-01", "2024-01-03", ["USD", "EUR"], path)
+    assert len(client.urls) == 3
+    assert client.urls[0].endswith("/history/RUB/2024/1/1")
+    assert table.loc[table["currency"] == "USD", "rate"].tolist() == [80.0] * 3
+
+    update_rate_table("2024-01-02", "2024-01-04", ["USD", "EUR"], path)
+    assert len(client.urls) == 4
+    assert len(load_rate_table(path)) == 8
@@ -0,0 +1,25 @@
+import pandas as pd
+
+from data.generate_data import generate_transactions, write_dataset
+from src.scanners import PHONE_PATTERN
+from src.utils import load_transactions
+
+
+def test_generate_transactions_parameters():
+    """Генератор учитывает размер, число карт, категорий и период."""
+    df = generate_transactions(2000, cards=3, categories=4, start="2022-01-01", end="2022-06-30", seed=1)
+    assert len(df) == 2000
+    assert df["Номер карты"].nunique() == 3
+    assert df["Категория"].nunique() == 4
+    assert df["Дата операции"].between("2022-01-01", "2022-06-30").all()
+    assert df["Описание"].str.contains(PHONE_PATTERN).any()
+
+
+def test_write_dataset_roundtrip(tmp_path):
+    """Сгенерированный файл читается load_transactions."""
+    df = generate_transactions(50, seed=2)
+    file_path = str(tmp_path / "operations.xlsx")
+    write_dataset(df, file_path)
+    loaded = load_transactions(file_path, use_cache=False)
+    assert len(loaded) == 50
+    pd.testing.assert_series_equal(loaded["Сумма операции"], df["Сумма операции"])
@@ -0,0 +1,98 @@
+import os
+
+import pandas as pd
+import pytest
+
+from data.generate_data import generate_rates, generate_transactions, write_dataset
+from src import utils
+from src.dataset import PartitionedDataset
+from src.ingest import HashIndex, append_transactions, transaction_keys
+from src.main import main
+from src.utils import normalize_transactions
+
+
+@pytest.fixture
+def history():
+    df = generate_transactions(1200, cards=2, start="2023-01-01", end="2023-03-31 23:59:59", seed=5)
+    return normalize_transactions(df, warn_missing=False).sort_values("Дата операции", ignore_index=True)
+
+
+def test_transaction_keys(history):
+    """Ключи не зависят от типов колонок, одинаковые строки различаются номером повтора."""
+    keys = transaction_keys(history)
+    assert keys.dtype == "uint64" and len(set(keys)) == len(keys)
+    plain = history.astype({"Номер карты": object, "Описание": object})
+    plain["Дата операции"] = plain["Дата операции"].dt.strftime("%d.%m.%Y %H:%M:%S")
+    assert (transaction_keys(plain) == keys).all()
+
+    twice = pd.concat([history.head(1), history.head(1)], ignore_index=True)
+    first, second = transaction_keys(twice)
+    assert first != second and first == keys[0]
+
+
+def test_overlapping_exports(tmp_path, history):
+    """Пересекающиеся выгрузки добавляют только новые строки, повтор ничего не пишет."""
+    directory = str(tmp_path / "partitions")
+    january_february = str(tmp_path / "jan_feb.csv")
+    february_march = str(tmp_path / "feb_mar.csv")
+    write_dataset(history[history["Дата операции"] < "2023-03-01"], january_february)
+    write_dataset(history[history["Дата операции"] >= "2023-02-01"], february_march)
+
+    first = append_transactions(january_february, directory)
+    second = append_transactions(february_march, directory)
+    assert second.duplicates == (history["Дата операции"].dt.month == 2).sum()
+    assert first.added + second.added == len(history)
+
+    again = append_transactions(february_march, directory)
+    assert again.partition is None and again.added == 0
+    assert sorted(os.listdir(directory)).count(second.partition) == 1
+
+    dataset = PartitionedDataset(directory)
+    assert len(dataset) == len(history)
+    assert dataset.frame["Сумма операции"].sum() == pytest.approx(history["Сумма операции"].sum())
+
+
+def test_keys_ignore_currency_conversion(tmp_path, history, monkeypatch):
+    """С пересчетом в базовую валюту ключи и партиции строятся по исходным суммам."""
+    rates_path = str(tmp_path / "rates.csv")
+    write_dataset(generate_rates("2022-12-01", "2023-03-31", seed=1), rates_path)
+    monkeypatch.setattr(utils, "FINANCE_BASE_CURRENCY", "RUB")
+    monkeypatch.setattr(utils, "FINANCE_RATES_PATH", rates_path)
+    export = str(tmp_path / "export.csv")
+    write_dataset(history, export)
+    directory = str(tmp_path / "partitions")
+
+    first = append_transactions(export, directory)
+    assert first.added == len(history)
+    write_dataset(generate_rates("2022-12-01", "2023-03-31", seed=2), rates_path)
+    again = append_transactions(export, directory)
+    assert (again.added, again.duplicates) == (0, len(history))
+
+    path = os.path.join(directory, first.partition)
+    stored = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    assert "Сумма операции в валюте" not in stored.columns
+    assert stored["Сумма операции"].sum() == pytest.approx(history["Сумма операции"].sum())
+
+
+def test_index_persists_and_syncs(tmp_path, history):
+    """Индекс читается с диска; партиции, положенные в каталог вручную, индексируются."""
+    directory = str(tmp_path / "partitions")
+    write_dataset(history.head(100), os.path.join(directory, "manual.csv"))
+    result = append_transactions(history.head(150), directory)
+    assert (result.added, result.duplicates) == (50, 100)
+
+    index = HashIndex(directory)
+    assert len(index) == 150
+    assert index.covers("manual.csv") and index.covers(result.partition)
+    assert index.contains(transaction_keys(history.head(150))).all()
+
+
+def test_cli_ingest(tmp_path, history, capsys):
+    """Подкоманда ingest печатает число добавленных строк и дубликатов."""
+    export = str(tmp_path / "export.csv")
+    write_dataset(history.head(10), export)
+    main(["--log-level", "WARNING", "ingest", str(tmp_path / "partitions"), export, export])
+    assert capsys.readouterr().out.splitlines() == [
+        f"{export}: добавлено 10, дубликатов 0",
+        f"{export}: добавлено 0, дубликатов 10",
+    ]
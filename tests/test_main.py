@@ -0,0 +1,55 @@
+import json
+
+import pandas as pd
+import pytest
+
+from benchmarks.importtime import FORBIDDEN, forbidden_imports, measure_imports
+from src.main import main
+
+
+@pytest.mark.parametrize("module", sorted(FORBIDDEN))
+def test_light_imports(module):
+    """Импорт легких модулей не тянет pandas, requests и dotenv (время — в benchmarks.importtime)."""
+    assert forbidden_imports(module, measure_imports(module)) == []
+
+
+def test_cli_greeting(capsys):
+    """Подкоманда greeting печатает приветствие."""
+    main(["greeting", "--date-time", "2023-01-01 08:00:00"])
+    assert capsys.readouterr().out.strip() == "Доброе утро"
+
+
+def test_cli_report(tmp_path, capsys):
+    """Подкоманда report печатает JSON отчета по файлу."""
+    file_path = str(tmp_path / "operations.csv")
+    pd.DataFrame({
+        "Дата операции": ["2023-01-01", "2023-01-15", "2023-02-01"],
+        "Сумма операции": [-100.0, -50.0, -30.0],
+        "Категория": ["Еда", "Еда", "Транспорт"],
+        "Описание": ["Кафе", "Кафе", "Такси"],
+    }).to_csv(file_path, index=False)
+
+    main(["--file", file_path, "--log-level", "WARNING", "report", "category", "Еда", "--date", "2023-02-01"])
+    assert json.loads(capsys.readouterr().out) == {"total": 150.0}
+
+
+@pytest.mark.parametrize("backend", ["pandas", "sqlite"])
+def test_cli_report_backend(tmp_path, capsys, backend):
+    """Опция --backend указывается после имени отчета."""
+    file_path = str(tmp_path / "operations.csv")
+    pd.DataFrame({
+        "Дата операции": ["2023-01-01", "2023-01-15", "2023-02-01"],
+        "Сумма операции": [-100.0, -50.0, -30.0],
+        "Категория": ["Еда", "Еда", "Транспорт"],
+        "Описание": ["Кафе", "Кафе", "Такси"],
+    }).to_csv(file_path, index=False)
+
+    main(["--file", file_path, "--log-level", "WARNING",
+          "report", "category", "Еда", "--date", "2023-02-01", "--backend", backend])
+    assert json.loads(capsys.readouterr().out) == {"total": 150.0}
+
+
+def test_cli_rejects_unknown_arguments():
+    """Лишние аргументы у обычных подкоманд — ошибка разбора."""
+    with pytest.raises(SystemExit):
+        main(["greeting", "--unknown"])
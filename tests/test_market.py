@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src import utils
+from src.market import MarketDataClient
+
+PRICES = {"AAPL": "190.1234", "GOOGL": "140.5", "MSFT": "410"}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Заглушка ExchangeRate-API и Alpha Vantage."""
+
+    delay = 0.0
+    requests_seen = []
+
+    def do_GET(self):
+        type(self).requests_seen.append(self.path)
+        time.sleep(self.delay)
+        parsed = urlparse(self.path)
+        if parsed.path.startswith("/v6/"):
+            payload = {"result": "success", "conversion_rates": {"USD": 1, "EUR": 0.92345, "RUB": 90.1}}
+        else:
+            symbol = parse_qs(parsed.query)["symbol"][0]
+            payload = {"Global Quote": {"05. price": PRICES[symbol]}} if symbol in PRICES else {"Note": "limit"}
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubHandler.requests_seen = []
+    StubHandler.delay = 0.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(monkeypatch, stub_server):
+    client = MarketDataClient(ttl=60, stale_ttl=60, timeout=2)
+    monkeypatch.setattr(utils, "_market_client", client)
+    monkeypatch.setattr(utils, "CURRENCY_API_KEY", "test")
+    monkeypatch.setattr(utils, "STOCK_API_KEY", "test")
+    monkeypatch.setattr(utils, "CURRENCY_API_URL", stub_server)
+    monkeypatch.setattr(utils, "STOCK_API_URL", stub_server)
+    yield client
+    client.close()
+
+
+def test_stock_prices_fetched_concurrently(client):
+    """Запросы по тикерам выполняются параллельно."""
+    StubHandler.delay = 0.3
+    started = time.perf_counter()
+    result = utils.get_stock_prices(["AAPL", "GOOGL", "MSFT"])
+    assert time.perf_counter() - started < 0.8
+    assert result == [
+        {"stock": "AAPL", "price": 190.12},
+        {"stock": "GOOGL", "price": 140.5},
+        {"stock": "MSFT", "price": 410.0},
+    ]
+
+
+def test_repeated_calls_within_ttl_hit_cache(client):
+    """Повторные вызовы в пределах TTL не обращаются к сети; ответы с ошибкой не кэшируются."""
+    assert utils.get_currency_rates(["EUR"]) == [{"currency": "EUR", "rate": 0.9234}]
+    assert utils.get_stock_prices(["AAPL", "TSLA"])[1] == {"stock": "TSLA", "price": "API Limit/Error"}
+    seen = len(StubHandler.requests_seen)
+
+    utils.get_currency_rates(["EUR", "USD"])
+    utils.get_stock_prices(["AAPL"])
+    assert len(StubHandler.requests_seen) == seen
+
+    utils.get_stock_prices(["TSLA"])
+    assert len(StubHandler.requests_seen) == seen + 1
+
+
+def test_stale_while_revalidate(stub_server):
+    """Устаревший ответ отдается сразу, обновление идет в фоне."""
+    now = [0.0]
+    client = MarketDataClient(ttl=10, stale_ttl=10, clock=lambda: now[0])
+    url = f"{stub_server}/query?symbol=AAPL"
+    try:
+        client.get_json(url)
+        now[0] = 15.0
+        StubHandler.delay = 0.3
+        started = time.perf_counter()
+        assert client.get_json(url) == {"Global Quote": {"05. price": "190.1234"}}
+        assert time.perf_counter() - started < 0.2
+        client.close()  # дожидаемся фонового обновления
+        assert len(StubHandler.requests_seen) == 2
+    finally:
+        client.close()
+
+
+def test_network_error_reported(monkeypatch):
+    """Недоступный сервер дает Network Error с учетом таймаута."""
+    client = MarketDataClient(timeout=0.5)
+    monkeypatch.setattr(utils, "_market_client", client)
+    monkeypatch.setattr(utils, "STOCK_API_KEY", "test")
+    monkeypatch.setattr(utils, "STOCK_API_URL", "http://127.0.0.1:9")
+    assert utils.get_stock_prices(["AAPL"]) == [{"stock": "AAPL", "price": "Network Error"}]
+    client.close()
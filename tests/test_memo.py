@@ -0,0 +1,118 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src import memo as memo_module
+from src.dataset import PartitionedDataset
+from src.memo import Memo, memo
+from src.reports import spending_by_category, spending_by_weekday
+from src.store import TransactionStore
+from src.utils import load_transactions
+from src.views import events_page
+
+
+@pytest.fixture(autouse=True)
+def clean_memo():
+    memo.reset()
+    yield
+    memo.reset()
+
+
+def make_frame(amounts):
+    return pd.DataFrame({
+        "Дата операции": pd.date_range("2023-01-02 10:00", periods=len(amounts), freq="D"),
+        "Сумма операции": amounts,
+        "Сумма платежа": amounts,
+        "Категория": ["Еда"] * len(amounts),
+        "Описание": ["Кафе"] * len(amounts),
+        "Номер карты": ["*1111"] * len(amounts),
+    })
+
+
+def test_lru_and_ttl():
+    """Число записей ограничено (LRU), записи истекают по TTL."""
+    now = [0.0]
+    cache = Memo(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.put("c", 3)
+    assert cache.get("b") == (False, None)
+    now[0] = 11
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["evictions"] == 2
+
+
+def test_store_hits_and_append():
+    """Повторный отчет по хранилищу берется из кэша, append дает новую версию данных."""
+    store = TransactionStore(make_frame([-100.0, -50.0]))
+    assert spending_by_category(store, "Еда", "2023-01-31") == {"total": 150.0}
+    # Окно на секунду позже покрывает те же строки — та же запись
+    assert spending_by_category(store, "Еда", "2023-01-31 00:00:01") == {"total": 150.0}
+    assert memo.stats()["hits"] == 1
+
+    store.append(make_frame([-25.0]))
+    assert spending_by_category(store, "Еда", "2023-01-31") == {"total": 175.0}
+    assert memo.stats()["misses"] == 2
+
+
+def test_results_are_copies():
+    """Изменение возвращенного словаря не портит кэш."""
+    store = TransactionStore(make_frame([-100.0, -50.0]))
+    events_page("2023-01-31 12:00:00", "M", df=store)["expenses"]["main"].clear()
+    assert events_page("2023-01-31 12:00:00", "M", df=store)["expenses"]["main"] == [
+        {"category": "Еда", "amount": 150.0}
+    ]
+    assert memo.stats()["hits"] == 1
+
+
+def test_loaded_frames_invalidated_on_change(tmp_path):
+    """Кадры из load_transactions кэшируются до изменения файла; производные кадры не кэшируются."""
+    path = str(tmp_path / "operations.csv")
+    make_frame([-100.0, -50.0]).to_csv(path, index=False)
+    df = load_transactions(path)
+    assert spending_by_weekday(df, "2023-01-31") == spending_by_weekday(load_transactions(path), "2023-01-31")
+    assert memo.stats()["hits"] == 1
+
+    spending_by_weekday(df.head(1), "2023-01-31")
+    assert memo.stats()["bypasses"] == 1
+
+    make_frame([-100.0, -50.0, -30.0]).to_csv(path, index=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    changed = load_transactions(path)
+    assert len(memo) == 0
+    assert spending_by_category(changed, "Еда", "2023-01-31") == {"total": 180.0}
+
+
+def test_dataset_refresh_changes_fingerprint(tmp_path):
+    """Новая партиция до refresh не влияет на результат, после refresh — дает новую запись."""
+    make_frame([-100.0, -50.0]).to_csv(tmp_path / "2023-01.csv", index=False)
+    ds = PartitionedDataset(str(tmp_path))
+    assert events_page("2023-01-31 12:00:00", "M", df=ds)["expenses"]["total_amount"] == -150
+
+    make_frame([-30.0]).to_csv(tmp_path / "2023-01-extra.csv", index=False)
+    assert events_page("2023-01-31 12:00:00", "M", df=ds)["expenses"]["total_amount"] == -150
+    ds.refresh()
+    assert events_page("2023-01-31 12:00:00", "M", df=ds)["expenses"]["total_amount"] == -180
+
+
+def test_disabled():
+    """Выключенный кэш не хранит результаты."""
+    memo_module.configure(enabled=False)
+    try:
+        store = TransactionStore(make_frame([-100.0]))
+        spending_by_category(store, "Еда", "2023-01-31")
+        assert len(memo) == 0
+    finally:
+        memo_module.configure(enabled=True)
+
+
+def test_prometheus_counters():
+    store = TransactionStore(make_frame([-100.0]))
+    spending_by_weekday(store)
+    spending_by_weekday(store)
+    text = memo_module.to_prometheus()
+    assert "finance_memo_hits_total 1" in text
+    assert "finance_memo_misses_total 1" in text
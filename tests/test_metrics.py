@@ -0,0 +1,71 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from src import metrics
+from src.reports import spending_by_category
+from src.services import investment_bank
+from src.views import events_page
+
+
+@pytest.fixture
+def collecting():
+    metrics.registry.reset()
+    metrics.enable()
+    yield metrics.registry
+    metrics.enable(False)
+    metrics.enable_profiling(None)
+    metrics.registry.reset()
+
+
+@pytest.fixture
+def transactions():
+    return pd.DataFrame({
+        "Дата операции": pd.to_datetime(["2023-01-01", "2023-01-15", "2023-02-01"]),
+        "Сумма операции": [-100.0, -50.0, 300.0],
+        "Сумма платежа": [-100.0, -50.0, 300.0],
+        "Категория": ["Еда", "Еда", "Зарплата"],
+        "Описание": ["Кафе", "Кафе", "Аванс"],
+    })
+
+
+def test_disabled_metrics_record_nothing(transactions):
+    """Без включения метрики не собираются."""
+    metrics.registry.reset()
+    spending_by_category(transactions, "Еда", "2023-02-01")
+    assert metrics.snapshot() == {}
+
+
+def test_calls_rows_and_errors_recorded(collecting, transactions):
+    """Считаются вызовы, строки и ошибки, проглоченные handle_report_errors."""
+    spending_by_category(transactions, "Еда", "2023-02-01")
+    spending_by_category(transactions.drop(columns="Категория"), "Еда", "2023-02-01")
+    investment_bank("2023-01", transactions, 50)
+
+    stats = metrics.snapshot()
+    assert stats["reports.spending_by_category"]["calls"] == 2
+    assert stats["reports.spending_by_category"]["errors"] == 1
+    assert stats["reports.spending_by_category"]["rows_total"] == 6
+    assert stats["services.investment_bank"]["calls"] == 1
+    assert sum(stats["services.investment_bank"]["latency_buckets"].values()) == 1
+
+
+def test_prometheus_and_json_export(collecting, transactions, tmp_path):
+    """Экспорт в формате Prometheus и JSON."""
+    investment_bank("2023-01", transactions, 50)
+    text = metrics.to_prometheus()
+    assert 'finance_calls_total{function="services.investment_bank"} 1' in text
+    assert 'finance_latency_seconds_bucket{function="services.investment_bank",le="+Inf"} 1' in text
+
+    path = tmp_path / "metrics.json"
+    metrics.dump_json(str(path))
+    assert json.loads(path.read_text(encoding="utf-8"))["services.investment_bank"]["calls"] == 1
+
+
+def test_request_profiling(collecting, transactions, tmp_path):
+    """Профиль сохраняется для каждого запроса к представлению."""
+    metrics.enable_profiling("cprofile", str(tmp_path))
+    events_page("2023-02-01", "M", df=transactions)
+    assert [name.split("-")[0] for name in os.listdir(tmp_path)] == ["views.events_page"]
@@ -1,7 +1,15 @@
+import tracemalloc
+
+import numpy as np
 import pytest
 import pandas as pd
 from datetime import datetime
-from src.reports import spending_by_category, spending_by_weekday
+from src.reports import (
+    spending_by_category,
+    spending_by_category_chunks,
+    spending_by_weekday,
+    spending_by_weekday_chunks,
+)
 
 @pytest.fixture
 def sample_dataframe():
@@ -21,4 +29,64 @@ def test_spending_by_weekday(sample_dataframe):
     """Проверяем средние траты по дням недели."""
     result = spending_by_weekday(sample_dataframe)
     assert "Sunday" in result  # 2023-01-01 и 2023-01-15 - воскресенья
-    assert result["Sunday"] == 750.0  # (1000 + 500) / 2
\ No newline at end of file
+    assert result["Sunday"] == 750.0  # (1000 + 500) / 2
+
+def test_chunked_reports_match_full():
+    """Агрегация по частям совпадает с расчетом по всему DataFrame."""
+    df = pd.DataFrame({
+        "Дата операции": pd.to_datetime(["2023-01-01", "2023-01-02", "2023-01-08", "2023-02-01", "2023-02-05"]),
+        "Категория": ["Еда", "Транспорт", "Еда", "Зарплата", "Еда"],
+        "Сумма операции": [-100.0, -50.0, -300.0, 1000.0, -20.0],
+    })
+    chunks = [df.iloc[:2], df.iloc[2:4], df.iloc[4:]]
+
+    assert spending_by_category_chunks(iter(chunks), "Еда", "2023-02-10") == \
+        spending_by_category(df.copy(), "Еда", "2023-02-10")
+    assert spending_by_weekday_chunks(iter(chunks)) == spending_by_weekday(df.copy())
+
+
+def _legacy_spending_by_weekday(transactions):
+    """Прежняя реализация: копия трат, строковая колонка дня недели и abs по всем строкам."""
+    spending_transactions = transactions[transactions["Сумма операции"] < 0].copy()
+    spending_transactions["weekday"] = spending_transactions["Дата операции"].dt.day_name()
+    spending_transactions["Сумма операции"] = spending_transactions["Сумма операции"].abs()
+    return spending_transactions.groupby("weekday")["Сумма операции"].mean().to_dict()
+
+
+def _peak_allocated(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_reports_do_not_mutate_input():
+    """Отчеты не меняют DataFrame вызывающего кода."""
+    df = pd.DataFrame({
+        "Дата операции": ["2023-01-01", "2023-01-15", "2023-02-01"],
+        "Категория": ["Еда", "Еда", "Транспорт"],
+        "Сумма операции": [-1000.0, -500.0, -300.0],
+    })
+    original = df.copy()
+
+    assert spending_by_category(df, "Еда", "2023-02-01") == {"total": 1500.0}
+    assert spending_by_weekday(df) == {"Sunday": 750.0, "Wednesday": 300.0}
+    pd.testing.assert_frame_equal(df, original)
+
+
+def test_spending_by_weekday_allocates_less():
+    """Группировка по кодам дня недели выделяет меньше памяти, чем копия с колонкой названий."""
+    rows = 200_000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Дата операции": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24, rows), "h"),
+        "Сумма операции": -rng.random(rows) * 1000,
+        "Описание": "Покупка",
+    })
+
+    assert spending_by_weekday(df) == pytest.approx(_legacy_spending_by_weekday(df))
+    legacy_peak = _peak_allocated(lambda: _legacy_spending_by_weekday(df))
+    peak = _peak_allocated(lambda: spending_by_weekday(df))
+    assert peak < legacy_peak * 0.75
@@ -0,0 +1,63 @@
+import json
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from data.generate_data import generate_transactions
+from src import responses
+from src.responses import category_amounts, dumps, top_transactions
+from src.utils import normalize_transactions
+
+
+@pytest.fixture
+def transactions():
+    df = generate_transactions(500, cards=2, start="2023-01-01", end="2023-03-31 23:59:59", seed=3)
+    return normalize_transactions(df, warn_missing=False)
+
+
+def legacy_top_transactions(df, n=5):
+    return df.nlargest(n, "Сумма операции").apply(
+        lambda x: {
+            "date": x["Дата операции"].strftime("%d.%m.%Y"),
+            "amount": round(x["Сумма операции"], 2),
+            "category": x["Категория"],
+            "description": x["Описание"],
+        },
+        axis=1
+    ).tolist()
+
+
+@pytest.mark.parametrize("n", [5, 100])
+def test_top_transactions_match_rowwise(transactions, n):
+    """Колоночная сборка совпадает с построчной по значениям и JSON."""
+    for df in (transactions, transactions.astype({"Категория": object, "Описание": object})):
+        expected = legacy_top_transactions(df, n)
+        result = top_transactions(df, n)
+        assert result == expected
+        assert dumps(result) == json.dumps(expected, ensure_ascii=False, separators=(",", ":")).encode()
+    assert top_transactions(transactions.drop(columns="Описание")) == []
+
+
+def test_category_amounts(transactions):
+    """Суммы по категориям в порядке серии, как в прежних генераторах списков."""
+    by_category = transactions.groupby("Категория", observed=True)["Сумма платежа"].sum().sort_values()
+    assert category_amounts(by_category, absolute=True) == [
+        {"category": k, "amount": abs(v)} for k, v in by_category.to_dict().items()
+    ]
+    assert category_amounts(by_category.iloc[:0]) == []
+
+
+def test_dumps_backends_match(transactions):
+    """orjson и стандартный json дают одинаковые байты."""
+    payload = {
+        "top": top_transactions(transactions),
+        "series": transactions["Сумма операции"].head(3).to_numpy(),
+        "when": pd.Timestamp("2023-01-02 10:00:00"),
+        "missing": float("nan"),
+        "text": "Супермаркеты",
+    }
+    fast = dumps(payload)
+    with patch.object(responses, "orjson", None):
+        assert dumps(payload) == fast
+    assert json.loads(fast)["missing"] is None
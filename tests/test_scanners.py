@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from src.scanners import PatternScanner, merchant_pattern
+from src.services import scan_transactions
+
+
+@pytest.fixture
+def descriptions():
+    return pd.Series([
+        "Пополнение +7 921 123-45-67",
+        "Перевод на карту *1234",
+        "Константин Л.",
+        None,
+        "Оплата в Пятёрочка",
+    ], index=[10, 11, 12, 13, 14])
+
+
+def test_scan_returns_match_table(descriptions):
+    """Один проход возвращает все совпадения с тегами по исходному индексу."""
+    table = PatternScanner().scan(descriptions)
+    assert list(table.itertuples(name=None)) == [
+        (10, "phone", "+7 921 123-45-67"),
+        (11, "transfer", "Перевод"),
+        (11, "card", "*1234"),
+        (12, "transfer", "Константин Л."),
+    ]
+
+
+def test_tags_with_merchant_pattern(descriptions):
+    """Пользовательские шаблоны подключаются к тому же проходу."""
+    scanner = PatternScanner({"phone": r"\+7\s?\d{3}", "merchant": merchant_pattern(["Пятёрочка", "Магнит"])})
+    flags = scanner.tags(descriptions)
+    assert flags.index.tolist() == descriptions.index.tolist()
+    assert flags["phone"].tolist() == [True, False, False, False, False]
+    assert flags["merchant"].tolist() == [False, False, False, False, True]
+
+
+def test_scanner_rejects_capturing_groups():
+    """Захватывающие группы внутри шаблона запрещены."""
+    with pytest.raises(ValueError):
+        PatternScanner({"bad": r"(\d+)"})
+
+
+def test_scan_transactions_from_records():
+    """scan_transactions работает со списком словарей."""
+    table = scan_transactions([{"Описание": "Такси"}, {"Описание": "+7 999 000 11 22"}])
+    assert table.index.tolist() == [1]
+    assert table["tag"].tolist() == ["phone"]
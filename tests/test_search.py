@@ -0,0 +1,86 @@
+import pandas as pd
+
+from src.memo import memo
+from src.search import SearchIndex, tokenize
+from src.services import simple_search
+from src.store import TransactionStore
+from src.utils import load_transactions
+
+
+def test_tokenize_casefolds_cyrillic():
+    """Токенизация приводит регистр и «ё» к единому виду."""
+    assert tokenize("Супермаркет «ЁЛКА», Moscow") == ["супермаркет", "елка", "moscow"]
+
+
+def test_search_index_prefix_and_ranking():
+    """Поиск по префиксу, точные совпадения выше префиксных."""
+    index = SearchIndex([
+        {"Описание": "Магнит у дома", "Категория": "Супермаркеты"},
+        {"Описание": "Такси", "Категория": "Транспорт"},
+        {"Описание": "Магнитола", "Категория": "Электроника"},
+        {"Описание": "Магнит", "Категория": "Супермаркеты"},
+    ])
+    assert index.search("магнит").tolist() == [0, 3, 2]
+    assert index.search("магнит супер").tolist() == [0, 3]
+    assert index.search("самолет").tolist() == []
+
+
+def test_simple_search_appends_to_index():
+    """simple_search возвращает ожидаемую структуру и видит дописанные строки."""
+    transactions = [
+        {"Описание": "Колхоз", "Категория": "Супермаркеты"},
+        {"Описание": "Ситидрайв", "Категория": "Каршеринг"},
+    ]
+    result = simple_search("супермаркет", transactions)
+    assert result == {"total_found": 1, "transactions": [transactions[0]]}
+
+    transactions.append({"Описание": "Перекрёсток", "Категория": "Супермаркеты"})
+    result = simple_search("СУПЕРМАРКЕТ", transactions)
+    assert result["total_found"] == 2
+    assert simple_search("перекресток", transactions)["transactions"] == [transactions[2]]
+
+
+def test_simple_search_dataframe():
+    """Поиск работает и по DataFrame."""
+    df = pd.DataFrame({"Описание": ["Аптека 36.6", "Кафе"], "Категория": ["Аптеки", "Рестораны"]})
+    result = simple_search("апт", df)
+    assert result["total_found"] == 1
+    assert result["transactions"][0]["Описание"] == "Аптека 36.6"
+
+
+def test_search_index_categorical_fields():
+    """Поля с типом category (после compact_transactions) индексируются как строки."""
+    frame = pd.DataFrame({
+        "Описание": ["Колхоз", "Такси", None],
+        "Категория": pd.Categorical(["Супермаркеты", None, "Транспорт"]),
+    })
+    index = SearchIndex(frame)
+    assert index.search("супермаркеты").tolist() == [0]
+    assert index.search("транспорт").tolist() == [2]
+
+
+def test_search_index_follows_data(tmp_path):
+    """Индекс переиспользуется для хранилища и загруженного файла и не отстает от изменений данных."""
+    transactions = [{"Описание": "Колхоз", "Категория": "Супермаркеты"}]
+    assert simple_search("колхоз", transactions)["total_found"] == 1
+    transactions[0] = {"Описание": "Такси", "Категория": "Транспорт"}
+    assert simple_search("колхоз", transactions)["total_found"] == 0
+
+    store = TransactionStore(pd.DataFrame({
+        "Дата операции": pd.to_datetime(["2023-01-01"]), "Описание": ["Колхоз"], "Категория": ["Супермаркеты"],
+    }))
+    assert simple_search("колхоз", store)["total_found"] == 1
+    assert store.search_index is store.search_index
+    store.append(pd.DataFrame({
+        "Дата операции": pd.to_datetime(["2023-01-02"]), "Описание": ["Колхоз"], "Категория": ["Супермаркеты"],
+    }))
+    assert simple_search("колхоз", store)["total_found"] == 2
+
+    path = str(tmp_path / "operations.csv")
+    pd.DataFrame({"Дата операции": ["2023-01-01"], "Описание": ["Аптека"], "Категория": ["Аптеки"]}).to_csv(
+        path, index=False)
+    df = load_transactions(path)
+    assert simple_search("апт", df)["total_found"] == 1
+    hits = memo.stats()["hits"]
+    assert simple_search("апт", load_transactions(path))["total_found"] == 1
+    assert memo.stats()["hits"] == hits + 1
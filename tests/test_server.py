@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pandas as pd
+import pytest
+
+from src.server import DataState, FinanceServer
+
+
+def write_transactions(path, amounts):
+    pd.DataFrame({
+        "Дата операции": pd.date_range("2023-01-02", periods=len(amounts), freq="D"),
+        "Сумма операции": amounts,
+        "Сумма платежа": amounts,
+        "Категория": ["Еда"] * len(amounts),
+        "Описание": ["Кафе"] * len(amounts),
+        "Номер карты": ["*1111"] * len(amounts),
+    }).to_csv(path, index=False)
+
+
+@pytest.fixture(params=["pandas", "sqlite"])
+def server(request, tmp_path):
+    data_path, settings_path = str(tmp_path / "operations.csv"), str(tmp_path / "settings.json")
+    write_transactions(data_path, [-100.0, -50.0])
+    with open(settings_path, "w") as f:
+        json.dump({"user_currencies": ["USD"], "user_stocks": ["AAPL"]}, f)
+
+    state = DataState(data_path, settings_path, backend=request.param)
+    httpd = FinanceServer(("127.0.0.1", 0), state)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    with patch("src.views.get_currency_rates", side_effect=lambda cur: [{"currency": c} for c in cur]), \
+            patch("src.views.get_stock_prices", return_value=[]):
+        thread.start()
+        yield f"http://127.0.0.1:{httpd.server_address[1]}", state
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def get_json(url):
+    with urlopen(url) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def test_endpoints_use_resident_data(server):
+    """Эндпоинты отвечают по загруженным один раз данным и настройкам."""
+    base, _ = server
+    with patch("src.views.load_transactions") as load, patch("src.views.load_user_settings") as settings:
+        main = get_json(f"{base}/main?date_time=2023-01-31%2012:00:00")
+        events = get_json(f"{base}/events?date_time=2023-01-31%2012:00:00&period=M")
+        category = get_json(f"{base}/reports/category?category=%D0%95%D0%B4%D0%B0&date=2023-01-31")
+        weekday = get_json(f"{base}/reports/weekday?date=2023-01-31")
+    load.assert_not_called()
+    settings.assert_not_called()
+
+    assert main["cards"][0]["total_spent"] == 150.0
+    assert main["currency_rates"] == [{"currency": "USD"}]
+    assert events["expenses"]["total_amount"] == -150
+    assert category == {"total": 150.0}
+    assert set(weekday) == {"Monday", "Tuesday"}
+
+
+def test_bad_requests(server):
+    """Неизвестный путь — 404, не хватает параметра — 400."""
+    base, _ = server
+    for path, status in (("/unknown", 404), ("/reports/category", 400), ("/reports/series?freq=Y", 400),
+                         ("/reports/rolling?windows=a", 400), ("/reports/month-over-month?by=shop", 400)):
+        with pytest.raises(HTTPError) as error:
+            urlopen(base + path)
+        assert error.value.code == status
+
+
+def test_timeseries_endpoints(server):
+    """Временные ряды считаются по резидентным данным."""
+    base, _ = server
+    assert get_json(f"{base}/reports/series?freq=D") == {"2023-01-02": 100.0, "2023-01-03": 50.0}
+    assert get_json(f"{base}/reports/rolling?windows=2")["2d"]["2023-01-03"] == 150.0
+    by_card = get_json(f"{base}/reports/month-over-month?by=card")
+    assert by_card == {"*1111": {"2023-01": {"total": 150.0, "delta": None, "delta_percent": None}}}
+
+
+def test_reload_on_file_change(server):
+    """Изменение файла подхватывается без перезапуска сервера."""
+    base, state = server
+    assert not state.reload_if_changed()
+
+    write_transactions(state.file_path, [-100.0, -50.0, -25.0])
+    stat = os.stat(state.file_path)
+    os.utime(state.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert state.reload_if_changed()
+    assert get_json(f"{base}/health")["rows"] == 3
+    assert get_json(f"{base}/reports/category?category=%D0%95%D0%B4%D0%B0&date=2023-01-31") == {"total": 175.0}
+
+
+def test_failed_reload_keeps_data(server):
+    """Поврежденный файл не подменяет данные, после исправления файл перечитывается."""
+    base, state = server
+    with open(state.file_path, "wb") as f:
+        f.write(b"\x00\xff garbage")
+    stat = os.stat(state.file_path)
+    os.utime(state.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert not state.reload_if_changed()
+    assert get_json(f"{base}/health")["rows"] == 2
+
+    write_transactions(state.file_path, [-100.0, -50.0, -25.0])
+    os.utime(state.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    assert state.reload_if_changed()
+    assert get_json(f"{base}/health")["rows"] == 3
+
+
+def test_metrics_endpoint(server):
+    """Метрики отдаются в текстовом формате Prometheus."""
+    base, _ = server
+    with urlopen(f"{base}/metrics") as response:
+        assert "finance_calls_total" in response.read().decode()
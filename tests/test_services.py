@@ -1,5 +1,13 @@
 import pytest
-from src.services import cashback_categories, investment_bank, find_phone_transactions
+import pandas as pd
+from src.services import (
+    cashback_categories,
+    cashback_categories_chunks,
+    cashback_categories_df,
+    find_phone_transactions,
+    investment_bank,
+    investment_bank_df,
+)
 
 @pytest.fixture
 def sample_transactions():
@@ -30,4 +38,40 @@ def test_find_phone_transactions():
     ]
     result = find_phone_transactions(transactions)
     assert len(result) == 1
-    assert "+7 921 123-45-67" in result[0]["Описание"]
\ No newline at end of file
+    assert "+7 921 123-45-67" in result[0]["Описание"]
+
+def test_cashback_categories_chunks(sample_transactions):
+    """Потоковый расчет кешбэка совпадает с расчетом по списку."""
+    df = pd.DataFrame(sample_transactions)
+    chunks = [df.iloc[:1], df.iloc[1:]]
+    assert cashback_categories_chunks(chunks, 2023, 1) == cashback_categories(sample_transactions, 2023, 1)
+
+
+def test_vectorized_services_match_row_loop():
+    """Векторные версии совпадают с построчным расчетом."""
+    import math
+    import random
+
+    rng = random.Random(0)
+    transactions = [
+        {
+            "Дата операции": f"2023-{rng.randint(1, 3):02d}-{rng.randint(1, 28):02d}",
+            "Сумма операции": round(rng.uniform(1, 5000), 2),
+            "Категория": rng.choice(["Еда", "Транспорт", "Аптеки"]),
+            "Кешбэк": rng.randint(0, 50),
+        }
+        for _ in range(1000)
+    ]
+
+    expected_bank = 0.0
+    expected_cashback = {}
+    for tx in transactions:
+        if tx["Дата операции"].startswith("2023-02"):
+            expected_bank += math.ceil(tx["Сумма операции"] / 100) * 100 - tx["Сумма операции"]
+            expected_cashback[tx["Категория"]] = expected_cashback.get(tx["Категория"], 0) + tx["Кешбэк"]
+
+    df = pd.DataFrame(transactions)
+    assert investment_bank("2023-02", transactions, 100) == round(expected_bank, 2)
+    assert investment_bank_df("2023-02", df, 100) == round(expected_bank, 2)
+    assert cashback_categories(transactions, 2023, 2) == expected_cashback
+    assert cashback_categories_df(df, 2023, 2) == expected_cashback
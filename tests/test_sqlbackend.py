@@ -0,0 +1,121 @@
+import os
+
+import pandas as pd
+import pytest
+
+from data.generate_data import generate_transactions, write_dataset
+from src.aggregates import MonthlyAggregates
+from src.reports import spending_by_category, spending_by_weekday
+from src.sqlbackend import SqlTransactions, open_transactions
+from src.utils import load_transactions
+from src.views import events_page, main_page, summarize_cards
+
+
+@pytest.fixture
+def source(tmp_path):
+    df = generate_transactions(3000, cards=3, start="2021-01-01", end="2023-12-31 23:59:59", seed=11)
+    # Строка без даты и без категории не должна попадать в окна, но учитывается в итогах и картах
+    df = pd.concat([df, df.iloc[[0]].assign(**{"Дата операции": pd.NaT, "Категория": None})], ignore_index=True)
+    path = str(tmp_path / "operations.csv")
+    write_dataset(df, path)
+    return path
+
+
+@pytest.fixture
+def backends(source):
+    df = load_transactions(source)
+    return df, SqlTransactions.from_file(source)
+
+
+# SQL складывает целые копейки, pandas — float: суммы совпадают до копейки, а не побитово
+KOPECK = 0.005
+
+
+def to_kopeck(value):
+    return pytest.approx(value, abs=KOPECK)
+
+
+def test_reports_match_pandas(backends):
+    """Отчеты по SQLite совпадают с расчетом pandas до копейки."""
+    df, sql = backends
+    categories = df["Категория"].dropna().unique()[:3]
+    for date in ("2021-03-15", "2022-12-31 16:44:00", "2023-12-31"):
+        for category in categories:
+            expected = spending_by_category(df, category, date)["total"]
+            assert spending_by_category(sql, category, date)["total"] == to_kopeck(expected)
+        expected = spending_by_weekday(df, date)
+        result = spending_by_weekday(sql, date)
+        assert result.keys() == expected.keys()
+        assert all(result[day] == to_kopeck(expected[day]) for day in expected)
+
+
+def test_events_page_matches_pandas(backends):
+    """Страница событий по SQLite совпадает с DataFrame и MonthlyAggregates."""
+    df, sql = backends
+    aggregates = MonthlyAggregates.from_frame(df)
+    for period in ("M", "Q", "Y"):
+        expected = events_page("2023-06-15 12:00:00", period, df=df)
+        for result in (events_page("2023-06-15 12:00:00", period, df=sql),
+                       events_page("2023-06-15 12:00:00", period, df=aggregates)):
+            for section in ("expenses", "income"):
+                assert result[section]["total_amount"] == expected[section]["total_amount"]
+                assert [row["category"] for row in result[section]["main"]] == \
+                       [row["category"] for row in expected[section]["main"]]
+                assert [row["amount"] for row in result[section]["main"]] == \
+                       to_kopeck([row["amount"] for row in expected[section]["main"]])
+
+
+def test_main_page_matches_pandas(backends):
+    """Сводка по картам и топ транзакций считаются в SQL."""
+    df, sql = backends
+    settings = {"user_currencies": [], "user_stocks": []}
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr("src.views.get_currency_rates", lambda _: [])
+        patch.setattr("src.views.get_stock_prices", lambda _: [])
+        expected = main_page("2023-06-15 12:00:00", df, settings, top_n=20)
+        result = main_page("2023-06-15 12:00:00", sql, settings, top_n=20)
+    assert result["cards"] == summarize_cards(df)
+    assert result["top_transactions"] == expected["top_transactions"]
+
+
+def test_slices_match_pandas(backends):
+    """Выборки возвращают те же строки и суммы, что и исходный DataFrame."""
+    df, sql = backends
+    category = df["Категория"].dropna().iloc[0]
+    window = sql.window("2022-06-30", "Q", category=category)
+    dates = df["Дата операции"]
+    mask = (df["Категория"] == category) & (dates >= "2022-03-30") & (dates <= "2022-06-30")
+    assert len(window) == mask.sum()
+    assert window["Сумма операции"].sum() == to_kopeck(df.loc[mask, "Сумма операции"].sum())
+    assert len(sql.frame) == len(sql) == len(df)
+    assert sql.frame["Дата операции"].isna().iloc[-1]
+
+
+def test_rebuild_on_change(source):
+    """База пересобирается только при изменении исходного файла."""
+    first = open_transactions(source, "sqlite")
+    mtime = os.stat(source + ".sqlite").st_mtime_ns
+    assert len(SqlTransactions.from_file(source)) == len(first)
+    assert os.stat(source + ".sqlite").st_mtime_ns == mtime
+
+    write_dataset(load_transactions(source).head(10), source)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert len(open_transactions(source, "sqlite")) == 10
+    with pytest.raises(ValueError):
+        open_transactions(source, "duckdb")
+    assert isinstance(open_transactions(source), MonthlyAggregates)
+
+
+def test_failed_read_not_persisted(tmp_path):
+    """Непрочитанная выгрузка дает пустой набор в памяти, а база не создается."""
+    path = str(tmp_path / "operations.xlsx")
+    with open(path, "wb") as file:
+        file.write(b"not an excel file")
+    assert len(open_transactions(path, "sqlite")) == 0
+    assert not os.path.exists(path + ".sqlite")
+    with pytest.raises(Exception):
+        open_transactions(path, "sqlite", raise_errors=True)
+    with pytest.raises(Exception):
+        SqlTransactions.from_file(path)
+    assert not os.path.exists(path + ".sqlite")
@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from data.generate_data import generate_transactions
+from src.aggregates import MonthlyAggregates
+
+from src.reports import spending_by_category, spending_by_weekday
+from src.search import SearchIndex
+from src.services import cashback_categories, investment_bank
+from src.store import TransactionStore
+from src.views import filter_transactions_by_date, main_page
+
+
+@pytest.fixture
+def transactions():
+    return pd.DataFrame({
+        "Дата операции": pd.to_datetime([
+            "2023-03-01", "2023-01-10", "2023-02-15", None, "2023-01-01", "2023-03-20",
+        ]),
+        "Сумма операции": [-100.0, -200.0, -50.0, -10.0, 1000.0, -123.0],
+        "Категория": ["Еда", "Еда", "Транспорт", "Еда", "Зарплата", "Еда"],
+        "Номер карты": ["*1111", "*2222", "*1111", "*1111", None, "*2222"],
+        "Описание": ["Кафе", "Магазин", "Такси", "Без даты", "Аванс", "Рынок"],
+        "Кешбэк": [1, 2, 0, 0, 0, 3],
+    })
+
+
+def test_store_slices_are_sorted_and_inclusive(transactions):
+    """Срез по датам включает границы и упорядочен по дате."""
+    store = TransactionStore(transactions)
+    result = store.slice("2023-01-10", "2023-03-01")
+    assert result["Описание"].tolist() == ["Магазин", "Такси", "Кафе"]
+    assert len(store) == len(transactions)
+
+
+def test_store_secondary_indexes(transactions):
+    """Выборки по категории и карте используют вторичные индексы."""
+    store = TransactionStore(transactions)
+    assert store.slice(category="Еда")["Описание"].tolist() == ["Магазин", "Кафе", "Рынок"]
+    assert store.slice("2023-02-01", None, category="Еда", card="*2222")["Описание"].tolist() == ["Рынок"]
+    assert store.month(2023, 2, card="*1111")["Описание"].tolist() == ["Такси"]
+    assert store.slice(category="Нет такой").empty
+
+
+def test_store_matches_dataframe_path(transactions):
+    """Отчеты и представления дают одинаковый результат для DataFrame и хранилища."""
+    store = TransactionStore(transactions)
+
+    expected = filter_transactions_by_date(transactions, "2023-03-20", "Q").sort_values("Дата операции")
+    assert filter_transactions_by_date(store, "2023-03-20", "Q")["Описание"].tolist() == \
+        expected["Описание"].tolist()
+
+    assert spending_by_category(store, "Еда", "2023-03-20") == \
+        spending_by_category(transactions.copy(), "Еда", "2023-03-20")
+    assert spending_by_weekday(store, "2023-03-20") == spending_by_weekday(transactions.copy(), "2023-03-20")
+
+    records = transactions.assign(**{"Дата операции": transactions["Дата операции"].dt.strftime("%Y-%m-%d")})
+    records = records.dropna(subset=["Дата операции"]).to_dict("records")
+    assert cashback_categories(store, 2023, 3) == cashback_categories(records, 2023, 3)
+    assert investment_bank("2023-03", store, 50) == investment_bank("2023-03", records, 50)
+
+
+def test_store_keeps_source_order():
+    """Карты и равные суммы в топе идут в порядке исходного кадра, как для DataFrame."""
+    df = generate_transactions(500, cards=6, seed=3)
+    # Округление дает равные суммы, выгрузка отсортирована по убыванию даты
+    df["Сумма операции"] = df["Сумма операции"].round(-3)
+    store = TransactionStore(df.head(400))
+    store.append(df.tail(100))
+    assert store.in_source_order()["Описание"].tolist() == df["Описание"].tolist()
+
+    with patch("src.views.get_currency_rates", return_value=[]), patch("src.views.get_stock_prices", return_value=[]):
+        expected = main_page("2023-12-31 12:00:00", df, settings={"user_currencies": [], "user_stocks": []})
+        for resident in (store, MonthlyAggregates.from_frame(df)):
+            result = main_page("2023-12-31 12:00:00", resident, settings={"user_currencies": [], "user_stocks": []})
+            assert result["cards"] == expected["cards"]
+            assert result["top_transactions"] == expected["top_transactions"]
+
+
+def test_store_append_extends_search_index():
+    """append дописывает в построенный поисковый индекс только новые строки, номера — после прежних."""
+    df = generate_transactions(500, seed=31)
+    store = TransactionStore(df.iloc[:300])
+    index = store.search_index
+    with patch("src.store.SearchIndex", side_effect=AssertionError("index rebuilt")):
+        store.append(df.iloc[300:])
+    assert store.search_index is index
+    assert index.size == len(store) == len(df)
+    fresh = SearchIndex(store.in_source_order())
+    for query in ("супермаркет", "перевод", "аптека"):
+        assert index.search(query).tolist() == fresh.search(query).tolist()
+        assert index.records(index.search(query)) == fresh.records(fresh.search(query))
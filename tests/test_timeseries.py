@@ -0,0 +1,80 @@
+import json
+
+import pandas as pd
+import pytest
+
+from data.generate_data import generate_transactions
+from src.reports import spending_by_category
+from src.store import TransactionStore
+from src.timeseries import month_over_month, rolling_spending, spending_series
+from src.utils import normalize_transactions
+
+
+@pytest.fixture
+def transactions():
+    df = generate_transactions(2000, cards=3, start="2023-01-01", end="2023-06-30 23:59:59", seed=7)
+    return normalize_transactions(df, warn_missing=False)
+
+
+@pytest.fixture
+def small():
+    return pd.DataFrame({
+        "Дата операции": pd.to_datetime(["2023-01-02 10:00", "2023-01-09 12:00", "2023-02-01 09:00",
+                                         "2023-02-02 09:00", "2023-04-03 18:00"]),
+        "Сумма операции": [-100.0, -50.0, -300.0, 1000.0, -25.0],
+        "Категория": ["Еда", "Кафе", "Еда", "Пополнения", "Еда"],
+        "Номер карты": ["*1111", "*2222", "*1111", "*1111", "*2222"],
+    })
+
+
+def test_spending_series(small):
+    """Ряды по месяцам и неделям: пустые интервалы — нули, поступления не учитываются."""
+    assert spending_series(small, "M") == {"2023-01": 150.0, "2023-02": 300.0, "2023-03": 0.0, "2023-04": 25.0}
+    weekly = spending_series(small, "W", end="2023-02-28")
+    assert weekly["2023-01-02"] == 100.0 and weekly["2023-01-09"] == 50.0
+    assert list(weekly)[-1] == "2023-01-30"
+    by_card = spending_series(small, "M", by="card")
+    assert by_card["*1111"] == {"2023-01": 100.0, "2023-02": 300.0, "2023-03": 0.0, "2023-04": 0.0}
+    assert spending_series(small, "Y") == {}
+    assert spending_series(small, "M", by="shop") == {}
+
+
+def test_month_over_month(small):
+    """Изменение к предыдущему месяцу; рост от нулевого месяца не определен."""
+    result = month_over_month(small)
+    assert result["2023-01"] == {"total": 150.0, "delta": None, "delta_percent": None}
+    assert result["2023-02"] == {"total": 300.0, "delta": 150.0, "delta_percent": 100.0}
+    assert result["2023-04"] == {"total": 25.0, "delta": 25.0, "delta_percent": None}
+    assert month_over_month(small, by="category")["Еда"]["2023-02"]["delta"] == 200.0
+
+
+def test_rolling_matches_point_reports(transactions):
+    """Скользящая сумма за 90 дней совпадает с отдельным расчетом трат по категории на каждую дату."""
+    category = transactions["Категория"].value_counts().index[0]
+    rolling = rolling_spending(transactions, windows=(90,), by="category", start="2023-04-01")["90d"][category]
+    for day in ("2023-04-01", "2023-05-15", "2023-06-30"):
+        end = pd.Timestamp(day) + pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+        start = pd.Timestamp(day) - pd.Timedelta(days=89)
+        mask = (
+            (transactions["Категория"] == category) & (transactions["Сумма операции"] < 0)
+            & (transactions["Дата операции"] >= start) & (transactions["Дата операции"] <= end)
+        )
+        assert rolling[day] == pytest.approx(-transactions.loc[mask, "Сумма операции"].sum(), abs=0.01)
+    assert min(rolling) == "2023-04-01"
+
+
+def test_sources_agree(transactions):
+    """DataFrame и TransactionStore дают одинаковые ряды, ответ сериализуется в JSON."""
+    store = TransactionStore(transactions)
+    for report in (lambda t: spending_series(t, "W", by="card"), lambda t: month_over_month(t, by="category"),
+                   lambda t: rolling_spending(t, end="2023-03-31")):
+        assert report(store) == report(transactions)
+        json.dumps(report(transactions), ensure_ascii=False, allow_nan=False)
+
+
+def test_series_total_matches_report(transactions):
+    """Сумма месячного ряда по категории равна отчету spending_by_category за то же окно."""
+    category = transactions["Категория"].value_counts().index[0]
+    series = spending_series(transactions, "M", by="category", start="2023-03-30", end="2023-06-30")
+    total = spending_by_category(transactions, category, "2023-06-30")["total"]
+    assert sum(series[category].values()) == pytest.approx(total, abs=0.01)
@@ -1,7 +1,8 @@
 """Tests for utility functions."""
 from datetime import datetime
+import pandas as pd
 import pytest
-from src.utils import get_greeting
+from src.utils import get_greeting, iter_transactions, load_transactions, normalize_transactions, save_transactions
 
 
 def test_get_greeting():
@@ -14,4 +15,41 @@ def test_get_greeting():
     ]
 
     for time, expected in test_cases:
-        assert get_greeting(time) == expected
\ No newline at end of file
+        assert get_greeting(time) == expected
+
+@pytest.fixture
+def transactions_frame():
+    return pd.DataFrame({
+        "Дата операции": ["2023-01-01", "2023-01-02", "2023-01-08", "2023-02-01", "2023-02-03"],
+        "Сумма операции": [-100.0, -50.0, -300.0, 1000.0, -20.0],
+        "Категория": ["Еда", "Транспорт", "Еда", "Зарплата", "Еда"],
+        "Описание": ["Кафе", "Такси", "Магазин", "Аванс", "Кофе"],
+    })
+
+
+@pytest.mark.parametrize("extension", ["xlsx", "csv"])
+def test_iter_transactions_matches_load(tmp_path, transactions_frame, extension):
+    """Потоковое чтение дает те же данные, что и полная загрузка."""
+    file_path = str(tmp_path / f"operations.{extension}")
+    if extension == "csv":
+        transactions_frame.to_csv(file_path, index=False)
+    else:
+        transactions_frame.to_excel(file_path, index=False)
+
+    chunks = list(iter_transactions(file_path, chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+    streamed = pd.concat(chunks, ignore_index=True)
+    expected = load_transactions(file_path, use_cache=False) if extension == "xlsx" else \
+        normalize_transactions(pd.read_csv(file_path))
+    # Полная загрузка хранит текстовые колонки как category, части — как object
+    categorical = expected.select_dtypes("category").columns
+    pd.testing.assert_frame_equal(streamed, expected.astype({col: object for col in categorical}))
+
+
+def test_save_transactions_without_calendar_columns(tmp_path, transactions_frame):
+    """Служебные колонки загрузки не попадают в сохраненный файл."""
+    source, target = str(tmp_path / "operations.csv"), str(tmp_path / "out.xlsx")
+    transactions_frame.to_csv(source, index=False)
+    save_transactions(load_transactions(source), target)
+    assert pd.read_excel(target).columns.tolist() == transactions_frame.columns.tolist()
@@ -1,7 +1,8 @@
 import pytest
 from datetime import datetime
 from unittest.mock import patch, MagicMock
-from src.views import main_page, events_page
+import pandas as pd
+from src.views import main_page, events_page, summarize_cards
 
 @pytest.fixture
 def mock_transactions():
@@ -29,4 +30,17 @@ def test_events_page_with_month_period(mock_filter):
     mock_filter.return_value = MagicMock()
     result = events_page("2023-01-15", "M")
     assert "expenses" in result
-    assert "income" in result
\ No newline at end of file
+    assert "income" in result
+
+def test_summarize_cards():
+    """Сводка по картам: порядок появления, карты без трат и строки без карты."""
+    df = pd.DataFrame({
+        "Номер карты": ["*7197", None, "*5091", "*7197", "*4556"],
+        "Сумма операции": [-160.89, -800.0, -564.0, -64.005, 5046.0],
+    })
+    assert summarize_cards(df) == [
+        {"last_digits": "*7197", "total_spent": 224.9, "cashback": 2.25},
+        {"last_digits": "*5091", "total_spent": 564.0, "cashback": 5.64},
+        {"last_digits": "*4556", "total_spent": 0.0, "cashback": 0.0},
+    ]
+    assert summarize_cards(df.drop(columns="Номер карты")) == []
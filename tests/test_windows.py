@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import normalize_transactions
+from src.windows import (
+    MISSING_KEY, add_calendar_columns, calendar_columns, has_calendar_columns, month_key, month_mask, month_start,
+    parse_month, period_start, weekdays, window_bounds
+)
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "Дата операции": ["31.12.2021 16:44:00", "2021-11-01 00:00:00", None, "29.02.2020 10:00:00"],
+        "Сумма операции": [-100.0, -200.0, -300.0, -400.0],
+    })
+
+
+def test_window_bounds_cached():
+    """Границы окна совпадают с DateOffset и кэшируются."""
+    window_bounds.cache_clear()
+    start, end = window_bounds("2021-12-31 16:44:00", "Q")
+    assert end == pd.Timestamp("2021-12-31 16:44:00")
+    assert start == end - pd.DateOffset(months=3)
+    window_bounds("2021-12-31 16:44:00", "Q")
+    assert window_bounds.cache_info().hits == 1
+    with pytest.raises(ValueError):
+        period_start(end, "W")
+
+
+def test_month_keys_roundtrip():
+    """Ключ месяца, начало месяца и разбор строки "YYYY-MM" согласованы."""
+    key = parse_month("2021-12")
+    assert key == month_key(pd.Timestamp("2021-12-31"))
+    assert month_start(key) == pd.Timestamp("2021-12-01")
+    assert month_start(key + 1) == pd.Timestamp("2022-01-01")
+
+
+def test_calendar_columns(frame):
+    """Колонки загрузки совпадают с календарем pandas, строки без даты получают MISSING_KEY."""
+    df = add_calendar_columns(frame.copy())
+    assert has_calendar_columns(df)
+    dates = pd.to_datetime(df["Дата операции"], format="mixed", dayfirst=True)
+    valid = dates.notna().to_numpy()
+    month_keys, day_ordinals = calendar_columns(df)
+    assert (month_keys[valid] == (dates.dt.year * 12 + dates.dt.month - 1)[valid]).all()
+    assert (weekdays(day_ordinals[valid]) == dates.dt.weekday[valid]).all()
+    assert month_keys[2] == MISSING_KEY and day_ordinals[2] == MISSING_KEY
+    assert month_mask(df, 2021, 12).tolist() == [True, False, False, False]
+
+
+def test_calendar_columns_fallback(frame):
+    """Без колонок загрузки (или после concat с кадром без них) ключи вычисляются по датам."""
+    loaded = add_calendar_columns(frame.copy())
+    mixed = pd.concat([loaded, frame], ignore_index=True)
+    assert not has_calendar_columns(mixed)
+    month_keys, _ = calendar_columns(mixed)
+    np.testing.assert_array_equal(month_keys[:4], month_keys[4:])
+
+
+def test_normalize_adds_calendar_columns(frame):
+    """normalize_transactions добавляет колонки для обоих путей загрузки."""
+    assert has_calendar_columns(normalize_transactions(frame.copy(), warn_missing=False))
+    assert has_calendar_columns(normalize_transactions(frame.copy(), warn_missing=False, compact=False))